@@ -0,0 +1,111 @@
+"""Motion-adaptive frame selection for timeline extraction.
+
+One forward pass over the video computes a cheap motion-energy score (mean
+absolute difference between heavily downscaled grayscale frames). The frame
+budget is then spread along the cumulative motion curve, so bursts of action get
+dense coverage while long static stretches get only a few frames.
+"""
+import threading
+
+import numpy as np
+
+ANALYSIS_WIDTH = 64
+ANALYSIS_FPS = 10
+# Share of the budget spread uniformly so static stretches never vanish entirely
+UNIFORM_SHARE = 0.2
+
+_energy_cache = {}
+_energy_cache_lock = threading.Lock()
+_ENERGY_CACHE_SIZE = 32
+
+
+def compute_motion_energy(video_path, analysis_width=ANALYSIS_WIDTH, analysis_fps=ANALYSIS_FPS):
+    """Per-frame motion energy (float32, one value per frame) from a single forward pass.
+
+    Frames between analysis samples are only grabbed, not converted; their energy
+    is interpolated from the neighbouring samples.
+    """
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError('Could not open video file')
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, int(round(fps / analysis_fps)))
+
+    sample_idx = []
+    sample_energy = []
+    previous = None
+    frame_idx = 0
+    while cap.grab():
+        if frame_idx % step == 0:
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            height, width = frame.shape[:2]
+            small_height = max(1, int(round(height * analysis_width / width)))
+            small = cv2.resize(frame, (analysis_width, small_height), interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+            energy = 0.0 if previous is None else float(np.abs(gray - previous).mean())
+            previous = gray
+            sample_idx.append(frame_idx)
+            sample_energy.append(energy)
+        frame_idx += 1
+    cap.release()
+
+    if not sample_idx:
+        return np.zeros(0, dtype=np.float32)
+    # The first sample has no predecessor; borrow the next sample's score
+    if len(sample_energy) > 1:
+        sample_energy[0] = sample_energy[1]
+    return np.interp(np.arange(frame_idx), sample_idx, sample_energy).astype(np.float32)
+
+
+def motion_energy_cached(video_key, video_path):
+    """compute_motion_energy memoized per video key (path, mtime, size)"""
+    with _energy_cache_lock:
+        energy = _energy_cache.get(video_key)
+    if energy is not None:
+        return energy
+
+    energy = compute_motion_energy(video_path)
+    with _energy_cache_lock:
+        if len(_energy_cache) >= _ENERGY_CACHE_SIZE:
+            _energy_cache.pop(next(iter(_energy_cache)))
+        _energy_cache[video_key] = energy
+    return energy
+
+
+def select_adaptive_frames(energy, budget, must_include=(), uniform_share=UNIFORM_SHARE):
+    """Choose about `budget` 0-based frame indices weighted by motion, plus every index in must_include"""
+    total = len(energy)
+    must_include = np.unique(np.asarray([i for i in must_include if 0 <= i < total], dtype=np.int64))
+    if total == 0:
+        return must_include.tolist()
+
+    remaining = int(budget) - len(must_include)
+    if remaining <= 0:
+        return must_include.tolist()
+    if remaining >= total:
+        return list(range(total))
+
+    weights = energy.astype(np.float64)
+    mean = weights.mean()
+    if mean <= 0:
+        weights = np.ones(total)
+    else:
+        weights = (1 - uniform_share) * weights / mean + uniform_share
+    cumulative = np.cumsum(weights)
+
+    # Inverse-CDF sampling at evenly spaced quantiles of cumulative motion
+    targets = (np.arange(remaining) + 0.5) / remaining * cumulative[-1]
+    picked = np.searchsorted(cumulative, targets)
+
+    # Dense bursts collapse onto the same frames; top up from the highest-motion frames left
+    chosen = np.union1d(np.unique(picked), must_include)
+    shortfall = int(budget) - len(chosen)
+    if shortfall > 0:
+        order = np.argsort(-weights, kind='stable')
+        extra = order[~np.isin(order, chosen)][:shortfall]
+        chosen = np.union1d(chosen, extra)
+    return chosen.tolist()
@@ -0,0 +1,235 @@
+"""Align a re-encoded or trimmed video with the original to carry its annotations over.
+
+Every frame is reduced to a tiny grayscale thumbnail (its signature) in one
+forward pass over the video; signatures are cached per video version, so
+aligning against the same file again only reads a small .npz file.
+
+Alignment compares the signatures' frame-to-frame change and their level
+relative to the video's mean image, which survive re-encoding, rescaling and
+brightness shifts:
+
+  1. If the frame rates differ the source is resampled to the target's rate.
+  2. A window in the middle of the source is located anywhere in the target
+     by FFT cross-correlation of those features.
+  3. The other windows are tracked outward from there, each searched near its
+     neighbour's offset, so dropped or duplicated frames (drift) are followed;
+     a robust line through the window offsets maps every source frame to a
+     target frame.
+"""
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+SIGNATURE_SIZE = (16, 12)
+MIN_WINDOW_SIMILARITY = 0.3
+INLIER_FRAMES = 3
+VERIFY_ROWS = 2000
+
+
+def _digest(value):
+    return hashlib.blake2b(repr(value).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def compute_signatures(video_path, size=SIGNATURE_SIZE):
+    """(frames x width*height uint8 signatures, fps) from one sequential pass over the video"""
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError('Could not open video file')
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    rows = []
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            rows.append(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).ravel())
+    finally:
+        cap.release()
+    return np.array(rows, dtype=np.uint8).reshape(len(rows), size[0] * size[1]), fps
+
+
+class SignatureCache:
+    """Signatures stored as {video}_{version}.npz; a changed video gets a new file"""
+
+    def __init__(self, folder, size=SIGNATURE_SIZE):
+        self.folder = folder
+        self.size = tuple(size)
+        self._lock = threading.Lock()
+        self._video_locks = {}
+
+    def _path(self, video_path):
+        st = os.stat(video_path)
+        prefix = _digest(os.path.abspath(video_path))
+        return prefix, os.path.join(self.folder, f"{prefix}_{_digest((st.st_mtime_ns, st.st_size, self.size))}.npz")
+
+    def get(self, video_path):
+        """(signatures, fps) for the current version of a video, computing them on first use"""
+        prefix, path = self._path(video_path)
+        with self._lock:
+            video_lock = self._video_locks.setdefault(prefix, threading.Lock())
+        with video_lock:
+            if os.path.exists(path):
+                with np.load(path) as cached:
+                    return cached['signatures'], float(cached['fps'])
+
+            signatures, fps = compute_signatures(video_path, self.size)
+            os.makedirs(self.folder, exist_ok=True)
+            for name in os.listdir(self.folder):
+                if name.startswith(f"{prefix}_"):
+                    os.remove(os.path.join(self.folder, name))
+            partial = f"{path}.partial"
+            with open(partial, 'wb') as f:
+                np.savez(f, signatures=signatures, fps=fps)
+            os.replace(partial, path)
+            return signatures, fps
+
+
+def features(signatures, size=SIGNATURE_SIZE):
+    """Standardized 2x2-pooled signatures: frame-to-frame change next to the level (frames x dims)
+
+    The level has the video's mean image and each frame's brightness removed,
+    so neither a static background nor a global brightness shift counts.
+    """
+    width, height = size
+    grid = signatures.reshape(len(signatures), height // 2, 2, width // 2, 2).astype(np.float32).mean(axis=(2, 4))
+    grid = grid.reshape(len(signatures), -1)
+    change = np.diff(grid, axis=0, prepend=grid[:1])
+    level = grid - grid.mean(axis=0)
+    level -= level.mean(axis=1, keepdims=True)
+    return np.hstack([change / (change.std() + 1e-6), level / (level.std() + 1e-6)])
+
+
+def cross_correlation(a, b, min_overlap):
+    """(lags, scores): mean over the overlap of sum_d a[i, d] * b[i + lag, d], for lags overlapping min_overlap rows"""
+    n = len(a) + len(b) - 1
+    size = 1 << (n - 1).bit_length()
+    spectrum = (np.conj(np.fft.rfft(a, size, axis=0)) * np.fft.rfft(b, size, axis=0)).sum(axis=1)
+    raw = np.fft.irfft(spectrum, size)
+    lags = np.arange(-(len(a) - 1), len(b))
+    overlap = np.minimum(len(a), len(b) - lags) - np.maximum(0, -lags)
+    keep = overlap >= min_overlap
+    return lags[keep], raw[lags[keep] % size] / overlap[keep]
+
+
+def local_lag(source, target, start, window, expected, radius):
+    """Best lag for source[start:start + window] within expected +- radius (window fully inside the target)"""
+    lo = max(0, start + expected - radius)
+    hi = min(len(target), start + expected + window + radius)
+    if hi - lo < window:
+        return None
+    views = np.lib.stride_tricks.sliding_window_view(target[lo:hi], window, axis=0)
+    scores = np.einsum('ldw,wd->l', views, source[start:start + window])
+    return lo - start + int(np.argmax(scores))
+
+
+def similarity(source, target, mapping):
+    """Correlation of source[i] and target[mapping[i]] features over the rows that map inside the target"""
+    mapping = np.round(mapping).astype(np.int64)
+    valid = np.flatnonzero((mapping >= 0) & (mapping < len(target)))
+    if len(valid) == 0:
+        return 0.0
+    if len(valid) > VERIFY_ROWS:
+        valid = valid[np.linspace(0, len(valid) - 1, VERIFY_ROWS).astype(np.int64)]
+    a = source[valid].ravel()
+    b = target[mapping[valid]].ravel()
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-6))
+
+
+def reject_outliers(points):
+    """Drop window matches whose offset disagrees with the median of their neighbours' offsets"""
+    if len(points) < 3:
+        return points
+    lags = np.array([y - x for x, y in points])
+    kept = []
+    for i, point in enumerate(points):
+        neighbours = lags[max(0, i - 2):i + 3]
+        if abs(lags[i] - np.median(neighbours)) <= INLIER_FRAMES:
+            kept.append(point)
+    return kept
+
+
+def interpolate(anchors, source_idx, slope):
+    """Target index for each source index: piecewise linear through the anchors, extended with `slope`"""
+    x, y = np.array(anchors, dtype=np.float64).T
+    source_idx = np.asarray(source_idx, dtype=np.float64)
+    mapped = np.interp(source_idx, x, y)
+    mapped = np.where(source_idx < x[0], y[0] + (source_idx - x[0]) * slope, mapped)
+    return np.where(source_idx > x[-1], y[-1] + (source_idx - x[-1]) * slope, mapped)
+
+
+def align(source_signatures, source_fps, target_signatures, target_fps, size=SIGNATURE_SIZE, window=None):
+    """Map source frames onto target frames (0-based) through matched anchor frames
+
+    Returns the anchors (source index, target index) that map_frames interpolates
+    between, the overall offset and scale (target_idx ~ scale * source_idx +
+    offset), the drift in frames per minute beyond what a frame-rate change
+    explains, the confidence (correlation of the mapped frames' features, 1.0 is
+    identical) and the number of windows that were matched.
+    """
+    if len(source_signatures) < 2 or len(target_signatures) < 2:
+        raise ValueError('Both videos need at least two frames')
+    rate = target_fps / source_fps if source_fps and target_fps else 1.0
+    if abs(rate - 1) < 1e-3:
+        rate = 1.0
+
+    # Source resampled onto the target's frame clock
+    resampled = np.minimum(np.round(np.arange(int(round(len(source_signatures) * rate))) / rate).astype(np.int64),
+                           len(source_signatures) - 1)
+    source = features(source_signatures[resampled], size)
+    target = features(target_signatures, size)
+
+    window = min(window or int(max(30, min(300, len(source) // 10))), len(source), len(target))
+    radius = max(10, window // 2)
+    starts = list(range(0, len(source) - window + 1, window))
+
+    # Anchor: the middle window (most likely inside a trimmed target) searched over the whole target
+    middle = starts[len(starts) // 2]
+    lags, scores = cross_correlation(source[middle:middle + window], target, window)
+    anchor = int(lags[np.argmax(scores)]) - middle
+
+    # Track the remaining windows outward from the anchor, each searched around its neighbour's lag
+    matched = {middle: anchor}
+    for ordered in (starts[len(starts) // 2 + 1:], starts[:len(starts) // 2][::-1]):
+        expected = anchor
+        for start in ordered:
+            lag = local_lag(source, target, start, window, expected, radius)
+            if lag is None:
+                continue
+            window_idx = np.arange(start, start + window)
+            if similarity(source[start:start + window], target, window_idx + lag) >= MIN_WINDOW_SIMILARITY:
+                matched[start] = lag
+                expected = lag
+
+    # Anchors are window centres in source frames on the source's own clock
+    points = reject_outliers(sorted((start + (window - 1) / 2, start + (window - 1) / 2 + lag)
+                                    for start, lag in matched.items()))
+    anchors = [(x / rate, y) for x, y in points]
+    if len(anchors) >= 2:
+        slope, intercept = np.polyfit(*np.array(anchors).T, 1)
+    else:
+        slope, intercept = rate, float(anchor)
+        anchors = [(0.0, float(anchor))]
+    mapping = interpolate(anchors, np.arange(len(source)) / rate, slope)
+    confidence = similarity(source, target, mapping)
+
+    return {
+        'offset': float(intercept),
+        'scale': float(slope),
+        'drift_frames_per_minute': float((slope / rate - 1) * target_fps * 60),
+        'confidence': confidence,
+        'windows': len(points),
+        'anchors': [[round(x, 3), round(y, 3)] for x, y in anchors],
+        'source_fps': source_fps,
+        'target_fps': target_fps
+    }
+
+
+def map_frames(frame_numbers, alignment, target_frames):
+    """1-based target frame for each 1-based source frame, or None where it falls outside the target"""
+    source_idx = np.asarray(list(frame_numbers), dtype=np.float64) - 1
+    targets = np.round(interpolate(alignment['anchors'], source_idx, alignment['scale'])).astype(np.int64) + 1
+    return [int(target) if 1 <= target <= target_frames else None for target in targets]
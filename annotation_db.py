@@ -0,0 +1,195 @@
+"""Indexed SQLite mirror of every annotation CSV in csv/.
+
+The CSVs stay the source of truth. Each file is imported once and re-imported
+only when its mtime or size changes, so corpus-wide questions ("all left-foot
+touches in every cone drill") are answered from indexes instead of loading every
+CSV with pandas. Rows keep their original columns so any video can be exported
+back to its current CSV layout.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+from csv_catalog import detect_csv_format, read_csv
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    csv_filename TEXT PRIMARY KEY,
+    video TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    format TEXT NOT NULL,
+    columns TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS annotations (
+    id INTEGER PRIMARY KEY,
+    video TEXT NOT NULL,
+    frame_number INTEGER NOT NULL,
+    time_seconds REAL,
+    timestamp TEXT,
+    event_type TEXT NOT NULL,
+    foot TEXT NOT NULL,
+    row_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_annotations_video_frame ON annotations (video, frame_number);
+CREATE INDEX IF NOT EXISTS idx_annotations_event_foot ON annotations (event_type, foot);
+"""
+
+FOOT_CODES = {1: 'right', 2: 'left'}
+
+
+def normalize_event(row, csv_format):
+    """Map a CSV row in either layout to (event_type, foot)"""
+    if csv_format == 'new':
+        touch = int(row.get('Touch_Event') or 0)
+        plant = int(row.get('Foot_Plant_Event') or 0)
+        if touch:
+            return 'ball_touch', FOOT_CODES.get(touch, 'other')
+        if plant:
+            return 'foot_plant', FOOT_CODES.get(plant, 'other')
+        return 'none', 'none'
+
+    event_type = row.get('Event Type') or 'ball_touch'
+    body_part = str(row.get('Body Part') or '')
+    foot = body_part.lower().replace(' foot', '') if body_part else 'none'
+    if event_type in ('foot_touchdown', 'foot_liftoff'):
+        event_type = 'foot_plant'
+    return event_type, foot
+
+
+class AnnotationDatabase:
+    def __init__(self, db_path, csv_folder, reader=read_csv):
+        self.db_path = db_path
+        self.csv_folder = csv_folder
+        self.reader = reader
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # ---- sync -----------------------------------------------------------
+
+    def sync(self):
+        """Import new or changed CSVs and drop removed ones; returns the files re-imported"""
+        with self._sync_lock:
+            conn = self._connect()
+            known = {row['csv_filename']: (row['mtime_ns'], row['size'])
+                     for row in conn.execute('SELECT csv_filename, mtime_ns, size FROM files')}
+            on_disk = {}
+            if os.path.isdir(self.csv_folder):
+                for entry in os.scandir(self.csv_folder):
+                    if entry.is_file() and entry.name.lower().endswith('.csv'):
+                        st = entry.stat()
+                        on_disk[entry.name] = (st.st_mtime_ns, st.st_size)
+
+            changed = [name for name, sig in on_disk.items() if known.get(name) != sig]
+            for name in changed:
+                self._import_file(conn, name)
+            for name in set(known) - set(on_disk):
+                self._remove_file(conn, name)
+            return changed
+
+    def sync_file(self, csv_filename):
+        """Re-import one CSV right after the app wrote it"""
+        with self._sync_lock:
+            conn = self._connect()
+            if os.path.exists(os.path.join(self.csv_folder, csv_filename)):
+                self._import_file(conn, csv_filename)
+            else:
+                self._remove_file(conn, csv_filename)
+
+    def _remove_file(self, conn, csv_filename):
+        video = os.path.splitext(csv_filename)[0]
+        with conn:
+            conn.execute('DELETE FROM annotations WHERE video = ?', (video,))
+            conn.execute('DELETE FROM files WHERE csv_filename = ?', (csv_filename,))
+
+    def _import_file(self, conn, csv_filename):
+        csv_path = os.path.join(self.csv_folder, csv_filename)
+        st = os.stat(csv_path)
+        df = self.reader(csv_path)
+        video = os.path.splitext(csv_filename)[0]
+        csv_format = detect_csv_format(df.columns)
+
+        # Plain Python values (NaN -> None) so rows round-trip through JSON
+        records = df.astype(object).where(df.notna(), None).to_dict('records')
+        rows = []
+        for record in records:
+            if record.get('Frame Number') is None:
+                continue
+            event_type, foot = normalize_event(record, csv_format)
+            time_seconds = record.get('Time (seconds)')
+            rows.append((
+                video,
+                int(record['Frame Number']),
+                float(time_seconds) if time_seconds is not None else None,
+                record.get('Timestamp'),
+                event_type,
+                foot,
+                json.dumps(record, default=str)
+            ))
+
+        with conn:
+            conn.execute('DELETE FROM annotations WHERE video = ?', (video,))
+            conn.executemany(
+                'INSERT INTO annotations (video, frame_number, time_seconds, timestamp, event_type, foot, row_json) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            conn.execute(
+                'INSERT OR REPLACE INTO files (csv_filename, video, mtime_ns, size, format, columns) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (csv_filename, video, st.st_mtime_ns, st.st_size, csv_format, json.dumps(list(df.columns))))
+
+    # ---- queries --------------------------------------------------------
+
+    def query(self, video=None, event_type=None, foot=None, frame_min=None, frame_max=None,
+              limit=100, offset=0):
+        """Filter annotations across the corpus; returns (rows, total_matching)"""
+        clauses, params = [], []
+        for column, value in (('video', video), ('event_type', event_type), ('foot', foot)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if frame_min is not None:
+            clauses.append('frame_number >= ?')
+            params.append(int(frame_min))
+        if frame_max is not None:
+            clauses.append('frame_number <= ?')
+            params.append(int(frame_max))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        conn = self._connect()
+        total = conn.execute(f'SELECT COUNT(*) FROM annotations {where}', params).fetchone()[0]
+        rows = conn.execute(
+            f'SELECT video, frame_number, time_seconds, timestamp, event_type, foot FROM annotations {where} '
+            'ORDER BY video, frame_number LIMIT ? OFFSET ?', params + [int(limit), int(offset)])
+        return [dict(row) for row in rows], total
+
+    def summary(self):
+        """Annotation counts per video, event type and foot"""
+        rows = self._connect().execute(
+            'SELECT video, event_type, foot, COUNT(*) AS count FROM annotations '
+            'GROUP BY video, event_type, foot ORDER BY video, event_type, foot')
+        return [dict(row) for row in rows]
+
+    def export_csv(self, video):
+        """Rebuild a video's CSV text in the column layout of the file it was imported from"""
+        import pandas as pd
+        conn = self._connect()
+        file_row = conn.execute('SELECT columns FROM files WHERE video = ?', (video,)).fetchone()
+        if file_row is None:
+            return None
+        columns = json.loads(file_row['columns'])
+        records = [json.loads(row['row_json']) for row in conn.execute(
+            'SELECT row_json FROM annotations WHERE video = ? ORDER BY frame_number', (video,))]
+        return pd.DataFrame(records, columns=columns).to_csv(index=False)
@@ -0,0 +1,97 @@
+"""Server-side storage for annotator sessions.
+
+The cookie only carries the session ID; annotations live in SQLite keyed by
+(session_id, frame_number), so adding or removing a touch is a single-row
+insert/delete no matter how many annotations the session already holds.
+"""
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS annotations (
+    session_id TEXT NOT NULL,
+    frame_number INTEGER NOT NULL,
+    time_seconds REAL NOT NULL,
+    body_part TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    PRIMARY KEY (session_id, frame_number)
+) WITHOUT ROWID;
+"""
+
+# Sessions untouched for this long are dropped when new sessions start
+SESSION_TTL_SECONDS = 7 * 24 * 3600
+
+
+class AnnotationSessionStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _touch(self, conn, session_id):
+        conn.execute('INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) '
+                     'ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at',
+                     (session_id, time.time()))
+
+    def start(self, session_id):
+        """Begin a fresh session (drops any annotations it already had) and purge stale ones"""
+        with self._connect() as conn:
+            cutoff = time.time() - SESSION_TTL_SECONDS
+            stale = [row['session_id'] for row in
+                     conn.execute('SELECT session_id FROM sessions WHERE updated_at < ?', (cutoff,))]
+            for stale_id in stale + [session_id]:
+                conn.execute('DELETE FROM annotations WHERE session_id = ?', (stale_id,))
+                conn.execute('DELETE FROM sessions WHERE session_id = ?', (stale_id,))
+            self._touch(conn, session_id)
+
+    def upsert(self, session_id, annotation):
+        """Insert or replace the annotation for annotation['frame_number']; returns the new total"""
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO annotations '
+                '(session_id, frame_number, time_seconds, body_part, timestamp) VALUES (?, ?, ?, ?, ?)',
+                (session_id, annotation['frame_number'], annotation['time_seconds'],
+                 annotation['body_part'], annotation['timestamp']))
+            self._touch(conn, session_id)
+        return self.count(session_id)
+
+    def delete(self, session_id, frame_number):
+        """Remove the annotation on a frame; returns the new total"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM annotations WHERE session_id = ? AND frame_number = ?',
+                         (session_id, frame_number))
+            self._touch(conn, session_id)
+        return self.count(session_id)
+
+    def count(self, session_id):
+        row = self._connect().execute('SELECT COUNT(*) FROM annotations WHERE session_id = ?',
+                                      (session_id,)).fetchone()
+        return row[0]
+
+    def list(self, session_id):
+        """All annotations of a session ordered by frame number"""
+        rows = self._connect().execute(
+            'SELECT frame_number, time_seconds, body_part, timestamp FROM annotations '
+            'WHERE session_id = ? ORDER BY frame_number', (session_id,))
+        return [dict(row) for row in rows]
+
+    def clear(self, session_id):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM annotations WHERE session_id = ?', (session_id,))
+            conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
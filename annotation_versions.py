@@ -0,0 +1,178 @@
+"""Versions (ETags) of the annotation CSVs, so several annotators can edit one video safely.
+
+A CSV's ETag is a digest of its bytes. load_csv hands it out and every edit
+sends it back; edits run under a per-file lock (a thread lock plus flock() on
+a lock file, so gunicorn workers serialize too). A copy of every version that
+was handed out is kept in the versions folder, named
+{path digest}_{etag}.csv, so a stale edit can be compared against what the
+annotator actually saw:
+
+  - frames nobody else touched since that version are merged into the
+    current file as usual;
+  - frames that were changed on disk since then, and that the edit would set
+    differently, are conflicts: the edit is rejected with the diff.
+"""
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: falls back to a per-process lock only
+    fcntl = None
+
+# ETag of a CSV that does not exist yet
+ABSENT = 'absent'
+# Versions kept per CSV for comparing stale edits
+KEEP_VERSIONS = 20
+
+
+def _digest(value):
+    return hashlib.blake2b(repr(value).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def content_etag(data):
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def normalize(value):
+    """Comparable form of a CSV cell: None for blanks, rounded floats for numbers, else the string"""
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value) or None
+    return None if number != number else round(number, 6)
+
+
+def rows_by_frame(records):
+    """{frame number: row} for DataFrame records or client rows, with NaN cells as None"""
+    rows = {}
+    for row in records:
+        if normalize(row.get('Frame Number')) is not None:
+            rows[int(float(row['Frame Number']))] = {key: None if isinstance(value, float) and value != value else value
+                                                     for key, value in row.items()}
+    return rows
+
+
+def same_row(wanted, row):
+    """Whether `row` already has every value of `wanted` (a client row may carry fewer columns)"""
+    return all(normalize(value) == normalize(row.get(key)) for key, value in wanted.items())
+
+
+def has_state(rows, frame, wanted):
+    """Whether `frame` in `rows` is as `wanted` describes; None means the frame has no row"""
+    if wanted is None:
+        return frame not in rows
+    return frame in rows and same_row(wanted, rows[frame])
+
+
+def diff(base, current):
+    """Changes from one {frame: row} version to another: added and removed rows, changed (before, after) pairs"""
+    return {
+        'added': [current[f] for f in sorted(set(current) - set(base))],
+        'removed': [base[f] for f in sorted(set(base) - set(current))],
+        'changed': [{'frame_number': f, 'before': base[f], 'after': current[f]}
+                    for f in sorted(set(base) & set(current)) if not same_row(base[f], current[f])]
+    }
+
+
+def find_conflicts(base, current, edits):
+    """Frames where an edit collides with a change made since `base`
+
+    `edits` maps frame -> wanted row, or None to delete it. A frame conflicts
+    when someone else changed it since `base` and the edit wants it to end up
+    different from how it is now. With an unknown base (None) every frame the
+    edit would change counts as changed by someone else.
+    """
+    conflicts = []
+    for frame, wanted in sorted(edits.items()):
+        if base is not None:
+            if has_state(base, frame, wanted):
+                continue  # Not actually edited by this client
+            if has_state(current, frame, base.get(frame)):
+                continue  # Untouched since base
+        if has_state(current, frame, wanted):
+            continue  # Already as the edit wants it
+        conflicts.append({
+            'frame_number': frame,
+            'base': base.get(frame) if base is not None else None,
+            'server': current.get(frame),
+            'client': wanted
+        })
+    return conflicts
+
+
+class AnnotationVersions:
+    """ETags, per-file edit locks and recent versions of the CSVs in one folder"""
+
+    def __init__(self, folder, keep=KEEP_VERSIONS):
+        self.folder = folder
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._file_locks = {}
+
+    def _prefix(self, csv_path):
+        return _digest(os.path.abspath(csv_path))
+
+    @contextmanager
+    def locked(self, csv_path):
+        """Hold the edit lock of one CSV, across threads and worker processes"""
+        prefix = self._prefix(csv_path)
+        with self._lock:
+            file_lock = self._file_locks.setdefault(prefix, threading.Lock())
+        with file_lock:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(os.path.join(self.folder, f"{prefix}.lock"), 'a+b') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def etag(self, csv_path):
+        try:
+            with open(csv_path, 'rb') as f:
+                return content_etag(f.read())
+        except FileNotFoundError:
+            return ABSENT
+
+    def remember(self, csv_path):
+        """ETag of the CSV's current content, keeping a copy of that version for later diffs"""
+        try:
+            with open(csv_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return ABSENT
+        etag = content_etag(data)
+        prefix = self._prefix(csv_path)
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, f"{prefix}_{etag}.csv")
+        if os.path.exists(path):
+            os.utime(path)
+            return etag
+
+        partial = f"{path}.partial"
+        with open(partial, 'wb') as f:
+            f.write(data)
+        os.replace(partial, path)
+
+        versions = sorted((entry for entry in os.scandir(self.folder)
+                           if entry.name.startswith(f"{prefix}_") and entry.name.endswith('.csv')),
+                          key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in versions[:max(0, len(versions) - self.keep)]:
+            os.remove(entry.path)
+        return etag
+
+    def version(self, csv_path, etag, reader):
+        """{frame: row} of a remembered version, {} for ABSENT, or None if it is not kept any more"""
+        if etag == ABSENT:
+            return {}
+        path = os.path.join(self.folder, f"{self._prefix(csv_path)}_{etag}.csv")
+        if not os.path.exists(path):
+            return None
+        return rows_by_frame(reader(path).to_dict('records'))
@@ -1,35 +1,108 @@
-from flask import Flask, render_template, request, jsonify, send_file, url_for, session, Response
+from flask import Flask, render_template, request, jsonify, send_file, url_for, session, Response, g
 import os
-import cv2
-import pandas as pd
 import json
 from werkzeug.utils import secure_filename
 import shutil
 from datetime import datetime
 import base64
 from io import BytesIO, StringIO
-from PIL import Image
+from urllib.parse import quote, urlencode
 import uuid
 import time
 import re
+import threading
+import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from csv_catalog import CsvCatalog, detect_csv_format
+from frame_cache import SharedFrameCache
+from annotation_sessions import AnnotationSessionStore
+from annotation_db import AnnotationDatabase
+from session_index import SessionIndex
+from touch_analytics import TouchAnalytics
+from clip_cache import ClipCache
+from segment_pins import SegmentPins
+from read_ahead import ReadAhead
+from chunked_uploads import ChunkedUploads, UploadError
+from ingest import IngestPipeline, probe_video
+from alignment import SignatureCache
+from tracking import CropBoxes
+from csv_sidecars import CsvSidecars
+from track_signals import TrackSignals
+from annotation_versions import AnnotationVersions
+import annotation_versions as versioning
+import alignment
+import renditions
+import tracking
+import track_signals as timeline_tracks
+import adaptive_sampling
+import metrics
 
 app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
-app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['DATA_FOLDER'] = 'data'
-app.config['CSV_FOLDER'] = 'csv'
-app.config['FRAMES_FOLDER'] = 'extracted_frames'
-app.config['REVIEWED_FRAMES_FOLDER'] = 'reviewed_extracted_frames'
 
 ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
 ALLOWED_CSV_EXTENSIONS = {'csv'}
-
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs(app.config['DATA_FOLDER'], exist_ok=True)
-os.makedirs(app.config['CSV_FOLDER'], exist_ok=True)
-os.makedirs(app.config['FRAMES_FOLDER'], exist_ok=True)
-os.makedirs(app.config['REVIEWED_FRAMES_FOLDER'], exist_ok=True)
+# Most camera angles one multi-angle extraction may combine (one decoding thread each)
+MAX_ANGLES = 8
+
+# Working folders, created on the first request rather than at import
+FOLDER_KEYS = ('UPLOAD_FOLDER', 'DATA_FOLDER', 'CSV_FOLDER', 'FRAMES_FOLDER', 'REVIEWED_FRAMES_FOLDER')
+folders_ready = False
+
+def load_config(root=None, **overrides):
+    """Fill app.config from the environment; folder and database paths are relative to `root`"""
+    root = os.environ.get('DATA_ROOT', '') if root is None else root
+
+    def path(name):
+        # Absolute paths (e.g. SESSION_DB=/var/lib/touch/sessions.db) are kept as they are
+        return os.path.join(root, name)
+
+    app.secret_key = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
+    app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024
+    app.config['UPLOAD_FOLDER'] = path('uploads')
+    app.config['DATA_FOLDER'] = path('data')
+    app.config['CSV_FOLDER'] = path('csv')
+    app.config['FRAMES_FOLDER'] = path('extracted_frames')
+    app.config['REVIEWED_FRAMES_FOLDER'] = path('reviewed_extracted_frames')
+    # Requests slower than this (ms) are logged with their phase breakdown; 0 disables
+    app.config['SLOW_REQUEST_MS'] = float(os.environ.get('SLOW_REQUEST_MS', 0))
+    app.config['SLOW_REQUEST_LOG'] = os.environ.get('SLOW_REQUEST_LOG')
+    # Shared-memory cache of encoded frames, shared by all worker processes; 0 slots disables it
+    app.config['FRAME_CACHE_NAME'] = os.environ.get('FRAME_CACHE_NAME', 'touch_frame_cache')
+    app.config['FRAME_CACHE_SLOTS'] = int(os.environ.get('FRAME_CACHE_SLOTS', 256))
+    app.config['FRAME_CACHE_SLOT_KB'] = int(os.environ.get('FRAME_CACHE_SLOT_KB', 512))
+    # Annotator sessions keep their annotations server-side; the cookie only holds the session ID
+    app.config['SESSION_DB'] = path(os.environ.get('SESSION_DB', 'annotator_sessions.db'))
+    # Indexed SQLite mirror of csv/ for corpus-wide annotation queries
+    app.config['ANNOTATION_DB'] = path(os.environ.get('ANNOTATION_DB', 'annotations.db'))
+    # Indexed catalog of the sessions saved in REVIEWED_FRAMES_FOLDER
+    app.config['SESSION_INDEX_DB'] = path(os.environ.get('SESSION_INDEX_DB', 'reviewed_sessions.db'))
+    # Loop-mode clips cut around each annotation; CLIP_MAX_DIMENSION=0 keeps the original size
+    app.config['CLIP_CACHE_FOLDER'] = path(os.environ.get('CLIP_CACHE_FOLDER', 'clip_cache'))
+    app.config['CLIP_CACHE_MB'] = int(os.environ.get('CLIP_CACHE_MB', 500))
+    app.config['CLIP_SECONDS'] = float(os.environ.get('CLIP_SECONDS', 2.0))
+    app.config['CLIP_MAX_DIMENSION'] = int(os.environ.get('CLIP_MAX_DIMENSION', 640)) or None
+    # Pinned segments: raw decoded frames in memmapped .npy files, total size capped at PIN_MAX_MB
+    app.config['PIN_FOLDER'] = path(os.environ.get('PIN_FOLDER', 'pinned_segments'))
+    app.config['PIN_MAX_MB'] = int(os.environ.get('PIN_MAX_MB', 2048))
+    # Most frames the annotator's read-ahead worker prepares ahead of steady stepping; 0 disables it
+    app.config['READ_AHEAD_FRAMES'] = int(os.environ.get('READ_AHEAD_FRAMES', 48))
+    # Bookkeeping for resumable chunked uploads; the video itself is assembled inside DATA_FOLDER
+    app.config['CHUNKED_UPLOAD_FOLDER'] = path(os.environ.get('CHUNKED_UPLOAD_FOLDER', os.path.join('uploads', 'chunked')))
+    # Largest chunked upload accepted, and the free space DATA_FOLDER must keep after reserving one
+    app.config['MAX_UPLOAD_MB'] = int(os.environ.get('MAX_UPLOAD_MB', 16384))
+    app.config['UPLOAD_MIN_FREE_MB'] = int(os.environ.get('UPLOAD_MIN_FREE_MB', 512))
+    # Background ingest (metadata, exact frame count, thumbnail strip, CSV check) of new videos
+    app.config['INGEST_FOLDER'] = path(os.environ.get('INGEST_FOLDER', 'ingest_cache'))
+    app.config['INGEST_WORKERS'] = int(os.environ.get('INGEST_WORKERS', 2))
+    # Per-frame signatures used to carry annotations over to re-encoded or trimmed videos
+    app.config['SIGNATURE_FOLDER'] = path(os.environ.get('SIGNATURE_FOLDER', 'signature_cache'))
+    # Pose/object tracking CSVs (<video base name>_*.csv) that drive ROI crops
+    app.config['TRACKING_CSV_FOLDER'] = path(os.environ.get('TRACKING_CSV_FOLDER', 'tracking_csv'))
+    # Binary copies of the CSVs in CSV_FOLDER and TRACKING_CSV_FOLDER, rebuilt when a CSV changes
+    app.config['CSV_SIDECAR_FOLDER'] = path(os.environ.get('CSV_SIDECAR_FOLDER', 'csv_sidecars'))
+    # Edit locks and the recent versions of each annotation CSV, for ETag checks on concurrent edits
+    app.config['ANNOTATION_VERSION_FOLDER'] = path(os.environ.get('ANNOTATION_VERSION_FOLDER', 'annotation_versions'))
+    app.config.update(overrides)
 
 # Global session tracking
 current_extraction_session = None
@@ -37,6 +110,307 @@ current_extraction_session = None
 def allowed_file(filename, allowed_extensions):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
+def has_sidecar(csv_path):
+    """Whether the CSV is read through a binary sidecar (CSVs in csv/ and tracking_csv/)"""
+    folder = os.path.dirname(os.path.abspath(csv_path))
+    return csv_sidecars is not None and folder in (os.path.abspath(app.config['CSV_FOLDER']),
+                                                   os.path.abspath(app.config['TRACKING_CSV_FOLDER']))
+
+def read_csv(csv_path):
+    """Read an annotation or tracking CSV, recording the duration in /metrics
+
+    CSVs in csv/ and tracking_csv/ are loaded from their binary sidecar, which
+    is rebuilt from the CSV whenever the CSV changes (write_csv drops it too).
+    """
+    import pandas as pd
+    if has_sidecar(csv_path):
+        start = time.perf_counter()
+        df, from_sidecar = csv_sidecars.read(csv_path)
+        metrics.CSV_IO.observe(time.perf_counter() - start, op='read_sidecar' if from_sidecar else 'read')
+        return df
+    with metrics.CSV_IO.time(op='read'):
+        return pd.read_csv(csv_path)
+
+def write_csv(df, csv_path):
+    """Write an annotation CSV, recording the duration in /metrics"""
+    with metrics.CSV_IO.time(op='write'):
+        df.to_csv(csv_path, index=False)
+    if has_sidecar(csv_path):
+        csv_sidecars.invalidate(csv_path)
+
+    # Keep the corpus database in step with edits to csv/
+    if annotation_db is not None and os.path.dirname(os.path.abspath(csv_path)) == os.path.abspath(app.config['CSV_FOLDER']):
+        annotation_db.sync_file(os.path.basename(csv_path))
+
+# Built from the configured folders by create_app()
+csv_catalog = touch_analytics = clip_cache = segment_pins = ingest_pipeline = chunked_uploads = read_ahead = None
+signature_cache = crop_boxes = csv_sidecars = annotation_versions = track_signals = None
+
+def create_app(root=None, **overrides):
+    """Configure the app and (re)build the helpers that work on its folders; returns the app
+
+    Folder and database paths are relative to `root` (default: the DATA_ROOT
+    environment variable, else the working directory) and nothing is created on
+    disk until the first request. Keyword arguments override config values, e.g.
+    create_app('/srv/touch', READ_AHEAD_FRAMES=0). Routes stay on the module-level
+    app because the extraction session and the caches below are module state.
+    """
+    global csv_catalog, touch_analytics, clip_cache, segment_pins, ingest_pipeline, chunked_uploads, read_ahead
+    global signature_cache, crop_boxes, csv_sidecars, annotation_versions, track_signals
+    global annotation_store, annotation_db, session_index, folders_ready
+    load_config(root, **overrides)
+    folders_ready = False
+
+    # Parsed copies of csv/ and tracking_csv/ that read_csv loads instead of re-parsing the text
+    csv_sidecars = CsvSidecars(app.config['CSV_SIDECAR_FOLDER'])
+
+    # ETags of the annotation CSVs; edits to one CSV are serialized and stale ones checked for conflicts
+    annotation_versions = AnnotationVersions(app.config['ANNOTATION_VERSION_FOLDER'])
+
+    # Cached view of csv/ (row counts, format, preview), refreshed lazily by mtime
+    csv_catalog = CsvCatalog(app.config['CSV_FOLDER'], reader=read_csv)
+
+    # Per-video touch statistics, recomputed only for CSVs that changed
+    touch_analytics = TouchAnalytics(app.config['CSV_FOLDER'], reader=read_csv)
+
+    # Clips for loop mode, cut in the background when a CSV is loaded
+    previous_clip_cache = clip_cache
+    clip_cache = ClipCache(app.config['CLIP_CACHE_FOLDER'],
+                           max_bytes=app.config['CLIP_CACHE_MB'] * 1024 * 1024,
+                           seconds_before=app.config['CLIP_SECONDS'],
+                           seconds_after=app.config['CLIP_SECONDS'],
+                           max_dimension=app.config['CLIP_MAX_DIMENSION'])
+    if previous_clip_cache is not None:
+        previous_clip_cache.shutdown()
+
+    # Segments the annotator pinned; frames inside them are sliced from a memmap instead of decoded
+    segment_pins = SegmentPins(app.config['PIN_FOLDER'], max_bytes=app.config['PIN_MAX_MB'] * 1024 * 1024)
+
+    # New videos are ingested in the background so interactive routes only read cached results
+    previous_ingest_pipeline = ingest_pipeline
+    ingest_pipeline = IngestPipeline(app.config['INGEST_FOLDER'], app.config['CSV_FOLDER'], reader=read_csv,
+                                     max_workers=app.config['INGEST_WORKERS'])
+    if previous_ingest_pipeline is not None:
+        previous_ingest_pipeline.shutdown()
+
+    # Resumable chunked uploads (no MAX_CONTENT_LENGTH cap on the assembled video)
+    chunked_uploads = ChunkedUploads(app.config['CHUNKED_UPLOAD_FOLDER'], app.config['DATA_FOLDER'],
+                                     max_size=app.config['MAX_UPLOAD_MB'] * 1024 * 1024,
+                                     min_free=app.config['UPLOAD_MIN_FREE_MB'] * 1024 * 1024)
+
+    # Frame signatures for annotation alignment, computed once per video version
+    signature_cache = SignatureCache(app.config['SIGNATURE_FOLDER'])
+
+    # Feet-and-ball crop boxes for ROI extraction, recomputed when a tracking CSV changes
+    crop_boxes = CropBoxes(app.config['TRACKING_CSV_FOLDER'], reader=read_csv)
+
+    # Min/max pyramids of the timeline tracks (foot speed, foot height, ball distance) per tracking CSV
+    track_signals = TrackSignals(app.config['TRACKING_CSV_FOLDER'], reader=read_csv)
+
+    # Per-session background decoding of the frames the annotator is about to step to
+    previous_read_ahead = read_ahead
+    read_ahead = ReadAhead(max_depth=app.config['READ_AHEAD_FRAMES']) if app.config['READ_AHEAD_FRAMES'] > 0 else None
+    if previous_read_ahead is not None:
+        previous_read_ahead.shutdown()
+
+    # The SQLite-backed stores are reopened lazily on the new paths
+    annotation_store = None
+    annotation_db = None
+    session_index = None
+    return app
+
+def shutdown_read_ahead():
+    if read_ahead is not None:
+        read_ahead.shutdown()
+
+atexit.register(shutdown_read_ahead)
+
+def shutdown_clip_cache():
+    if clip_cache is not None:
+        clip_cache.shutdown()
+
+atexit.register(shutdown_clip_cache)
+
+def shutdown_ingest_pipeline():
+    if ingest_pipeline is not None:
+        ingest_pipeline.shutdown()
+
+atexit.register(shutdown_ingest_pipeline)
+
+def video_metadata(video_path):
+    """fps, frame count, size and duration from the ingest cache; probes the file only if it was never ingested"""
+    return ingest_pipeline.metadata(video_path) or probe_video(video_path)
+
+# Attached lazily on first use so importing the app never touches shared memory
+frame_cache = None
+frame_cache_unavailable = False
+frame_cache_lock = threading.Lock()
+
+def get_frame_cache():
+    """Return the shared frame cache, or None if it is disabled or could not be attached"""
+    global frame_cache, frame_cache_unavailable
+    if frame_cache is None and not frame_cache_unavailable:
+        with frame_cache_lock:
+            if frame_cache is None and not frame_cache_unavailable:
+                if app.config['FRAME_CACHE_SLOTS'] <= 0:
+                    frame_cache_unavailable = True
+                    return None
+                try:
+                    frame_cache = SharedFrameCache(app.config['FRAME_CACHE_NAME'],
+                                                   slots=app.config['FRAME_CACHE_SLOTS'],
+                                                   slot_size=app.config['FRAME_CACHE_SLOT_KB'] * 1024)
+                except Exception as e:
+                    print(f"Shared frame cache unavailable, decoding every frame: {e}")
+                    frame_cache_unavailable = True
+    return frame_cache
+
+annotation_store = None
+annotation_store_lock = threading.Lock()
+
+def get_annotation_store():
+    global annotation_store
+    if annotation_store is None:
+        with annotation_store_lock:
+            if annotation_store is None:
+                annotation_store = AnnotationSessionStore(app.config['SESSION_DB'])
+    return annotation_store
+
+annotation_db = None
+annotation_db_lock = threading.Lock()
+
+def get_annotation_db():
+    """Open the corpus database and bring it up to date with csv/ (only changed files are re-imported)"""
+    global annotation_db
+    if annotation_db is None:
+        with annotation_db_lock:
+            if annotation_db is None:
+                annotation_db = AnnotationDatabase(app.config['ANNOTATION_DB'], app.config['CSV_FOLDER'], reader=read_csv)
+    annotation_db.sync()
+    return annotation_db
+
+session_index = None
+session_index_lock = threading.Lock()
+
+def get_session_index():
+    """Open the reviewed-session catalog and re-index only session folders that changed"""
+    global session_index
+    if session_index is None:
+        with session_index_lock:
+            if session_index is None:
+                session_index = SessionIndex(app.config['SESSION_INDEX_DB'], app.config['REVIEWED_FRAMES_FOLDER'])
+    session_index.sync()
+    return session_index
+
+create_app()
+
+def ensure_folders():
+    """Create the working folders once per configuration (instead of at import)"""
+    global folders_ready
+    if not folders_ready:
+        for key in FOLDER_KEYS:
+            os.makedirs(app.config[key], exist_ok=True)
+        folders_ready = True
+
+def start_annotator_session():
+    """Give the browser a fresh session ID with an empty server-side annotation list"""
+    if read_ahead is not None and session.get('session_id'):
+        read_ahead.stop(session['session_id'])
+    session_id = str(uuid.uuid4())
+    session['session_id'] = session_id
+    session.pop('annotations', None)  # Drop lists left in cookies by older versions
+    get_annotation_store().start(session_id)
+    return session_id
+
+def annotator_session_id():
+    return session.get('session_id') or start_annotator_session()
+
+def frame_cache_video_key(video_path):
+    """Identify a video by path and modification time so replaced files never hit stale frames"""
+    st = os.stat(video_path)
+    return (os.path.abspath(video_path), st.st_mtime_ns, st.st_size)
+
+def source_shape(cap):
+    """(height, width) of the frames a capture decodes"""
+    import cv2
+    return int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+
+def cache_lookup(video_key, frame_idx, rendition):
+    cache = get_frame_cache()
+    if cache is None:
+        return None
+    data = cache.get((video_key, frame_idx, renditions.rendition_key(rendition)))
+    metrics.FRAME_CACHE_REQUESTS.inc(result='hit' if data is not None else 'miss')
+    return data
+
+def cache_store(video_key, frame_idx, rendition, data):
+    cache = get_frame_cache()
+    if cache is not None:
+        cache.put((video_key, frame_idx, renditions.rendition_key(rendition)), data)
+
+def roi_crop(roi, frame_idx):
+    """(x, y, width, height) crop of a 0-based frame for an ROI extraction, or None for the full frame"""
+    if roi is None or roi['boxes'] is None or not 0 <= frame_idx < len(roi['boxes']):
+        return None
+    return tuple(int(v) for v in roi['boxes'][frame_idx])
+
+def roi_frame_fields(roi, frame_idx, video_filename, rendition):
+    """Crop box and full-frame link added to an extracted frame's entry when it was cropped
+
+    The link names the video and the rendition, so it keeps working after later extractions.
+    """
+    crop = roi_crop(roi, frame_idx)
+    if crop is None:
+        return {}
+    query = {'format': rendition['format'], 'quality': rendition['quality']}
+    if rendition['max_dimension']:
+        query['max_dimension'] = rendition['max_dimension']
+    return {
+        'crop': list(crop),
+        'full_frame_url': f"/frame_full/{quote(video_filename)}/{frame_idx + 1}?{urlencode(query)}"
+    }
+
+def read_frame_renditions(cap, video_key, frame_idx, mode, wanted, crop=None):
+    """Encoded bytes for each requested rendition of a 0-based frame, from the shared cache or by decoding it once
+
+    With a crop every rendition is cut to that region before it is encoded.
+    """
+    import cv2
+    wanted = [renditions.cropped(rendition, crop) for rendition in wanted]
+    encoded = [cache_lookup(video_key, frame_idx, rendition) for rendition in wanted]
+    if all(data is not None for data in encoded):
+        return encoded
+
+    # Only a source-size pin stands in for the decoded frame (renditions and ROI crops assume full resolution);
+    # pinned frames are still not cached, as the cache key does not cover the pin
+    frame = segment_pins.frame(video_key, frame_idx, source_shape(cap))
+    pinned = frame is not None
+    if not pinned:
+        with metrics.phase(mode, 'seek'):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        with metrics.phase(mode, 'read'):
+            ret, frame = cap.read()
+        if not ret:
+            return None
+
+    for i, rendition in enumerate(wanted):
+        if encoded[i] is None:
+            with metrics.phase(mode, 'imencode'):
+                encoded[i] = renditions.encode(frame, rendition)
+            if not pinned:
+                cache_store(video_key, frame_idx, rendition, encoded[i])
+    return encoded
+
+def refresh_clips(video_filename, frame_numbers):
+    """Drop clips of frames that are no longer annotated and cut missing ones in the background"""
+    try:
+        video_path = os.path.join(app.config['DATA_FOLDER'], video_filename)
+        if os.path.exists(video_path):
+            frame_numbers = [int(n) for n in frame_numbers]
+            clip_cache.retain(video_path, frame_numbers)
+            clip_cache.schedule(video_path, frame_numbers)
+    except Exception as e:
+        print(f"Could not refresh clips for {video_filename}: {e}")
+
 def clean_extraction_folder():
     frames_dir = app.config['FRAMES_FOLDER']
     for filename in os.listdir(frames_dir):
@@ -47,10 +421,13 @@ def clean_extraction_folder():
         except Exception as e:
             print(f"Error deleting {file_path}: {e}")
 
-def extract_frames(video_path, csv_path, video_filename):
+def extract_frames(video_path, csv_path, video_filename, full_rendition=None, thumbnail_rendition=None, roi=None):
     global current_extraction_session
+    import cv2
+    full_rendition = full_rendition or renditions.DEFAULT_FULL
+    thumbnail_rendition = thumbnail_rendition or renditions.DEFAULT_THUMBNAIL
     try:
-        df = pd.read_csv(csv_path)
+        df = read_csv(csv_path)
         
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
@@ -58,6 +435,7 @@ def extract_frames(video_path, csv_path, video_filename):
         
         fps = cap.get(cv2.CAP_PROP_FPS)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        video_key = frame_cache_video_key(video_path)
         
         # Create new session ID
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -70,6 +448,8 @@ def extract_frames(video_path, csv_path, video_filename):
             'video_filename': video_filename,
             'csv_path': csv_path,
             'timestamp': timestamp,
+            'renditions': {'full': full_rendition, 'thumbnail': thumbnail_rendition},
+            **({'roi': roi['info']} if roi else {}),
             'saved': False
         }
         
@@ -87,17 +467,20 @@ def extract_frames(video_path, csv_path, video_filename):
             # Handle Event Type with backward compatibility
             event_type = row.get('Event Type', 'ball_touch')
 
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num - 1)
-            ret, frame = cap.read()
+            encoded = read_frame_renditions(cap, video_key, frame_num - 1, 'frames',
+                                            (full_rendition, thumbnail_rendition), roi_crop(roi, frame_num - 1))
 
-            if ret:
-                frame_filename = f"frame_{frame_num:06d}.jpg"
+            if encoded:
+                frame_filename = f"frame_{frame_num:06d}{renditions.extension(full_rendition)}"
                 frame_path = os.path.join(app.config['FRAMES_FOLDER'], frame_filename)
 
-                cv2.imwrite(frame_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+                with metrics.phase('frames', 'imwrite'):
+                    with open(frame_path, 'wb') as f:
+                        f.write(encoded[0])
 
-                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 50])
-                thumbnail_base64 = base64.b64encode(buffer).decode('utf-8')
+                with metrics.phase('frames', 'base64'):
+                    thumbnail_base64 = base64.b64encode(encoded[1]).decode('utf-8')
+                metrics.EXTRACTED_FRAMES.inc(mode='frames')
 
                 extracted_frames.append({
                     'frame_number': frame_num,
@@ -106,9 +489,10 @@ def extract_frames(video_path, csv_path, video_filename):
                     'event_type': event_type,
                     'timestamp': timestamp,
                     'filename': frame_filename,
-                    'thumbnail': f"data:image/jpeg;base64,{thumbnail_base64}",
+                    'thumbnail': f"data:{renditions.mimetype(thumbnail_rendition)};base64,{thumbnail_base64}",
                     'index': idx + 1,
-                    'total': total_touches
+                    'total': total_touches,
+                    **roi_frame_fields(roi, frame_num - 1, video_filename, full_rendition)
                 })
                 
                 yield {
@@ -138,9 +522,17 @@ def extract_frames(video_path, csv_path, video_filename):
             'error': str(e)
         }
 
-def extract_timeline(video_path, csv_path, video_filename, extraction_fps=5):
-    """Extract frames at specified FPS rate for timeline view, marking touch frames"""
+def extract_timeline(video_path, csv_path, video_filename, extraction_fps=5, full_rendition=None, thumbnail_rendition=None,
+                     sampling='fixed', frame_budget=1000, roi=None):
+    """Extract frames at specified FPS rate for timeline view, marking touch frames.
+
+    With sampling='adaptive' the FPS is ignored and about frame_budget frames are
+    spread according to motion energy instead; touch frames are always included.
+    """
     global current_extraction_session
+    import cv2
+    full_rendition = full_rendition or renditions.DEFAULT_FULL
+    thumbnail_rendition = thumbnail_rendition or renditions.DEFAULT_THUMBNAIL
     try:
         # Create session tracking
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -152,6 +544,8 @@ def extract_timeline(video_path, csv_path, video_filename, extraction_fps=5):
             'video_filename': video_filename,
             'csv_path': csv_path,
             'timestamp': timestamp,
+            'renditions': {'full': full_rendition, 'thumbnail': thumbnail_rendition},
+            **({'roi': roi['info']} if roi else {}),
             'saved': False
         }
         
@@ -162,6 +556,7 @@ def extract_timeline(video_path, csv_path, video_filename, extraction_fps=5):
         
         fps = cap.get(cv2.CAP_PROP_FPS)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        video_key = frame_cache_video_key(video_path)
         
         # Calculate frame interval based on desired extraction FPS
         if extraction_fps >= fps:
@@ -172,7 +567,7 @@ def extract_timeline(video_path, csv_path, video_filename, extraction_fps=5):
             frame_interval = int(fps / extraction_fps)
         
         # Read touch annotations
-        df = pd.read_csv(csv_path)
+        df = read_csv(csv_path)
         touch_frames = set(int(row['Frame Number']) for _, row in df.iterrows())
         touch_data = {}
         for _, row in df.iterrows():
@@ -188,43 +583,49 @@ def extract_timeline(video_path, csv_path, video_filename, extraction_fps=5):
         clean_extraction_folder()
         
         timeline_frames = []
-        # Extract frames at the calculated interval (FPS-based)
-        frames_to_extract = list(range(0, total_frames, frame_interval))
-        
-        # Add all touch frames to ensure they're included
-        for touch_frame in touch_frames:
-            if touch_frame - 1 not in frames_to_extract:  # -1 because CV2 uses 0-based indexing
-                frames_to_extract.append(touch_frame - 1)
+        touch_indices = {touch_frame - 1 for touch_frame in touch_frames}  # -1 because CV2 uses 0-based indexing
         
-        frames_to_extract.sort()
+        if sampling == 'adaptive':
+            # Spend the frame budget where the motion is, always keeping touch frames
+            with metrics.phase('timeline', 'motion'):
+                energy = adaptive_sampling.motion_energy_cached(video_key, video_path)
+            frames_to_extract = adaptive_sampling.select_adaptive_frames(energy, frame_budget, touch_indices)
+        else:
+            # Extract frames at the calculated interval (FPS-based), plus all touch frames
+            frames_to_extract = set(range(0, total_frames, frame_interval)) | touch_indices
+            frames_to_extract = sorted(frames_to_extract)
         total_to_extract = len(frames_to_extract)
         
         for idx, frame_idx in enumerate(frames_to_extract):
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
+            encoded = read_frame_renditions(cap, video_key, frame_idx, 'timeline',
+                                            (full_rendition, thumbnail_rendition), roi_crop(roi, frame_idx))
             
-            if ret:
+            if encoded:
                 frame_number = frame_idx + 1  # Convert to 1-based
                 time_seconds = frame_idx / fps if fps > 0 else 0
                 is_touch = frame_number in touch_frames
                 
-                frame_filename = f"frame_{frame_number:06d}.jpg"
+                frame_filename = f"frame_{frame_number:06d}{renditions.extension(full_rendition)}"
                 frame_path = os.path.join(app.config['FRAMES_FOLDER'], frame_filename)
                 
-                cv2.imwrite(frame_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+                with metrics.phase('timeline', 'imwrite'):
+                    with open(frame_path, 'wb') as f:
+                        f.write(encoded[0])
                 
-                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 50])
-                thumbnail_base64 = base64.b64encode(buffer).decode('utf-8')
+                with metrics.phase('timeline', 'base64'):
+                    thumbnail_base64 = base64.b64encode(encoded[1]).decode('utf-8')
+                metrics.EXTRACTED_FRAMES.inc(mode='timeline')
                 
                 frame_data = {
                     'frame_number': frame_number,
                     'time_seconds': time_seconds,
                     'filename': frame_filename,
-                    'thumbnail': f"data:image/jpeg;base64,{thumbnail_base64}",
+                    'thumbnail': f"data:{renditions.mimetype(thumbnail_rendition)};base64,{thumbnail_base64}",
                     'is_touch': is_touch,
                     'body_part': touch_data.get(frame_number, {}).get('body_part', '') if is_touch else '',
                     'event_type': touch_data.get(frame_number, {}).get('event_type', 'ball_touch') if is_touch else '',
-                    'timestamp': touch_data.get(frame_number, {}).get('timestamp', '') if is_touch else ''
+                    'timestamp': touch_data.get(frame_number, {}).get('timestamp', '') if is_touch else '',
+                    **roi_frame_fields(roi, frame_idx, video_filename, full_rendition)
                 }
                 
                 timeline_frames.append(frame_data)
@@ -243,6 +644,11 @@ def extract_timeline(video_path, csv_path, video_filename, extraction_fps=5):
             'frames': timeline_frames,
             'total_frames': len(timeline_frames),
             'touch_frames': len(touch_frames),
+            'sampling': {
+                'mode': sampling,
+                'frame_budget': frame_budget if sampling == 'adaptive' else None,
+                'frame_interval': frame_interval if sampling == 'fixed' else None
+            },
             'session_info': current_extraction_session,
             'video_info': {
                 'fps': fps,
@@ -257,6 +663,374 @@ def extract_timeline(video_path, csv_path, video_filename, extraction_fps=5):
             'error': str(e)
         }
 
+def merge_windows(centers, before, after, total_frames):
+    """Turn 0-based center frames into sorted, merged [start, end] ranges clamped to the video"""
+    ranges = sorted((max(0, c - before), min(total_frames - 1, c + after))
+                    for c in centers if 0 <= c < total_frames)
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def read_window_renditions(cap, video_key, start_idx, end_idx, mode, wanted, roi=None):
+    """Yield (frame_idx, encoded renditions) for a contiguous range using one seek and sequential reads.
+
+    Frames already in the shared cache are not re-encoded; if the whole range is cached
+    the video is not touched at all. With an ROI each frame is cut to its own crop box.
+    """
+    import cv2
+
+    def frame_wanted(frame_idx):
+        crop = roi_crop(roi, frame_idx)
+        return [renditions.cropped(rendition, crop) for rendition in wanted]
+
+    cached = {}
+    for frame_idx in range(start_idx, end_idx + 1):
+        encoded = [cache_lookup(video_key, frame_idx, rendition) for rendition in frame_wanted(frame_idx)]
+        if all(data is not None for data in encoded):
+            cached[frame_idx] = encoded
+    if len(cached) == end_idx - start_idx + 1:
+        yield from cached.items()
+        return
+
+    # A pinned range is sliced from its memmap; otherwise seek once and read sequentially
+    shape = source_shape(cap)
+    pinned = segment_pins.covers(video_key, start_idx, end_idx, shape)
+    if not pinned:
+        with metrics.phase(mode, 'seek'):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_idx)
+    for frame_idx in range(start_idx, end_idx + 1):
+        with metrics.phase(mode, 'read'):
+            if pinned:
+                frame = segment_pins.frame(video_key, frame_idx, shape)
+                ret = frame is not None
+            else:
+                ret, frame = cap.read()
+        if not ret:
+            return
+        encoded = cached.get(frame_idx)
+        if encoded is None:
+            encoded = []
+            for rendition in frame_wanted(frame_idx):
+                with metrics.phase(mode, 'imencode'):
+                    data = renditions.encode(frame, rendition)
+                if not pinned:
+                    cache_store(video_key, frame_idx, rendition, data)
+                encoded.append(data)
+        yield frame_idx, encoded
+
+def extract_touch_windows(video_path, csv_path, video_filename, frames_before=5, frames_after=5,
+                          full_rendition=None, thumbnail_rendition=None, roi=None):
+    """Extract the frames around every annotated touch, merging overlapping windows"""
+    global current_extraction_session
+    import cv2
+    full_rendition = full_rendition or renditions.DEFAULT_FULL
+    thumbnail_rendition = thumbnail_rendition or renditions.DEFAULT_THUMBNAIL
+    try:
+        df = read_csv(csv_path)
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            yield {'type': 'error', 'error': 'Could not open video file'}
+            return
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        video_key = frame_cache_video_key(video_path)
+
+        # Create session tracking
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        video_base_name = os.path.splitext(video_filename)[0].replace(" ", "_")
+        session_id = f"{video_base_name}_{timestamp}"
+
+        current_extraction_session = {
+            'session_id': session_id,
+            'video_filename': video_filename,
+            'csv_path': csv_path,
+            'timestamp': timestamp,
+            'renditions': {'full': full_rendition, 'thumbnail': thumbnail_rendition},
+            'window': {'frames_before': frames_before, 'frames_after': frames_after},
+            **({'roi': roi['info']} if roi else {}),
+            'saved': False
+        }
+
+        touches = []
+        for _, row in df.iterrows():
+            touches.append({
+                'frame_number': int(row['Frame Number']),
+                'time_seconds': float(row['Time (seconds)']),
+                'body_part': row.get('Body Part', ''),
+                'event_type': row.get('Event Type', 'ball_touch'),
+                'timestamp': row.get('Timestamp', '')
+            })
+        touch_frames = {t['frame_number'] for t in touches}
+
+        # Clean previous frames before extracting new ones
+        clean_extraction_folder()
+
+        windows = merge_windows([t['frame_number'] - 1 for t in touches], frames_before, frames_after, total_frames)
+        total_to_extract = sum(end - start + 1 for start, end in windows)
+
+        extracted = {}
+        done = 0
+        for start_idx, end_idx in windows:
+            for frame_idx, encoded in read_window_renditions(cap, video_key, start_idx, end_idx, 'windows',
+                                                             (full_rendition, thumbnail_rendition), roi):
+                frame_number = frame_idx + 1
+                frame_filename = f"frame_{frame_number:06d}{renditions.extension(full_rendition)}"
+                frame_path = os.path.join(app.config['FRAMES_FOLDER'], frame_filename)
+
+                with metrics.phase('windows', 'imwrite'):
+                    with open(frame_path, 'wb') as f:
+                        f.write(encoded[0])
+
+                with metrics.phase('windows', 'base64'):
+                    thumbnail_base64 = base64.b64encode(encoded[1]).decode('utf-8')
+                metrics.EXTRACTED_FRAMES.inc(mode='windows')
+
+                extracted[frame_number] = {
+                    'frame_number': frame_number,
+                    'time_seconds': frame_idx / fps if fps > 0 else 0,
+                    'filename': frame_filename,
+                    'thumbnail': f"data:{renditions.mimetype(thumbnail_rendition)};base64,{thumbnail_base64}",
+                    'is_touch': frame_number in touch_frames,
+                    **roi_frame_fields(roi, frame_idx, video_filename, full_rendition)
+                }
+
+                done += 1
+                yield {
+                    'type': 'progress',
+                    'current': done,
+                    'total': total_to_extract,
+                    'frame_number': frame_number
+                }
+
+        cap.release()
+
+        # Group per touch; frames shared by overlapping windows are listed once in 'frames'
+        groups = []
+        for touch in touches:
+            window_numbers = [n for n in range(touch['frame_number'] - frames_before, touch['frame_number'] + frames_after + 1)
+                              if n in extracted]
+            groups.append({
+                **touch,
+                'frame_numbers': window_numbers,
+                'offsets': [n - touch['frame_number'] for n in window_numbers]
+            })
+
+        yield {
+            'type': 'complete',
+            'frames': [extracted[n] for n in sorted(extracted)],
+            'total_frames': len(extracted),
+            'touches': groups,
+            'windows': [{'start_frame': start + 1, 'end_frame': end + 1} for start, end in windows],
+            'session_info': current_extraction_session,
+            'video_info': {
+                'fps': fps,
+                'total_frames': total_frames,
+                'duration': total_frames / fps if fps > 0 else 0
+            }
+        }
+
+    except Exception as e:
+        yield {
+            'type': 'error',
+            'error': str(e)
+        }
+
+def extract_angle_frames(angle_number, video_path, frame_indices, full_rendition, thumbnail_rendition):
+    """Worker for one camera angle: {0-based frame: (filename, thumbnail base64)}, read in frame order"""
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f'Could not open video file {os.path.basename(video_path)}')
+    video_key = frame_cache_video_key(video_path)
+    extracted = {}
+    try:
+        for frame_idx in sorted(frame_indices):
+            encoded = read_frame_renditions(cap, video_key, frame_idx, 'multi', (full_rendition, thumbnail_rendition))
+            if not encoded:
+                continue
+            frame_filename = f"angle{angle_number}_frame_{frame_idx + 1:06d}{renditions.extension(full_rendition)}"
+            with metrics.phase('multi', 'imwrite'):
+                with open(os.path.join(app.config['FRAMES_FOLDER'], frame_filename), 'wb') as f:
+                    f.write(encoded[0])
+            with metrics.phase('multi', 'base64'):
+                extracted[frame_idx] = (frame_filename, base64.b64encode(encoded[1]).decode('utf-8'))
+            metrics.EXTRACTED_FRAMES.inc(mode='multi')
+    finally:
+        cap.release()
+    return extracted
+
+def extract_multi_angle(angles, csv_path, full_rendition=None, thumbnail_rendition=None):
+    """Extract the annotated instants of the first angle's CSV from every angle, one thread per video
+
+    `angles` is a list of {'video_filename', 'video_path', 'offset_seconds'}; an
+    angle's offset is where the shared timeline starts in that video, so the
+    instant at t seconds of the first video is at t - offset_0 + offset_k in
+    angle k. Instants that fall outside an angle are None in its slot.
+    """
+    global current_extraction_session
+    full_rendition = full_rendition or renditions.DEFAULT_FULL
+    thumbnail_rendition = thumbnail_rendition or renditions.DEFAULT_THUMBNAIL
+    try:
+        df = read_csv(csv_path)
+
+        infos = []
+        for angle in angles:
+            metadata = video_metadata(angle['video_path'])
+            if metadata is None or not metadata['fps']:
+                yield {'type': 'error', 'error': f"Could not open video file {angle['video_filename']}"}
+                return
+            infos.append(metadata)
+
+        reference = angles[0]
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        video_base_name = os.path.splitext(reference['video_filename'])[0].replace(" ", "_")
+        session_id = f"{video_base_name}_{timestamp}"
+
+        current_extraction_session = {
+            'session_id': session_id,
+            'video_filename': reference['video_filename'],
+            'csv_path': csv_path,
+            'timestamp': timestamp,
+            'renditions': {'full': full_rendition, 'thumbnail': thumbnail_rendition},
+            'angles': [{'angle': k + 1, 'video_filename': angle['video_filename'],
+                        'offset_seconds': angle['offset_seconds']} for k, angle in enumerate(angles)],
+            'saved': False
+        }
+
+        instants = []
+        for _, row in df.iterrows():
+            frame_number = int(row['Frame Number'])
+            instants.append({
+                'frame_number': frame_number,
+                'time_seconds': float(row['Time (seconds)']),
+                'body_part': row.get('Body Part', ''),
+                'event_type': row.get('Event Type', 'ball_touch'),
+                'timestamp': row.get('Timestamp', '')
+            })
+
+        # The same instant in every angle, as a 0-based frame of that angle (None if outside the video)
+        reference_times = [(instant['frame_number'] - 1) / infos[0]['fps'] - reference['offset_seconds']
+                           for instant in instants]
+        angle_frames = []
+        for angle, info in zip(angles, infos):
+            frames = []
+            for t in reference_times:
+                frame_idx = int(round((t + angle['offset_seconds']) * info['fps']))
+                frames.append(frame_idx if 0 <= frame_idx < info['total_frames'] else None)
+            angle_frames.append(frames)
+
+        # Clean previous frames before extracting new ones
+        clean_extraction_folder()
+
+        results = [None] * len(angles)
+        with ThreadPoolExecutor(max_workers=len(angles), thread_name_prefix='angle') as executor:
+            futures = {
+                executor.submit(extract_angle_frames, k + 1, angle['video_path'],
+                                {idx for idx in angle_frames[k] if idx is not None},
+                                full_rendition, thumbnail_rendition): k
+                for k, angle in enumerate(angles)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                k = futures[future]
+                results[k] = future.result()
+                yield {
+                    'type': 'progress',
+                    'current': done,
+                    'total': len(angles),
+                    'video_filename': angles[k]['video_filename']
+                }
+
+        thumbnail_mimetype = renditions.mimetype(thumbnail_rendition)
+        for i, instant in enumerate(instants):
+            views = []
+            for k, info in enumerate(infos):
+                frame_idx = angle_frames[k][i]
+                if frame_idx is None or frame_idx not in results[k]:
+                    views.append(None)
+                    continue
+                frame_filename, thumbnail_base64 = results[k][frame_idx]
+                views.append({
+                    'angle': k + 1,
+                    'frame_number': frame_idx + 1,
+                    'time_seconds': frame_idx / info['fps'],
+                    'filename': frame_filename,
+                    'thumbnail': f"data:{thumbnail_mimetype};base64,{thumbnail_base64}"
+                })
+            instant['index'] = i + 1
+            instant['angles'] = views
+
+        yield {
+            'type': 'complete',
+            'instants': instants,
+            'total_frames': sum(len(extracted) for extracted in results),
+            'angles': [{
+                'angle': k + 1,
+                'video_filename': angle['video_filename'],
+                'offset_seconds': angle['offset_seconds'],
+                'fps': info['fps'],
+                'total_frames': info['total_frames'],
+                'extracted_frames': len(results[k])
+            } for k, (angle, info) in enumerate(zip(angles, infos))],
+            'session_info': current_extraction_session
+        }
+
+    except Exception as e:
+        yield {
+            'type': 'error',
+            'error': str(e)
+        }
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    ensure_folders()
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is None:
+        return response
+
+    elapsed = time.perf_counter() - start
+    route = request.url_rule.rule if request.url_rule else '<unmatched>'
+    metrics.REQUEST_LATENCY.observe(elapsed, route=route, method=request.method, status=response.status_code)
+
+    slow_ms = app.config.get('SLOW_REQUEST_MS')
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        log_slow_request(route, response.status_code, elapsed)
+    return response
+
+def log_slow_request(route, status, elapsed):
+    entry = {
+        'time': datetime.now().isoformat(),
+        'method': request.method,
+        'path': request.path,
+        'route': route,
+        'status': status,
+        'duration_ms': round(elapsed * 1000, 2),
+        'phases_ms': {k: round(v * 1000, 2) for k, v in g.get('phase_seconds', {}).items()}
+    }
+    print(f"Slow request: {entry['method']} {entry['path']} took {entry['duration_ms']}ms {entry['phases_ms']}")
+
+    log_path = app.config.get('SLOW_REQUEST_LOG')
+    if log_path:
+        try:
+            with open(log_path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        except OSError as e:
+            print(f"Error writing slow request log {log_path}: {e}")
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of request, extraction, streaming and CSV timings"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -265,10 +1039,11 @@ def index():
 def get_videos():
     try:
         data_folder = app.config['DATA_FOLDER']
-        csv_folder = app.config['CSV_FOLDER']
         videos = []
         
         if os.path.exists(data_folder):
+            # One directory listing instead of an exists() call per video
+            csv_names = csv_catalog.names()
             for filename in os.listdir(data_folder):
                 if allowed_file(filename, ALLOWED_VIDEO_EXTENSIONS):
                     # Get base name without extension
@@ -276,31 +1051,26 @@ def get_videos():
                     
                     # Check if corresponding CSV exists in csv folder
                     csv_filename = f"{base_name}.csv"
-                    csv_path = os.path.join(csv_folder, csv_filename)
-                    has_csv = os.path.exists(csv_path)
+                    has_csv = csv_filename in csv_names
                     
                     # Get video file info
                     video_path = os.path.join(data_folder, filename)
                     file_size = os.path.getsize(video_path)
                     
-                    # Get video metadata
-                    cap = cv2.VideoCapture(video_path)
+                    # Get video metadata (cached by the ingest pipeline; new videos are queued for ingest)
+                    ingest_status = ingest_pipeline.status(video_path)
+                    if ingest_status['state'] == 'new':
+                        ingest_status = ingest_pipeline.submit(video_path)
+                    metadata = video_metadata(video_path)
                     video_info = {}
-                    if cap.isOpened():
-                        fps = cap.get(cv2.CAP_PROP_FPS)
-                        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                        duration = total_frames / fps if fps > 0 else 0
-                        
+                    if metadata:
                         video_info = {
-                            'fps': fps,
-                            'total_frames': total_frames,
-                            'width': width,
-                            'height': height,
-                            'duration': round(duration, 2)
+                            'fps': metadata['fps'],
+                            'total_frames': metadata['total_frames'],
+                            'width': metadata['width'],
+                            'height': metadata['height'],
+                            'duration': round(metadata['duration'], 2)
                         }
-                    cap.release()
                     
                     videos.append({
                         'filename': filename,
@@ -308,7 +1078,8 @@ def get_videos():
                         'has_csv': has_csv,
                         'csv_filename': csv_filename if has_csv else None,
                         'file_size': file_size,
-                        'video_info': video_info
+                        'video_info': video_info,
+                        'ingest': {'state': ingest_status['state'], 'progress': ingest_status['progress']}
                     })
         
         # Sort videos by filename
@@ -322,23 +1093,80 @@ def get_videos():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ingest', methods=['GET'])
+def ingest_overview():
+    """Ingest progress of every video in the data folder"""
+    try:
+        data_folder = app.config['DATA_FOLDER']
+        videos = []
+        if os.path.exists(data_folder):
+            for filename in sorted(os.listdir(data_folder)):
+                if allowed_file(filename, ALLOWED_VIDEO_EXTENSIONS):
+                    videos.append(ingest_pipeline.status(os.path.join(data_folder, filename)))
+        return jsonify({'success': True, 'videos': videos})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/ingest', methods=['POST'])
+def start_ingest():
+    """(Re-)ingest one video, or queue every video in the data folder that was never ingested"""
+    try:
+        data = request.json or {}
+        video_filename = data.get('video_filename')
+        if video_filename:
+            video_path = os.path.join(app.config['DATA_FOLDER'], video_filename)
+            if not os.path.exists(video_path):
+                return jsonify({'error': 'Video file not found'}), 404
+            return jsonify({'success': True, 'status': ingest_pipeline.submit(video_path)})
+        queued = ingest_pipeline.scan(app.config['DATA_FOLDER'], ALLOWED_VIDEO_EXTENSIONS)
+        return jsonify({'success': True, 'queued': queued})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/ingest/<video_filename>')
+def ingest_status(video_filename):
+    try:
+        video_path = os.path.join(app.config['DATA_FOLDER'], video_filename)
+        if not os.path.exists(video_path):
+            return jsonify({'error': 'Video file not found'}), 404
+        status = ingest_pipeline.status(video_path)
+        status['metadata'] = ingest_pipeline.metadata(video_path)
+        thumbnails = ingest_pipeline.thumbnails(video_path)
+        status['thumbnails'] = thumbnails[1] if thumbnails else None
+        return jsonify(status)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/ingest/<video_filename>/thumbnails')
+def ingest_thumbnails(video_filename):
+    """Thumbnail strip (one JPEG, tiles left to right; layout in /api/ingest/<video>)"""
+    try:
+        video_path = os.path.join(app.config['DATA_FOLDER'], video_filename)
+        if not os.path.exists(video_path):
+            return jsonify({'error': 'Video file not found'}), 404
+        thumbnails = ingest_pipeline.thumbnails(video_path)
+        if thumbnails is None:
+            return jsonify({'error': 'Thumbnails are not ready yet'}), 404
+        return send_file(thumbnails[0], mimetype='image/jpeg', conditional=True)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/check_csv/<video_name>')
 def check_csv(video_name):
     try:
-        csv_folder = app.config['CSV_FOLDER']
         base_name = os.path.splitext(video_name)[0]
         csv_filename = f"{base_name}.csv"
-        csv_path = os.path.join(csv_folder, csv_filename)
         
-        if os.path.exists(csv_path):
-            # Read CSV to get annotation count
-            df = pd.read_csv(csv_path)
+        # Catalog only re-parses the CSV if it changed since the last check
+        entry = csv_catalog.get(csv_filename)
+        if entry:
             return jsonify({
                 'success': True,
                 'has_csv': True,
                 'csv_filename': csv_filename,
-                'annotation_count': len(df),
-                'csv_preview': df.head().to_dict('records')
+                'annotation_count': entry['row_count'],
+                'csv_format': entry['format'],
+                'csv_preview': entry['preview']
             })
         else:
             return jsonify({
@@ -375,17 +1203,127 @@ def upload_files():
         csv_path = os.path.join(app.config['UPLOAD_FOLDER'], csv_filename)
         
         video_file.save(video_path)
-        csv_file.save(csv_path)
+        with annotation_versions.locked(csv_path):
+            csv_file.save(csv_path)
+            etag = annotation_versions.remember(csv_path)
         
-        return jsonify({
+        return versioned(jsonify({
             'success': True,
             'video_path': video_path,
-            'csv_path': csv_path
-        })
+            'csv_path': csv_path,
+            'etag': etag
+        }), etag)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads', methods=['POST'])
+def init_chunked_upload():
+    """Start or resume a chunked upload into the data folder"""
+    try:
+        data = request.json or {}
+        filename = secure_filename(data.get('filename') or '')
+        
+        if not filename:
+            return jsonify({'error': 'Missing filename'}), 400
+        
+        if not allowed_file(filename, ALLOWED_VIDEO_EXTENSIONS):
+            return jsonify({'error': 'Invalid video format. Allowed: mp4, avi, mov, mkv, webm'}), 400
+        
+        try:
+            status = chunked_uploads.init(filename, data.get('size', 0), data.get('chunk_size'),
+                                          str(data.get('fingerprint', '')), data.get('sha256'))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), getattr(e, 'status', 400)
         
+        return jsonify(status)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def chunked_upload_status(upload_id):
+    try:
+        return jsonify(chunked_uploads.status(upload_id))
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """Receive one chunk as the raw request body; X-Chunk-SHA256 is checked when sent"""
+    try:
+        sha256 = chunked_uploads.write_chunk(upload_id, index, request.get_data(),
+                                             request.headers.get('X-Chunk-SHA256'))
+        return jsonify({'success': True, 'index': index, 'sha256': sha256})
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    try:
+        data = request.json or {}
+        filename = chunked_uploads.status(upload_id)['filename']
+        video_path = chunked_uploads.complete(upload_id, filename, overwrite=bool(data.get('overwrite')))
+        ingest_pipeline.submit(video_path)
+        return jsonify({
+            'success': True,
+            'video_filename': filename,
+            'size': os.path.getsize(video_path)
+        })
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def abort_chunked_upload(upload_id):
+    try:
+        chunked_uploads.abort(upload_id)
+        return jsonify({'success': True})
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def load_roi(data, video_filename, video_path):
+    """Crop boxes for a request with `roi` set (true or {padding, min_size}), else None
+
+    Raises ValueError for bad options and FileNotFoundError if the video has no tracking CSV.
+    """
+    options = data.get('roi')
+    if not options:
+        return None
+    options = options if isinstance(options, dict) else {}
+    padding = float(options.get('padding', tracking.DEFAULT_PADDING))
+    min_size = int(options.get('min_size', tracking.DEFAULT_MIN_SIZE))
+    if not 0 <= padding <= 5:
+        raise ValueError('ROI padding must be between 0 and 5')
+    if min_size < 16:
+        raise ValueError('ROI min_size must be at least 16 pixels')
+
+    tracking_path = crop_boxes.tracking_csv(video_filename)
+    if tracking_path is None:
+        raise FileNotFoundError(f'No tracking CSV for {video_filename} in tracking_csv/')
+    metadata = video_metadata(video_path)
+    if metadata is None:
+        raise ValueError('Could not open video file')
+    boxes = crop_boxes.get(tracking_path, metadata['total_frames'], metadata['width'], metadata['height'],
+                           padding, min_size)
+    return {
+        'boxes': boxes,
+        'info': {
+            'tracking_csv': os.path.basename(tracking_path),
+            'padding': padding,
+            'min_size': min_size,
+            # Nothing tracked: frames are extracted uncropped
+            'cropped': boxes is not None
+        }
+    }
+
 @app.route('/extract', methods=['POST'])
 def extract():
     try:
@@ -395,6 +1333,12 @@ def extract():
         if not video_filename:
             return jsonify({'error': 'Missing video filename'}), 400
         
+        try:
+            full_rendition = renditions.parse_rendition(data.get('rendition'), renditions.DEFAULT_FULL)
+            thumbnail_rendition = renditions.parse_rendition(data.get('thumbnail_rendition'), renditions.DEFAULT_THUMBNAIL)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid rendition: {e}'}), 400
+        
         data_folder = app.config['DATA_FOLDER']
         csv_folder = app.config['CSV_FOLDER']
         video_path = os.path.join(data_folder, video_filename)
@@ -410,8 +1354,15 @@ def extract():
         if not os.path.exists(csv_path):
             return jsonify({'error': f'CSV file not found: {csv_filename}. Please ensure the CSV file has the same base name as the video file.'}), 404
         
+        try:
+            roi = load_roi(data, video_filename, video_path)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 404
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid ROI: {e}'}), 400
+        
         result = None
-        for update in extract_frames(video_path, csv_path, video_filename):
+        for update in extract_frames(video_path, csv_path, video_filename, full_rendition, thumbnail_rendition, roi):
             if update['type'] == 'complete':
                 result = update
                 break
@@ -419,7 +1370,8 @@ def extract():
                 return jsonify({'error': update['error']}), 500
         
         if result:
-            return jsonify(result)
+            with metrics.phase('frames', 'json'):
+                return jsonify(result)
         else:
             return jsonify({'error': 'Extraction failed'}), 500
             
@@ -432,10 +1384,27 @@ def extract_timeline_endpoint():
         data = request.json
         video_filename = data.get('video_filename')
         extraction_fps = data.get('extraction_fps', 5)  # Default to 5 FPS
+        sampling = data.get('sampling', 'fixed')
+        
+        if sampling not in ('fixed', 'adaptive'):
+            return jsonify({'error': "sampling must be 'fixed' or 'adaptive'"}), 400
+        
+        try:
+            frame_budget = int(data.get('frame_budget', 1000))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'frame_budget must be an integer'}), 400
+        if frame_budget < 1:
+            return jsonify({'error': 'frame_budget must be at least 1'}), 400
         
         if not video_filename:
             return jsonify({'error': 'Missing video filename'}), 400
         
+        try:
+            full_rendition = renditions.parse_rendition(data.get('rendition'), renditions.DEFAULT_FULL)
+            thumbnail_rendition = renditions.parse_rendition(data.get('thumbnail_rendition'), renditions.DEFAULT_THUMBNAIL)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid rendition: {e}'}), 400
+        
         data_folder = app.config['DATA_FOLDER']
         csv_folder = app.config['CSV_FOLDER']
         video_path = os.path.join(data_folder, video_filename)
@@ -451,8 +1420,16 @@ def extract_timeline_endpoint():
         if not os.path.exists(csv_path):
             return jsonify({'error': f'CSV file not found: {csv_filename}. Please ensure the CSV file has the same base name as the video file.'}), 404
         
+        try:
+            roi = load_roi(data, video_filename, video_path)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 404
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid ROI: {e}'}), 400
+        
         result = None
-        for update in extract_timeline(video_path, csv_path, video_filename, extraction_fps):
+        for update in extract_timeline(video_path, csv_path, video_filename, extraction_fps,
+                                       full_rendition, thumbnail_rendition, sampling, frame_budget, roi):
             if update['type'] == 'complete':
                 result = update
                 break
@@ -460,13 +1437,137 @@ def extract_timeline_endpoint():
                 return jsonify({'error': update['error']}), 500
         
         if result:
-            return jsonify(result)
+            with metrics.phase('timeline', 'json'):
+                return jsonify(result)
         else:
             return jsonify({'error': 'Timeline extraction failed'}), 500
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/extract_windows', methods=['POST'])
+def extract_windows_endpoint():
+    """Extract ±N frames around every annotated touch, grouped per touch"""
+    try:
+        data = request.json
+        video_filename = data.get('video_filename')
+        
+        if not video_filename:
+            return jsonify({'error': 'Missing video filename'}), 400
+        
+        try:
+            frames_before = int(data.get('frames_before', data.get('window', 5)))
+            frames_after = int(data.get('frames_after', data.get('window', 5)))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Window sizes must be integers'}), 400
+        if not (0 <= frames_before <= 300 and 0 <= frames_after <= 300):
+            return jsonify({'error': 'Window sizes must be between 0 and 300 frames'}), 400
+        
+        try:
+            full_rendition = renditions.parse_rendition(data.get('rendition'), renditions.DEFAULT_FULL)
+            thumbnail_rendition = renditions.parse_rendition(data.get('thumbnail_rendition'), renditions.DEFAULT_THUMBNAIL)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid rendition: {e}'}), 400
+        
+        data_folder = app.config['DATA_FOLDER']
+        csv_folder = app.config['CSV_FOLDER']
+        video_path = os.path.join(data_folder, video_filename)
+        
+        # Get corresponding CSV path from csv folder
+        base_name = os.path.splitext(video_filename)[0]
+        csv_filename = f"{base_name}.csv"
+        csv_path = os.path.join(csv_folder, csv_filename)
+        
+        if not os.path.exists(video_path):
+            return jsonify({'error': f'Video file not found: {video_filename}'}), 404
+            
+        if not os.path.exists(csv_path):
+            return jsonify({'error': f'CSV file not found: {csv_filename}. Please ensure the CSV file has the same base name as the video file.'}), 404
+        
+        try:
+            roi = load_roi(data, video_filename, video_path)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 404
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid ROI: {e}'}), 400
+        
+        result = None
+        for update in extract_touch_windows(video_path, csv_path, video_filename, frames_before, frames_after,
+                                            full_rendition, thumbnail_rendition, roi):
+            if update['type'] == 'complete':
+                result = update
+                break
+            elif update['type'] == 'error':
+                return jsonify({'error': update['error']}), 500
+        
+        if result:
+            with metrics.phase('windows', 'json'):
+                return jsonify(result)
+        else:
+            return jsonify({'error': 'Window extraction failed'}), 500
+            
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/extract_multi', methods=['POST'])
+def extract_multi_endpoint():
+    """Extract the first video's annotated instants from every camera angle of a drill, side by side"""
+    try:
+        data = request.json
+        videos = data.get('videos')
+        
+        if not isinstance(videos, list) or not 2 <= len(videos) <= MAX_ANGLES:
+            return jsonify({'error': f'videos must list between 2 and {MAX_ANGLES} videos'}), 400
+        
+        try:
+            full_rendition = renditions.parse_rendition(data.get('rendition'), renditions.DEFAULT_FULL)
+            thumbnail_rendition = renditions.parse_rendition(data.get('thumbnail_rendition'), renditions.DEFAULT_THUMBNAIL)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid rendition: {e}'}), 400
+        
+        angles = []
+        for entry in videos:
+            # Either a filename or {"video_filename": ..., "offset_seconds": ...}
+            entry = {'video_filename': entry} if isinstance(entry, str) else entry
+            if not isinstance(entry, dict) or not entry.get('video_filename'):
+                return jsonify({'error': 'Every video needs a video_filename'}), 400
+            try:
+                offset_seconds = float(entry.get('offset_seconds', 0))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'offset_seconds must be a number'}), 400
+            video_filename = entry['video_filename']
+            video_path = os.path.join(app.config['DATA_FOLDER'], video_filename)
+            if not os.path.exists(video_path):
+                return jsonify({'error': f'Video file not found: {video_filename}'}), 404
+            angles.append({'video_filename': video_filename, 'video_path': video_path, 'offset_seconds': offset_seconds})
+        
+        if len({angle['video_filename'] for angle in angles}) != len(angles):
+            return jsonify({'error': 'Each video may only appear once'}), 400
+        
+        # The instants come from the first video's annotations
+        base_name = os.path.splitext(angles[0]['video_filename'])[0]
+        csv_filename = f"{base_name}.csv"
+        csv_path = os.path.join(app.config['CSV_FOLDER'], csv_filename)
+        if not os.path.exists(csv_path):
+            return jsonify({'error': f'CSV file not found: {csv_filename}. The first video must have an annotation CSV.'}), 404
+        
+        result = None
+        for update in extract_multi_angle(angles, csv_path, full_rendition, thumbnail_rendition):
+            if update['type'] == 'complete':
+                result = update
+                break
+            elif update['type'] == 'error':
+                return jsonify({'error': update['error']}), 500
+        
+        if result:
+            with metrics.phase('multi', 'json'):
+                return jsonify(result)
+        else:
+            return jsonify({'error': 'Multi-angle extraction failed'}), 500
+            
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/frame/<filename>')
 def serve_frame(filename):
     try:
@@ -474,6 +1575,42 @@ def serve_frame(filename):
     except FileNotFoundError:
         return jsonify({'error': 'Frame not found'}), 404
 
+@app.route('/frame_full/<video_filename>/<int:frame_number>')
+def serve_full_frame(video_filename, frame_number):
+    """Uncropped 1-based frame of a data-folder video (the link ROI extractions put next to each crop)
+
+    The rendition comes from the format, quality and max_dimension query parameters.
+    """
+    import cv2
+    try:
+        video_path = os.path.join(app.config['DATA_FOLDER'], video_filename)
+        if not os.path.exists(video_path):
+            return jsonify({'error': 'Video file not found'}), 404
+        try:
+            rendition = renditions.parse_rendition({
+                'format': request.args.get('format'),
+                'quality': request.args.get('quality'),
+                **({'max_dimension': request.args['max_dimension']} if 'max_dimension' in request.args else {})
+            }, renditions.DEFAULT_FULL)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid rendition: {e}'}), 400
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return jsonify({'error': 'Could not open video file'}), 500
+        try:
+            if not 1 <= frame_number <= int(cap.get(cv2.CAP_PROP_FRAME_COUNT)):
+                return jsonify({'error': 'Invalid frame number'}), 400
+            encoded = read_frame_renditions(cap, frame_cache_video_key(video_path), frame_number - 1, 'frames',
+                                            (rendition,))
+        finally:
+            cap.release()
+        if not encoded:
+            return jsonify({'error': 'Could not read frame'}), 500
+        return Response(encoded[0], mimetype=renditions.mimetype(rendition))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/download_all')
 def download_all():
     try:
@@ -485,7 +1622,7 @@ def download_all():
         with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
             frames_dir = app.config['FRAMES_FOLDER']
             for filename in os.listdir(frames_dir):
-                if filename.endswith('.jpg'):
+                if filename.endswith(renditions.FRAME_EXTENSIONS):
                     file_path = os.path.join(frames_dir, filename)
                     zf.write(file_path, filename)
         
@@ -501,6 +1638,25 @@ def download_all():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def write_reviewed_metadata(session_dir, extraction_session, frame_files, extra=None):
+    """Write the metadata.json of a reviewed session (shared by the UI and batch_extract.py)"""
+    metadata = {
+        'session_id': extraction_session['session_id'],
+        'video_filename': extraction_session['video_filename'],
+        'extraction_timestamp': extraction_session['timestamp'],
+        'saved_timestamp': datetime.now().isoformat(),
+        'total_frames': len(frame_files),
+        'frame_files': frame_files,
+        'renditions': extraction_session.get('renditions'),
+        **({'angles': extraction_session['angles']} if extraction_session.get('angles') else {}),
+        **(extra or {})
+    }
+    
+    metadata_path = os.path.join(session_dir, 'metadata.json')
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
 @app.route('/api/save_current_frames', methods=['POST'])
 def save_current_frames():
     global current_extraction_session
@@ -522,7 +1678,7 @@ def save_current_frames():
         
         if os.path.exists(frames_folder):
             for filename in os.listdir(frames_folder):
-                if filename.endswith('.jpg'):
+                if filename.endswith(renditions.FRAME_EXTENSIONS):
                     src_path = os.path.join(frames_folder, filename)
                     dst_path = os.path.join(frames_dir, filename)
                     shutil.copy2(src_path, dst_path)
@@ -534,18 +1690,8 @@ def save_current_frames():
         shutil.copy2(csv_src, csv_dst)
         
         # Create metadata file
-        metadata = {
-            'session_id': current_extraction_session['session_id'],
-            'video_filename': current_extraction_session['video_filename'],
-            'extraction_timestamp': current_extraction_session['timestamp'],
-            'saved_timestamp': datetime.now().isoformat(),
-            'total_frames': len(copied_files),
-            'frame_files': copied_files
-        }
-        
-        metadata_path = os.path.join(session_dir, 'metadata.json')
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        write_reviewed_metadata(session_dir, current_extraction_session, copied_files)
+        get_session_index().record(current_extraction_session['session_id'])
         
         # Mark session as saved
         current_extraction_session['saved'] = True
@@ -580,6 +1726,42 @@ def cleanup_frames():
 
 # ============= TOUCH EDITING ENDPOINTS =============
 
+def check_edit(csv_path, data, edits):
+    """(409 response rejecting the edit or None, the client's stale version or None)
+
+    `edits` maps frame -> wanted row (None deletes it). Clients send back the
+    ETag they loaded as `etag` (or If-Match); if the CSV changed since, the
+    edit is still applied unless it touches frames someone else changed, and
+    the client's version ({frame: row}, if still kept) is returned so callers
+    can skip rows the client did not change. Edits without an ETag are
+    applied as before. Call with the CSV's lock held.
+    """
+    base_etag = data.get('etag') or request.headers.get('If-Match')
+    if not base_etag:
+        return None, None
+    base_etag = base_etag.strip().strip('"')
+    current_etag = annotation_versions.etag(csv_path)
+    if base_etag == current_etag:
+        return None, None
+
+    current = versioning.rows_by_frame(read_csv(csv_path).to_dict('records')) if os.path.exists(csv_path) else {}
+    base = annotation_versions.version(csv_path, base_etag, read_csv)
+    conflicts = versioning.find_conflicts(base, current, edits)
+    if not conflicts:
+        return None, base
+    return (jsonify({
+        'error': 'The annotations were changed by someone else since you loaded them. Reload and re-apply your edit.',
+        'etag': current_etag,
+        'conflicts': conflicts,
+        # Everything that changed since the client's version (None if that version is no longer kept)
+        'diff': versioning.diff(base, current) if base is not None else None
+    }), 409), base
+
+def versioned(response, etag):
+    """Attach the CSV's ETag to a JSON response"""
+    response.headers['ETag'] = f'"{etag}"'
+    return response
+
 @app.route('/api/load_csv', methods=['POST'])
 def load_csv():
     """Load CSV data for editing with support for both old and new formats"""
@@ -598,10 +1780,14 @@ def load_csv():
         if not os.path.exists(csv_path):
             return jsonify({'error': f'CSV file not found: {csv_filename}'}), 404
 
-        df = pd.read_csv(csv_path)
+        # The ETag must describe exactly the rows returned, so no edit may land in between
+        with annotation_versions.locked(csv_path):
+            df = read_csv(csv_path)
+            etag = annotation_versions.remember(csv_path)
+        refresh_clips(video_filename, df['Frame Number'])
 
         # Check which format the CSV is using
-        is_new_format = 'Touch_Event' in df.columns and 'Foot_Plant_Event' in df.columns
+        is_new_format = detect_csv_format(df.columns) == 'new'
 
         # Convert data to consistent format for frontend
         csv_data = df.to_dict('records')
@@ -635,14 +1821,15 @@ def load_csv():
                 else:
                     row['Foot_Plant_Event'] = 0
 
-        return jsonify({
+        return versioned(jsonify({
             'success': True,
             'csv_data': csv_data,
             'csv_filename': csv_filename,
             'total_touches': len(csv_data),
             'format': 'new' if is_new_format else 'old',
-            'has_new_columns': is_new_format
-        })
+            'has_new_columns': is_new_format,
+            'etag': etag
+        }), etag)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -663,9 +1850,7 @@ def move_touch():
         data_folder = app.config['DATA_FOLDER']
         video_path = os.path.join(data_folder, video_filename)
         
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        cap.release()
+        fps = video_metadata(video_path)['fps']
         
         new_time = (to_frame - 1) / fps  # -1 because frames are 1-indexed
         
@@ -683,6 +1868,7 @@ def move_touch():
 @app.route('/api/add_touch', methods=['POST'])
 def add_touch():
     """Add a new touch annotation with new format support and save to CSV file"""
+    import pandas as pd
     try:
         data = request.json
         video_filename = data.get('video_filename')
@@ -704,9 +1890,7 @@ def add_touch():
         data_folder = app.config['DATA_FOLDER']
         video_path = os.path.join(data_folder, video_filename)
 
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        cap.release()
+        fps = video_metadata(video_path)['fps']
 
         time_seconds = (frame_number - 1) / fps
         timestamp = datetime.now().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
@@ -717,73 +1901,87 @@ def add_touch():
         csv_filename = f"{base_name}.csv"
         csv_path = os.path.join(csv_folder, csv_filename)
 
-        # Create backup folder and backup original CSV only once (before first edit)
-        backup_folder = os.path.join(os.path.dirname(csv_folder), 'backup_csv')
-        os.makedirs(backup_folder, exist_ok=True)
+        # Use new format if either new-format event was provided
+        use_new_format = touch_event is not None or foot_plant_event is not None
+        if use_new_format:
+            wanted = {'Frame Number': frame_number,
+                      'Touch_Event': touch_event if touch_event is not None else 0,
+                      'Foot_Plant_Event': foot_plant_event if foot_plant_event is not None else 0}
+        else:
+            wanted = {'Frame Number': frame_number, 'Body Part': body_part, 'Event Type': event_type}
 
-        backup_filename = f"{base_name}_original.csv"
-        backup_path = os.path.join(backup_folder, backup_filename)
+        with annotation_versions.locked(csv_path):
+            conflict, _ = check_edit(csv_path, data, {frame_number: wanted})
+            if conflict:
+                return conflict
 
-        # Only create backup if it doesn't already exist (first edit only)
-        if os.path.exists(csv_path) and not os.path.exists(backup_path):
-            shutil.copy2(csv_path, backup_path)
+            # Create backup folder and backup original CSV only once (before first edit)
+            backup_folder = os.path.join(os.path.dirname(csv_folder), 'backup_csv')
+            os.makedirs(backup_folder, exist_ok=True)
 
-        # Load existing CSV data
-        if os.path.exists(csv_path):
-            existing_df = pd.read_csv(csv_path)
-        else:
-            existing_df = pd.DataFrame()
+            backup_filename = f"{base_name}_original.csv"
+            backup_path = os.path.join(backup_folder, backup_filename)
 
-        # Check if annotation already exists for this frame
-        if not existing_df.empty and frame_number in existing_df['Frame Number'].values:
-            return jsonify({'error': f'Annotation already exists for frame {frame_number}'}), 400
+            # Only create backup if it doesn't already exist (first edit only)
+            if os.path.exists(csv_path) and not os.path.exists(backup_path):
+                shutil.copy2(csv_path, backup_path)
 
-        # Create new annotation entry
-        new_annotation = {
-            'Frame Number': frame_number,
-            'Time (seconds)': time_seconds,
-            'Timestamp': timestamp
-        }
+            # Load existing CSV data
+            if os.path.exists(csv_path):
+                existing_df = read_csv(csv_path)
+            else:
+                existing_df = pd.DataFrame()
 
-        # Determine format and add appropriate columns
-        use_new_format = touch_event is not None or foot_plant_event is not None
+            # Check if annotation already exists for this frame
+            if not existing_df.empty and frame_number in existing_df['Frame Number'].values:
+                return jsonify({'error': f'Annotation already exists for frame {frame_number}'}), 400
 
-        if use_new_format:
-            # New format with Touch_Event and Foot_Plant_Event
-            new_annotation['Touch_Event'] = touch_event if touch_event is not None else 0
-            new_annotation['Foot_Plant_Event'] = foot_plant_event if foot_plant_event is not None else 0
-            # Keep old format for compatibility
-            new_annotation['Body Part'] = body_part
-            new_annotation['Event Type'] = event_type
-        else:
-            # Old format
-            new_annotation['Body Part'] = body_part
-            new_annotation['Event Type'] = event_type
-
-        # Add new annotation to existing data
-        new_df = pd.DataFrame([new_annotation])
-        if existing_df.empty:
-            combined_df = new_df
-        else:
-            combined_df = pd.concat([existing_df, new_df], ignore_index=True)
+            # Create new annotation entry
+            new_annotation = {
+                'Frame Number': frame_number,
+                'Time (seconds)': time_seconds,
+                'Timestamp': timestamp
+            }
 
-        # Sort by frame number
-        combined_df = combined_df.sort_values('Frame Number')
+            # Add the columns of the format in use
+            if use_new_format:
+                # New format with Touch_Event and Foot_Plant_Event
+                new_annotation['Touch_Event'] = touch_event if touch_event is not None else 0
+                new_annotation['Foot_Plant_Event'] = foot_plant_event if foot_plant_event is not None else 0
+                # Keep old format for compatibility
+                new_annotation['Body Part'] = body_part
+                new_annotation['Event Type'] = event_type
+            else:
+                # Old format
+                new_annotation['Body Part'] = body_part
+                new_annotation['Event Type'] = event_type
+
+            # Add new annotation to existing data
+            new_df = pd.DataFrame([new_annotation])
+            if existing_df.empty:
+                combined_df = new_df
+            else:
+                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
 
-        # Determine column order
-        if use_new_format and 'Touch_Event' in combined_df.columns:
-            column_order = ['Frame Number', 'Time (seconds)', 'Touch_Event', 'Foot_Plant_Event', 'Timestamp']
-        else:
-            column_order = ['Frame Number', 'Time (seconds)', 'Body Part', 'Event Type', 'Timestamp']
+            # Sort by frame number
+            combined_df = combined_df.sort_values('Frame Number')
+
+            # Determine column order
+            if use_new_format and 'Touch_Event' in combined_df.columns:
+                column_order = ['Frame Number', 'Time (seconds)', 'Touch_Event', 'Foot_Plant_Event', 'Timestamp']
+            else:
+                column_order = ['Frame Number', 'Time (seconds)', 'Body Part', 'Event Type', 'Timestamp']
 
-        # Reorder columns, keeping any extra columns
-        all_columns = list(combined_df.columns)
-        extra_columns = [col for col in all_columns if col not in column_order]
-        final_columns = column_order + extra_columns
-        combined_df = combined_df.reindex(columns=[col for col in final_columns if col in combined_df.columns])
+            # Reorder columns, keeping any extra columns
+            all_columns = list(combined_df.columns)
+            extra_columns = [col for col in all_columns if col not in column_order]
+            final_columns = column_order + extra_columns
+            combined_df = combined_df.reindex(columns=[col for col in final_columns if col in combined_df.columns])
 
-        # Save to CSV
-        combined_df.to_csv(csv_path, index=False)
+            # Save to CSV
+            write_csv(combined_df, csv_path)
+            etag = annotation_versions.remember(csv_path)
+            clip_cache.schedule(video_path, [frame_number])
 
         # Prepare response
         response_data = {
@@ -794,7 +1992,8 @@ def add_touch():
             'body_part': body_part,
             'event_type': event_type,
             'total_annotations': len(combined_df),
-            'message': f'Annotation added for frame {frame_number}'
+            'message': f'Annotation added for frame {frame_number}',
+            'etag': etag
         }
 
         # Include new format if provided
@@ -803,7 +2002,7 @@ def add_touch():
         if foot_plant_event is not None:
             response_data['foot_plant_event'] = foot_plant_event
 
-        return jsonify(response_data)
+        return versioned(jsonify(response_data), etag)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -811,6 +2010,7 @@ def add_touch():
 @app.route('/api/delete_touch', methods=['POST'])
 def delete_touch():
     """Delete a touch annotation from CSV file"""
+    import pandas as pd
     try:
         data = request.json
         video_filename = data.get('video_filename')
@@ -828,46 +2028,54 @@ def delete_touch():
         if not os.path.exists(csv_path):
             return jsonify({'error': f'CSV file not found: {csv_filename}'}), 404
 
-        # Load existing CSV data
-        existing_df = pd.read_csv(csv_path)
+        with annotation_versions.locked(csv_path):
+            conflict, _ = check_edit(csv_path, data, {frame_number: None})
+            if conflict:
+                return conflict
 
-        # Check if annotation exists for this frame
-        if frame_number not in existing_df['Frame Number'].values:
-            return jsonify({'error': f'No annotation found for frame {frame_number}'}), 404
+            # Load existing CSV data
+            existing_df = read_csv(csv_path)
 
-        # Create backup folder and backup original CSV only once (before first edit)
-        backup_folder = os.path.join(os.path.dirname(csv_folder), 'backup_csv')
-        os.makedirs(backup_folder, exist_ok=True)
+            # Check if annotation exists for this frame
+            if frame_number not in existing_df['Frame Number'].values:
+                return jsonify({'error': f'No annotation found for frame {frame_number}'}), 404
 
-        backup_filename = f"{base_name}_original.csv"
-        backup_path = os.path.join(backup_folder, backup_filename)
+            # Create backup folder and backup original CSV only once (before first edit)
+            backup_folder = os.path.join(os.path.dirname(csv_folder), 'backup_csv')
+            os.makedirs(backup_folder, exist_ok=True)
 
-        # Only create backup if it doesn't already exist (first edit only)
-        if not os.path.exists(backup_path):
-            shutil.copy2(csv_path, backup_path)
+            backup_filename = f"{base_name}_original.csv"
+            backup_path = os.path.join(backup_folder, backup_filename)
 
-        # Get the annotation data before deletion for response
-        deleted_annotation = existing_df[existing_df['Frame Number'] == frame_number].iloc[0].to_dict()
+            # Only create backup if it doesn't already exist (first edit only)
+            if not os.path.exists(backup_path):
+                shutil.copy2(csv_path, backup_path)
 
-        # Remove the annotation
-        updated_df = existing_df[existing_df['Frame Number'] != frame_number]
+            # Get the annotation data before deletion for response
+            deleted_annotation = existing_df[existing_df['Frame Number'] == frame_number].iloc[0].to_dict()
 
-        # Save updated CSV
-        if updated_df.empty:
-            # If no annotations left, create empty CSV with headers
-            headers = list(existing_df.columns)
-            empty_df = pd.DataFrame(columns=headers)
-            empty_df.to_csv(csv_path, index=False)
-        else:
-            updated_df.to_csv(csv_path, index=False)
+            # Remove the annotation
+            updated_df = existing_df[existing_df['Frame Number'] != frame_number]
 
-        return jsonify({
+            # Save updated CSV
+            if updated_df.empty:
+                # If no annotations left, create empty CSV with headers
+                headers = list(existing_df.columns)
+                empty_df = pd.DataFrame(columns=headers)
+                write_csv(empty_df, csv_path)
+            else:
+                write_csv(updated_df, csv_path)
+            etag = annotation_versions.remember(csv_path)
+            clip_cache.invalidate(os.path.join(app.config['DATA_FOLDER'], video_filename), [frame_number])
+
+        return versioned(jsonify({
             'success': True,
             'frame_number': frame_number,
             'deleted_annotation': deleted_annotation,
             'total_annotations': len(updated_df),
-            'message': f'Annotation deleted for frame {frame_number}'
-        })
+            'message': f'Annotation deleted for frame {frame_number}',
+            'etag': etag
+        }), etag)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -875,6 +2083,7 @@ def delete_touch():
 @app.route('/api/save_csv_changes', methods=['POST'])
 def save_csv_changes():
     """Save all touch editing changes back to CSV file with new format support"""
+    import pandas as pd
     try:
         data = request.json
         video_filename = data.get('video_filename')
@@ -889,104 +2098,369 @@ def save_csv_changes():
         csv_filename = f"{base_name}.csv"
         csv_path = os.path.join(csv_folder, csv_filename)
 
-        # Create backup folder and backup original CSV only once (before first edit)
-        backup_folder = os.path.join(os.path.dirname(csv_folder), 'backup_csv')
-        os.makedirs(backup_folder, exist_ok=True)
+        with annotation_versions.locked(csv_path):
+            conflict, stale_base = check_edit(csv_path, data, versioning.rows_by_frame(touch_data))
+            if conflict:
+                return conflict
+            if stale_base is not None:
+                # Rows the client left as it loaded them must not undo other people's edits since
+                touch_data = [row for frame, row in versioning.rows_by_frame(touch_data).items()
+                              if not versioning.has_state(stale_base, frame, row)]
+
+            # Create backup folder and backup original CSV only once (before first edit)
+            backup_folder = os.path.join(os.path.dirname(csv_folder), 'backup_csv')
+            os.makedirs(backup_folder, exist_ok=True)
+
+            backup_filename = f"{base_name}_original.csv"
+            backup_path = os.path.join(backup_folder, backup_filename)
+
+            # Only create backup if it doesn't already exist (first edit only)
+            if os.path.exists(csv_path) and not os.path.exists(backup_path):
+                shutil.copy2(csv_path, backup_path)
+
+            # Load original CSV to preserve existing annotations
+            original_df = pd.DataFrame()
+            if os.path.exists(csv_path):
+                original_df = read_csv(csv_path)
+
+            # Convert touch_data to DataFrame for easier manipulation
+            edited_df = pd.DataFrame(touch_data)
+
+            if not edited_df.empty:
+                # Get list of frame numbers that were edited
+                edited_frame_numbers = set(edited_df['Frame Number'].tolist())
+
+                # Keep original annotations that weren't edited
+                if not original_df.empty:
+                    unchanged_df = original_df[~original_df['Frame Number'].isin(edited_frame_numbers)]
+                else:
+                    unchanged_df = pd.DataFrame()
 
-        backup_filename = f"{base_name}_original.csv"
-        backup_path = os.path.join(backup_folder, backup_filename)
+                # Combine unchanged original data with new edited data
+                if unchanged_df.empty:
+                    combined_df = edited_df
+                elif edited_df.empty:
+                    combined_df = unchanged_df
+                else:
+                    combined_df = pd.concat([unchanged_df, edited_df], ignore_index=True)
+            else:
+                # If no touch data provided, keep only original data
+                combined_df = original_df
+
+            # Determine column order based on format
+            if use_new_format:
+                # New format with Touch_Event and Foot_Plant_Event
+                column_order = ['Frame Number', 'Time (seconds)', 'Touch_Event', 'Foot_Plant_Event', 'Timestamp']
+
+                if not combined_df.empty:
+                    # Add new columns if they don't exist
+                    if 'Touch_Event' not in combined_df.columns:
+                        # Convert from old format if possible
+                        if 'Body Part' in combined_df.columns and 'Event Type' in combined_df.columns:
+                            combined_df['Touch_Event'] = combined_df.apply(
+                                lambda row: 1 if row.get('Body Part') == 'Right Foot' and row.get('Event Type') == 'ball_touch'
+                                          else 2 if row.get('Body Part') == 'Left Foot' and row.get('Event Type') == 'ball_touch'
+                                          else 0, axis=1)
+                            combined_df['Foot_Plant_Event'] = combined_df.apply(
+                                lambda row: 1 if row.get('Body Part') == 'Right Foot' and row.get('Event Type') in ['foot_touchdown', 'foot_liftoff']
+                                          else 2 if row.get('Body Part') == 'Left Foot' and row.get('Event Type') in ['foot_touchdown', 'foot_liftoff']
+                                          else 0, axis=1)
+                        else:
+                            combined_df['Touch_Event'] = 0
+                            combined_df['Foot_Plant_Event'] = 0
+
+                    # Keep old columns for reference but not in primary order
+                    all_columns = list(combined_df.columns)
+                    extra_columns = [col for col in all_columns if col not in column_order]
+                    final_columns = column_order + extra_columns
+                    combined_df = combined_df.reindex(columns=[col for col in final_columns if col in combined_df.columns])
+            else:
+                # Old format for backward compatibility
+                column_order = ['Frame Number', 'Time (seconds)', 'Body Part', 'Event Type', 'Timestamp']
+                if not combined_df.empty:
+                    # Add Event Type column if it doesn't exist (backward compatibility)
+                    if 'Event Type' not in combined_df.columns:
+                        combined_df['Event Type'] = 'ball_touch'
+                    combined_df = combined_df.reindex(columns=[col for col in column_order if col in combined_df.columns])
 
-        # Only create backup if it doesn't already exist (first edit only)
-        if os.path.exists(csv_path) and not os.path.exists(backup_path):
-            shutil.copy2(csv_path, backup_path)
+            if not combined_df.empty:
+                # Sort by frame number
+                combined_df = combined_df.sort_values('Frame Number')
 
-        # Load original CSV to preserve existing annotations
-        original_df = pd.DataFrame()
-        if os.path.exists(csv_path):
-            original_df = pd.read_csv(csv_path)
+                # Save to CSV
+                write_csv(combined_df, csv_path)
+                saved_count = len(combined_df)
+                refresh_clips(video_filename, combined_df['Frame Number'])
+            else:
+                # If no data at all, create empty CSV with headers
+                empty_df = pd.DataFrame(columns=column_order)
+                write_csv(empty_df, csv_path)
+                saved_count = 0
+                refresh_clips(video_filename, [])
+            etag = annotation_versions.remember(csv_path)
+
+        return versioned(jsonify({
+            'success': True,
+            'edited_touches': len(touch_data),
+            'total_touches': saved_count,
+            'backup_created': backup_path,
+            'format_used': 'new' if use_new_format else 'old',
+            'message': f'Successfully saved {len(touch_data)} annotations. Total: {saved_count}',
+            'etag': etag
+        }), etag)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Convert touch_data to DataFrame for easier manipulation
-        edited_df = pd.DataFrame(touch_data)
+@app.route('/api/align_annotations', methods=['POST'])
+def align_annotations():
+    """Carry a video's annotation CSV over to a re-encoded or trimmed copy by matching frame signatures"""
+    try:
+        data = request.json or {}
+        source_video = data.get('source_video')
+        target_video = data.get('target_video')
+        overwrite = bool(data.get('overwrite', False))
+        dry_run = bool(data.get('dry_run', False))
+        try:
+            min_confidence = float(data.get('min_confidence', 0.3))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'min_confidence must be a number'}), 400
+
+        if not source_video or not target_video:
+            return jsonify({'error': 'Missing source_video or target_video'}), 400
+        if source_video == target_video:
+            return jsonify({'error': 'Source and target must be different videos'}), 400
+
+        source_path = os.path.join(app.config['DATA_FOLDER'], source_video)
+        target_path = os.path.join(app.config['DATA_FOLDER'], target_video)
+        source_csv = os.path.join(app.config['CSV_FOLDER'], f"{os.path.splitext(source_video)[0]}.csv")
+        target_csv_filename = f"{os.path.splitext(target_video)[0]}.csv"
+        target_csv = os.path.join(app.config['CSV_FOLDER'], target_csv_filename)
+
+        for path, name in ((source_path, source_video), (target_path, target_video)):
+            if not os.path.exists(path):
+                return jsonify({'error': f'Video file not found: {name}'}), 404
+        if not os.path.exists(source_csv):
+            return jsonify({'error': f'CSV file not found for {source_video}'}), 404
+        if os.path.exists(target_csv) and not overwrite and not dry_run:
+            return jsonify({'error': f'{target_csv_filename} already exists (pass overwrite to replace it)'}), 409
+
+        source_signatures, source_fps = signature_cache.get(source_path)
+        target_signatures, target_fps = signature_cache.get(target_path)
+        result = alignment.align(source_signatures, source_fps, target_signatures, target_fps)
+        if result['confidence'] < min_confidence:
+            return jsonify({
+                'error': f"Alignment confidence {result['confidence']:.2f} is below {min_confidence:.2f}; "
+                         'the videos may not show the same footage',
+                'alignment': result
+            }), 422
+
+        df = read_csv(source_csv)
+        mapped = alignment.map_frames(df['Frame Number'].astype(int), result, len(target_signatures))
+        dropped = [int(source) for source, target in zip(df['Frame Number'], mapped) if target is None]
+
+        # A slower target maps neighbouring source frames onto one frame; the first annotation keeps it
+        keep, kept_from, collided = [], {}, []
+        for source, target in zip(df['Frame Number'].astype(int), mapped):
+            if target is not None and target in kept_from:
+                collided.append({'from': int(source), 'to': target, 'kept_from': kept_from[target]})
+            elif target is not None:
+                kept_from[target] = int(source)
+                keep.append(True)
+                continue
+            keep.append(False)
+        aligned = df[keep].copy()
+        aligned['Frame Number'] = [target for target, kept in zip(mapped, keep) if kept]
+        if 'Time (seconds)' in aligned.columns:
+            aligned['Time (seconds)'] = (aligned['Frame Number'] - 1) / target_fps
+
+        etag = None
+        if not dry_run:
+            # Checked again under the lock: an annotator may have created the CSV while we aligned
+            with annotation_versions.locked(target_csv):
+                if os.path.exists(target_csv) and not overwrite:
+                    return jsonify({'error': f'{target_csv_filename} already exists '
+                                             '(pass overwrite to replace it)'}), 409
+                write_csv(aligned, target_csv)
+                etag = annotation_versions.remember(target_csv)
+            refresh_clips(target_video, aligned['Frame Number'])
+
+        response = jsonify({
+            'success': True,
+            'alignment': result,
+            'csv_filename': target_csv_filename,
+            'mapped_annotations': len(aligned),
+            'dropped_frames': dropped,
+            'collided_frames': collided,
+            'frame_mapping': [{'from': int(source), 'to': target}
+                              for source, target in zip(df['Frame Number'], mapped)],
+            'written': not dry_run,
+            **({'etag': etag} if etag else {})
+        })
+        return versioned(response, etag) if etag else response
 
-        if not edited_df.empty:
-            # Get list of frame numbers that were edited
-            edited_frame_numbers = set(edited_df['Frame Number'].tolist())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-            # Keep original annotations that weren't edited
-            if not original_df.empty:
-                unchanged_df = original_df[~original_df['Frame Number'].isin(edited_frame_numbers)]
-            else:
-                unchanged_df = pd.DataFrame()
+@app.route('/api/annotations/query')
+def query_annotations():
+    """Filter annotations across every CSV in csv/ by video, event type, foot and frame range"""
+    try:
+        args = request.args
+        video = args.get('video')
+        if video and allowed_file(video, ALLOWED_VIDEO_EXTENSIONS | ALLOWED_CSV_EXTENSIONS):
+            video = os.path.splitext(video)[0]
+        limit = max(1, min(args.get('limit', 100, type=int), 1000))
+        offset = max(0, args.get('offset', 0, type=int))
+
+        rows, total = get_annotation_db().query(
+            video=video,
+            event_type=args.get('event_type'),
+            foot=args.get('foot'),
+            frame_min=args.get('frame_min', type=int),
+            frame_max=args.get('frame_max', type=int),
+            limit=limit,
+            offset=offset
+        )
 
-            # Combine unchanged original data with new edited data
-            if unchanged_df.empty:
-                combined_df = edited_df
-            elif edited_df.empty:
-                combined_df = unchanged_df
-            else:
-                combined_df = pd.concat([unchanged_df, edited_df], ignore_index=True)
-        else:
-            # If no touch data provided, keep only original data
-            combined_df = original_df
+        return jsonify({
+            'success': True,
+            'annotations': rows,
+            'total': total,
+            'limit': limit,
+            'offset': offset
+        })
 
-        # Determine column order based on format
-        if use_new_format:
-            # New format with Touch_Event and Foot_Plant_Event
-            column_order = ['Frame Number', 'Time (seconds)', 'Touch_Event', 'Foot_Plant_Event', 'Timestamp']
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-            if not combined_df.empty:
-                # Add new columns if they don't exist
-                if 'Touch_Event' not in combined_df.columns:
-                    # Convert from old format if possible
-                    if 'Body Part' in combined_df.columns and 'Event Type' in combined_df.columns:
-                        combined_df['Touch_Event'] = combined_df.apply(
-                            lambda row: 1 if row.get('Body Part') == 'Right Foot' and row.get('Event Type') == 'ball_touch'
-                                      else 2 if row.get('Body Part') == 'Left Foot' and row.get('Event Type') == 'ball_touch'
-                                      else 0, axis=1)
-                        combined_df['Foot_Plant_Event'] = combined_df.apply(
-                            lambda row: 1 if row.get('Body Part') == 'Right Foot' and row.get('Event Type') in ['foot_touchdown', 'foot_liftoff']
-                                      else 2 if row.get('Body Part') == 'Left Foot' and row.get('Event Type') in ['foot_touchdown', 'foot_liftoff']
-                                      else 0, axis=1)
-                    else:
-                        combined_df['Touch_Event'] = 0
-                        combined_df['Foot_Plant_Event'] = 0
-
-                # Keep old columns for reference but not in primary order
-                all_columns = list(combined_df.columns)
-                extra_columns = [col for col in all_columns if col not in column_order]
-                final_columns = column_order + extra_columns
-                combined_df = combined_df.reindex(columns=[col for col in final_columns if col in combined_df.columns])
-        else:
-            # Old format for backward compatibility
-            column_order = ['Frame Number', 'Time (seconds)', 'Body Part', 'Event Type', 'Timestamp']
-            if not combined_df.empty:
-                # Add Event Type column if it doesn't exist (backward compatibility)
-                if 'Event Type' not in combined_df.columns:
-                    combined_df['Event Type'] = 'ball_touch'
-                combined_df = combined_df.reindex(columns=[col for col in column_order if col in combined_df.columns])
+@app.route('/api/annotations/summary')
+def annotation_summary():
+    """Annotation counts per video, event type and foot across the corpus"""
+    try:
+        return jsonify({
+            'success': True,
+            'summary': get_annotation_db().summary()
+        })
 
-        if not combined_df.empty:
-            # Sort by frame number
-            combined_df = combined_df.sort_values('Frame Number')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-            # Save to CSV
-            combined_df.to_csv(csv_path, index=False)
-            saved_count = len(combined_df)
-        else:
-            # If no data at all, create empty CSV with headers
-            empty_df = pd.DataFrame(columns=column_order)
-            empty_df.to_csv(csv_path, index=False)
-            saved_count = 0
+@app.route('/api/annotations/export/<video_name>')
+def export_annotations(video_name):
+    """Re-export a video's annotations from the database in its current CSV layout"""
+    try:
+        base_name = os.path.splitext(video_name)[0]
+        csv_string = get_annotation_db().export_csv(base_name)
+
+        if csv_string is None:
+            return jsonify({'error': f'No annotations found for {base_name}'}), 404
+
+        return send_file(
+            BytesIO(csv_string.encode('utf-8')),
+            mimetype='text/csv',
+            as_attachment=True,
+            download_name=f"{base_name}.csv"
+        )
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reviewed_sessions')
+def list_reviewed_sessions():
+    """Saved sessions, newest first, filtered by video, saved date range and frame count"""
+    try:
+        args = request.args
+        limit = max(1, min(args.get('limit', 50, type=int), 1000))
+        offset = max(0, args.get('offset', 0, type=int))
+        try:
+            sessions, total = get_session_index().query(
+                video=args.get('video'),
+                date_from=args.get('date_from'),
+                date_to=args.get('date_to'),
+                min_frames=args.get('min_frames', type=int),
+                max_frames=args.get('max_frames', type=int),
+                limit=limit,
+                offset=offset
+            )
+        except ValueError as e:
+            return jsonify({'error': f'Invalid date: {e}'}), 400
 
         return jsonify({
             'success': True,
-            'edited_touches': len(touch_data),
-            'total_touches': saved_count,
-            'backup_created': backup_path,
-            'format_used': 'new' if use_new_format else 'old',
-            'message': f'Successfully saved {len(touch_data)} annotations. Total: {saved_count}'
+            'sessions': sessions,
+            'total': total,
+            'limit': limit,
+            'offset': offset
         })
-        
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reviewed_sessions/<session_id>')
+def reviewed_session_detail(session_id):
+    """Full metadata.json (including the frame file list) of one saved session"""
+    try:
+        metadata_path = os.path.join(app.config['REVIEWED_FRAMES_FOLDER'], session_id, 'metadata.json')
+        if session_id != secure_filename(session_id) or not os.path.exists(metadata_path):
+            return jsonify({'error': 'Session not found'}), 404
+
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+        return jsonify({'success': True, 'session': metadata})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/touches')
+def touch_analytics_endpoint():
+    """Touch counts per foot, inter-touch intervals, touch rate and plant/touch ratios per video, player and corpus"""
+    try:
+        video = request.args.get('video')
+        if video and allowed_file(video, ALLOWED_VIDEO_EXTENSIONS | ALLOWED_CSV_EXTENSIONS):
+            video = os.path.splitext(video)[0]
+
+        report = touch_analytics.report(video=video)
+        if video and video not in report['videos']:
+            return jsonify({'error': f'No annotations found for {video}'}), 404
+
+        return jsonify({'success': True, **report})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tracks')
+def timeline_tracks_endpoint():
+    """Foot speed, foot height and ball distance of a video as one (min, max) pair per timeline pixel
+
+    Query: video, signals (comma-separated, default all), start_frame and
+    end_frame (1-based, default the whole track) and width (pixel columns).
+    Ranges narrower than `width` come back frame by frame.
+    """
+    try:
+        video = request.args.get('video', '')
+        if not video:
+            return jsonify({'error': 'video is required'}), 400
+        names = [name for name in request.args.get('signals', ','.join(timeline_tracks.SIGNALS)).split(',') if name]
+        unknown = [name for name in names if name not in timeline_tracks.SIGNALS]
+        if unknown or not names:
+            return jsonify({'error': f"Unknown signals {unknown}; available: {list(timeline_tracks.SIGNALS)}"}), 400
+        try:
+            start_frame = int(request.args.get('start_frame', 1))
+            end_frame = int(request.args.get('end_frame', 2 ** 62))
+            width = int(request.args.get('width', 1000))
+        except ValueError:
+            return jsonify({'error': 'start_frame, end_frame and width must be integers'}), 400
+        if start_frame < 1 or end_frame < start_frame or not 1 <= width <= 20000:
+            return jsonify({'error': 'Need 1 <= start_frame <= end_frame and 1 <= width <= 20000'}), 400
+
+        tracking_path = track_signals.tracking_csv(os.path.basename(video))
+        if tracking_path is None:
+            return jsonify({'error': f'No tracking CSV found for {video}'}), 404
+
+        result = track_signals.query(tracking_path, names, start_frame, end_frame, width)
+        return jsonify({'success': True, 'video': video, 'tracking_csv': os.path.basename(tracking_path), **result})
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1016,6 +2490,7 @@ def clear_files():
 
 @app.route('/upload_video', methods=['POST'])
 def upload_video():
+    import cv2
     try:
         if 'video' not in request.files:
             return jsonify({'error': 'No video file provided'}), 400
@@ -1029,14 +2504,13 @@ def upload_video():
             return jsonify({'error': 'Invalid video format'}), 400
         
         # Generate unique session ID
-        session_id = str(uuid.uuid4())
-        session['session_id'] = session_id
-        session['annotations'] = []
+        session_id = start_annotator_session()
         
         # Save video file
         filename = secure_filename(video_file.filename)
         video_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{session_id}_{filename}")
         video_file.save(video_path)
+        ingest_pipeline.submit(video_path)
         
         # Get video metadata
         cap = cv2.VideoCapture(video_path)
@@ -1084,31 +2558,24 @@ def load_data_video():
         if not os.path.exists(video_path):
             return jsonify({'error': 'Video file not found'}), 404
 
-        # Get video information
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
+        # Get video information (from the ingest cache once the video was ingested)
+        metadata = video_metadata(video_path)
+        if metadata is None:
             return jsonify({'error': 'Could not open video file'}), 500
 
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        duration = total_frames / fps if fps > 0 else 0
-        cap.release()
-
         # Set up session for this video
         session['video_info'] = {
             'path': video_path,
             'filename': video_filename,
-            'fps': fps,
-            'total_frames': total_frames,
-            'width': width,
-            'height': height,
-            'duration': duration
+            'fps': metadata['fps'],
+            'total_frames': metadata['total_frames'],
+            'width': metadata['width'],
+            'height': metadata['height'],
+            'duration': metadata['duration']
         }
 
         # Clear any existing session annotations since this is a data folder video
-        session['annotations'] = []
+        start_annotator_session()
 
         return jsonify({
             'success': True,
@@ -1120,6 +2587,7 @@ def load_data_video():
 
 @app.route('/get_frame/<int:frame_number>')
 def get_frame(frame_number):
+    import cv2
     try:
         if 'video_info' not in session:
             return jsonify({'error': 'No video loaded'}), 400
@@ -1130,24 +2598,60 @@ def get_frame(frame_number):
         if frame_number < 0 or frame_number >= total_frames:
             return jsonify({'error': 'Invalid frame number'}), 400
 
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            return jsonify({'error': 'Could not open video'}), 500
+        try:
+            rendition = renditions.parse_rendition({
+                'format': request.args.get('format'),
+                'quality': request.args.get('quality'),
+                **({'max_dimension': request.args['max_dimension']} if 'max_dimension' in request.args else {})
+            }, renditions.DEFAULT_FRAME)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid rendition: {e}'}), 400
+
+        # Another worker may already have encoded this frame, or the read-ahead worker prepared it
+        video_key = frame_cache_video_key(video_path)
+        session_id = annotator_session_id()
+        encoded = cache_lookup(video_key, frame_number, rendition)
+        if encoded is None and read_ahead is not None:
+            encoded = read_ahead.get(session_id, video_key, frame_number, rendition)
+            metrics.READ_AHEAD_REQUESTS.inc(result='hit' if encoded is not None else 'miss')
+
+        # Frames inside a pinned segment need no decoding: a source-size pin, or a downscaled one that is
+        # already exactly the size this rendition is resized to
+        frame = None
+        if encoded is None:
+            shape = (session['video_info']['height'], session['video_info']['width'])
+            frame = segment_pins.frame(video_key, frame_number, shape)
+            if frame is None and rendition['max_dimension']:
+                frame = segment_pins.frame(video_key, frame_number,
+                                           renditions.fitted_shape(shape, rendition['max_dimension']))
+        pinned = frame is not None
+
+        if encoded is None and not pinned:
+            cap = cv2.VideoCapture(video_path)
+            if not cap.isOpened():
+                return jsonify({'error': 'Could not open video'}), 500
+
+            # Set to specific frame
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ret, frame = cap.read()
+            cap.release()
 
-        # Set to specific frame
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-        ret, frame = cap.read()
-        cap.release()
+            if not ret:
+                return jsonify({'error': 'Could not read frame'}), 500
 
-        if not ret:
-            return jsonify({'error': 'Could not read frame'}), 500
+        if encoded is None:
+            encoded = renditions.encode(frame, rendition)
+            if not pinned:
+                cache_store(video_key, frame_number, rendition, encoded)
+
+        if read_ahead is not None:
+            read_ahead.note(session_id, video_path, video_key, frame_number, rendition, total_frames)
 
         # Convert frame to base64
-        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-        frame_base64 = base64.b64encode(buffer).decode('utf-8')
+        frame_base64 = base64.b64encode(encoded).decode('utf-8')
 
         return jsonify({
-            'frame': f"data:image/jpeg;base64,{frame_base64}",
+            'frame': f"data:{renditions.mimetype(rendition)};base64,{frame_base64}",
             'frame_number': frame_number,
             'time_seconds': frame_number / session['video_info']['fps']
         })
@@ -1155,6 +2659,76 @@ def get_frame(frame_number):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def pin_target_video(data):
+    """Video path for the pin APIs: `video_filename` from the data folder, else the annotator's video"""
+    video_filename = data.get('video_filename')
+    if video_filename:
+        return os.path.join(app.config['DATA_FOLDER'], video_filename)
+    if 'video_info' in session:
+        return session['video_info']['path']
+    return None
+
+@app.route('/api/pin_segment', methods=['POST'])
+def pin_segment():
+    """Decode frames start_frame..end_frame (0-based, as in /get_frame) once into a memmap"""
+    try:
+        data = request.json or {}
+        video_path = pin_target_video(data)
+        if not video_path:
+            return jsonify({'error': 'No video loaded'}), 400
+        if not os.path.exists(video_path):
+            return jsonify({'error': 'Video file not found'}), 404
+
+        try:
+            start_frame = int(data['start_frame'])
+            end_frame = int(data['end_frame'])
+            max_dimension = renditions.parse_rendition({'max_dimension': data.get('max_dimension')},
+                                                       renditions.DEFAULT_FRAME)['max_dimension']
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid segment: {e}'}), 400
+
+        started = time.perf_counter()
+        try:
+            segment = segment_pins.pin(video_path, frame_cache_video_key(video_path), start_frame, end_frame, max_dimension)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            'segment': segment,
+            'pin_seconds': round(time.perf_counter() - started, 3)
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/pinned_segments')
+def pinned_segments():
+    try:
+        video_path = pin_target_video(request.args)
+        if not video_path or not os.path.exists(video_path):
+            return jsonify({'segments': []})
+        return jsonify({'segments': segment_pins.segments(frame_cache_video_key(video_path))})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/unpin_segment', methods=['POST'])
+def unpin_segment():
+    """Remove pinned segments overlapping start_frame..end_frame, or all of the video's pins"""
+    try:
+        data = request.json or {}
+        video_path = pin_target_video(data)
+        if not video_path or not os.path.exists(video_path):
+            return jsonify({'error': 'No video loaded'}), 400
+        start_frame = data.get('start_frame')
+        end_frame = data.get('end_frame')
+        removed = segment_pins.unpin(frame_cache_video_key(video_path),
+                                     int(start_frame) if start_frame is not None else None,
+                                     int(end_frame) if end_frame is not None else None)
+        return jsonify({'success': True, 'removed': removed})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/add_annotation', methods=['POST'])
 def add_annotation():
     try:
@@ -1180,31 +2754,13 @@ def add_annotation():
             'timestamp': datetime.now().isoformat() + 'Z'
         }
         
-        # Get current annotations
-        annotations = session.get('annotations', [])
-        
-        # Check if frame already annotated
-        existing_index = next((i for i, a in enumerate(annotations) 
-                              if a['frame_number'] == frame_number), None)
-        
-        if existing_index is not None:
-            # Update existing annotation
-            annotations[existing_index] = annotation
-        else:
-            # Add new annotation
-            annotations.append(annotation)
-        
-        # Sort by frame number
-        annotations.sort(key=lambda x: x['frame_number'])
-        
-        # Update session
-        session['annotations'] = annotations
-        session.modified = True
+        # Insert, or replace the existing annotation on this frame
+        total = get_annotation_store().upsert(annotator_session_id(), annotation)
         
         return jsonify({
             'success': True,
             'annotation': annotation,
-            'total_annotations': len(annotations)
+            'total_annotations': total
         })
         
     except Exception as e:
@@ -1219,15 +2775,11 @@ def remove_annotation():
         if frame_number is None:
             return jsonify({'error': 'Missing frame_number'}), 400
         
-        annotations = session.get('annotations', [])
-        annotations = [a for a in annotations if a['frame_number'] != frame_number]
-        
-        session['annotations'] = annotations
-        session.modified = True
+        total = get_annotation_store().delete(annotator_session_id(), frame_number)
         
         return jsonify({
             'success': True,
-            'total_annotations': len(annotations)
+            'total_annotations': total
         })
         
     except Exception as e:
@@ -1236,7 +2788,7 @@ def remove_annotation():
 @app.route('/get_annotations')
 def get_annotations():
     try:
-        annotations = session.get('annotations', [])
+        annotations = get_annotation_store().list(annotator_session_id())
         return jsonify({
             'annotations': annotations,
             'total': len(annotations)
@@ -1246,8 +2798,9 @@ def get_annotations():
 
 @app.route('/export_csv')
 def export_csv():
+    import pandas as pd
     try:
-        annotations = session.get('annotations', [])
+        annotations = get_annotation_store().list(annotator_session_id())
         
         if not annotations:
             return jsonify({'error': 'No annotations to export'}), 400
@@ -1293,6 +2846,10 @@ def clear_session():
                     pass
         
         # Clear session
+        if 'session_id' in session:
+            get_annotation_store().clear(session['session_id'])
+            if read_ahead is not None:
+                read_ahead.stop(session['session_id'])
         session.clear()
         
         return jsonify({'success': True})
@@ -1300,6 +2857,32 @@ def clear_session():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/clip/<filename>/<int:frame_number>')
+def get_clip(filename, frame_number):
+    """Short clip around an annotated frame for loop mode, cut on demand if it is not cached yet"""
+    try:
+        video_path = os.path.join(app.config['DATA_FOLDER'], filename)
+        
+        if not os.path.exists(video_path):
+            return jsonify({'error': 'Video file not found'}), 404
+        
+        if frame_number < 1:
+            return jsonify({'error': 'Frame numbers start at 1'}), 400
+        
+        max_dimension = clip_cache.max_dimension
+        if request.args.get('max_dimension'):
+            try:
+                max_dimension = renditions.parse_rendition({'max_dimension': request.args['max_dimension']},
+                                                           renditions.DEFAULT_FRAME)['max_dimension']
+            except (TypeError, ValueError) as e:
+                return jsonify({'error': str(e)}), 400
+        
+        clip_path = clip_cache.get(video_path, frame_number, max_dimension)
+        return send_file(clip_path, mimetype=clip_cache.mimetype(clip_path), conditional=True)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/video/<filename>')
 def stream_video(filename):
     """Stream video file from data folder with range request support"""
@@ -1340,6 +2923,7 @@ def stream_video(filename):
                     if not data:
                         break
                     remaining -= len(data)
+                    metrics.VIDEO_BYTES_SERVED.inc(len(data))
                     yield data
         
         # Determine MIME type based on file extension
@@ -0,0 +1,197 @@
+"""Extract frames for many videos at once, without the web UI.
+
+Every video in data/ that has a paired CSV is extracted with the same code the
+/extract, /extract_timeline and /extract_windows routes use, one video per
+worker process, straight into reviewed_extracted_frames/<session>/ with the
+metadata.json that "Save current frames" writes. A video is skipped when a
+batch session extracted from the same video, CSV and settings already exists.
+
+    python batch_extract.py                              # frames mode, every video with a CSV
+    python batch_extract.py --mode timeline --fps 5 --workers 4
+    python batch_extract.py "Drill 3.mp4" --mode windows --window 8 --force
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import app as app_module
+
+MODES = ('frames', 'timeline', 'windows')
+
+
+def source_fingerprint(video_path, csv_path, mode, options):
+    """What a batch session was extracted from; equal fingerprints mean the session is up to date"""
+    video_stat = os.stat(video_path)
+    csv_stat = os.stat(csv_path)
+    return {
+        'mode': mode,
+        'options': options,
+        'video_mtime_ns': video_stat.st_mtime_ns,
+        'video_size': video_stat.st_size,
+        'csv_mtime_ns': csv_stat.st_mtime_ns,
+        'csv_size': csv_stat.st_size
+    }
+
+
+def find_up_to_date(reviewed_folder, video_filename, fingerprint):
+    """session_id of an existing batch session with the same fingerprint, or None"""
+    if not os.path.isdir(reviewed_folder):
+        return None
+    for session_id in os.listdir(reviewed_folder):
+        try:
+            with open(os.path.join(reviewed_folder, session_id, 'metadata.json')) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if metadata.get('video_filename') == video_filename and \
+                metadata.get('batch', {}).get('source') == fingerprint:
+            return session_id
+    return None
+
+
+def paired_csv(csv_folder, video_filename):
+    return os.path.join(csv_folder, f"{os.path.splitext(video_filename)[0]}.csv")
+
+
+def configure_worker(folders):
+    """Process pool initializer: point the app at the folders given on the command line"""
+    app_module.create_app(**folders)
+
+
+def extract_video(video_filename, mode, options):
+    """Extract one video into a new reviewed session (runs in a worker process)"""
+    config = app_module.app.config
+    video_path = os.path.join(config['DATA_FOLDER'], video_filename)
+    csv_path = paired_csv(config['CSV_FOLDER'], video_filename)
+    reviewed_folder = config['REVIEWED_FRAMES_FOLDER']
+    started = time.perf_counter()
+
+    # Frames are written into a hidden staging session that is renamed into place when complete
+    staging_dir = os.path.join(reviewed_folder, f".batch-{os.getpid()}")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    frames_dir = os.path.join(staging_dir, 'frames')
+    os.makedirs(frames_dir)
+    config['FRAMES_FOLDER'] = frames_dir
+
+    if mode == 'timeline':
+        updates = app_module.extract_timeline(video_path, csv_path, video_filename, options['fps'])
+    elif mode == 'windows':
+        updates = app_module.extract_touch_windows(video_path, csv_path, video_filename,
+                                                   options['window'], options['window'])
+    else:
+        updates = app_module.extract_frames(video_path, csv_path, video_filename)
+
+    result = None
+    with app_module.app.app_context():
+        for update in updates:
+            if update['type'] == 'complete':
+                result = update
+                break
+            if update['type'] == 'error':
+                raise RuntimeError(update['error'])
+    if result is None:
+        raise RuntimeError('Extraction did not complete')
+
+    extraction_session = result['session_info']
+    shutil.copy2(csv_path, os.path.join(staging_dir, 'annotations.csv'))
+    frame_files = sorted(name for name in os.listdir(frames_dir) if name.endswith(app_module.renditions.FRAME_EXTENSIONS))
+    seconds = time.perf_counter() - started
+    app_module.write_reviewed_metadata(staging_dir, extraction_session, frame_files, extra={
+        'batch': {
+            'source': source_fingerprint(video_path, csv_path, mode, options),
+            'extraction_seconds': round(seconds, 3)
+        }
+    })
+
+    session_id = extraction_session['session_id']
+    session_dir = os.path.join(reviewed_folder, session_id)
+    suffix = 1
+    while os.path.exists(session_dir):
+        suffix += 1
+        session_dir = os.path.join(reviewed_folder, f"{session_id}_{suffix}")
+    os.rename(staging_dir, session_dir)
+    return {
+        'video_filename': video_filename,
+        'session_id': os.path.basename(session_dir),
+        'frames': len(frame_files),
+        'seconds': seconds
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract frames for many videos into reviewed_extracted_frames/')
+    parser.add_argument('videos', nargs='*', help='Video filenames in the data folder (default: every video with a CSV)')
+    parser.add_argument('--mode', choices=MODES, default='frames', help='Extraction mode (default: frames)')
+    parser.add_argument('--fps', type=int, default=5, help='Timeline mode: frames per second to extract')
+    parser.add_argument('--window', type=int, default=5, help='Windows mode: frames before and after each touch')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--force', action='store_true', help='Extract even if an up-to-date session exists')
+    parser.add_argument('--data', default=app_module.app.config['DATA_FOLDER'], help='Video folder')
+    parser.add_argument('--csv', default=app_module.app.config['CSV_FOLDER'], help='Annotation CSV folder')
+    parser.add_argument('--output', default=app_module.app.config['REVIEWED_FRAMES_FOLDER'],
+                        help='Reviewed sessions folder')
+    args = parser.parse_args(argv)
+
+    options = {'fps': args.fps} if args.mode == 'timeline' else {'window': args.window} if args.mode == 'windows' else {}
+    videos = args.videos or sorted(
+        name for name in os.listdir(args.data)
+        if app_module.allowed_file(name, app_module.ALLOWED_VIDEO_EXTENSIONS) and not name.startswith('.'))
+
+    jobs = []
+    skipped = []
+    failed = []
+    for video_filename in videos:
+        video_path = os.path.join(args.data, video_filename)
+        csv_path = paired_csv(args.csv, video_filename)
+        if not os.path.exists(video_path) or not os.path.exists(csv_path):
+            print(f"skip  {video_filename}: {'video' if not os.path.exists(video_path) else 'CSV'} not found")
+            failed.append(video_filename)
+            continue
+        existing = None if args.force else find_up_to_date(
+            args.output, video_filename, source_fingerprint(video_path, csv_path, args.mode, options))
+        if existing:
+            print(f"skip  {video_filename}: up to date in {existing}")
+            skipped.append(video_filename)
+        else:
+            jobs.append(video_filename)
+
+    os.makedirs(args.output, exist_ok=True)
+    folders = {
+        'DATA_FOLDER': os.path.abspath(args.data),
+        'CSV_FOLDER': os.path.abspath(args.csv),
+        'REVIEWED_FRAMES_FOLDER': os.path.abspath(args.output)
+    }
+    started = time.perf_counter()
+    done = []
+    if jobs:
+        with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(jobs))),
+                                 initializer=configure_worker, initargs=(folders,)) as pool:
+            futures = {pool.submit(extract_video, video_filename, args.mode, options): video_filename
+                       for video_filename in jobs}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"fail  {futures[future]}: {e}")
+                    failed.append(futures[future])
+                    continue
+                done.append(result)
+                print(f"done  {result['video_filename']}: {result['frames']} frames in {result['seconds']:.1f}s "
+                      f"-> {result['session_id']}")
+    elapsed = time.perf_counter() - started
+
+    total_frames = sum(result['frames'] for result in done)
+    print(f"\n{len(done)} extracted, {len(skipped)} skipped, {len(failed)} failed: "
+          f"{total_frames} frames in {elapsed:.1f}s")
+    if done and elapsed > 0:
+        print(f"throughput: {total_frames / elapsed:.1f} frames/s, {len(done) / elapsed * 60:.1f} videos/min "
+              f"with {min(args.workers, len(jobs))} worker(s)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""Resumable chunked uploads written straight into the data folder.
+
+An upload is identified by a digest of (filename, size, chunk size, client
+fingerprint), so starting the same file again resumes it instead of starting
+over. Chunks may arrive in any order and in parallel: each one is checked
+against its SHA-256 and written at its offset into a preallocated hidden
+`.part` file next to the final video, and a small marker file records that it
+arrived. Completing the upload renames the `.part` file into place, so large
+videos are never copied a second time.
+
+The `.part` file is sized from the size the client declares, so a new upload
+is refused when it is over max_size or when the data folder's free space,
+less what unfinished uploads still have to write, would drop below min_free.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+STALE_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_SIZE = 16 * 1024 ** 3
+DEFAULT_MIN_FREE = 512 * 1024 ** 2
+
+
+class UploadError(ValueError):
+    """Invalid upload request; `status` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ChunkedUploads:
+    def __init__(self, state_folder, data_folder, max_size=DEFAULT_MAX_SIZE, min_free=DEFAULT_MIN_FREE):
+        self.state_folder = state_folder
+        self.data_folder = data_folder
+        self.max_size = max_size
+        self.min_free = min_free
+
+    def _dir(self, upload_id):
+        if not UPLOAD_ID.match(upload_id or ''):
+            raise UploadError('Unknown upload', 404)
+        return os.path.join(self.state_folder, upload_id)
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.data_folder, f".{upload_id}.part")
+
+    def _manifest(self, upload_id):
+        try:
+            with open(os.path.join(self._dir(upload_id), 'manifest.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadError('Unknown upload', 404)
+
+    def init(self, filename, size, chunk_size=None, fingerprint='', sha256=None):
+        """Start (or resume) an upload and return its status"""
+        chunk_size = int(chunk_size or DEFAULT_CHUNK_SIZE)
+        size = int(size)
+        if size <= 0:
+            raise UploadError('File is empty')
+        if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            raise UploadError(f'Chunk size must be between 1 byte and {MAX_CHUNK_SIZE // 2 ** 20} MB')
+        if self.max_size and size > self.max_size:
+            raise UploadError(f'Uploads are limited to {self.max_size // 2 ** 20} MB', 413)
+
+        upload_id = hashlib.blake2b(repr((filename, size, chunk_size, fingerprint, sha256)).encode('utf-8'),
+                                    digest_size=16).hexdigest()
+        upload_dir = self._dir(upload_id)
+        if not os.path.exists(os.path.join(upload_dir, 'manifest.json')):
+            self.purge_stale()
+            os.makedirs(self.data_folder, exist_ok=True)
+            free = shutil.disk_usage(self.data_folder).free - self._outstanding()
+            if size > free - self.min_free:
+                raise UploadError(f'Not enough free space for {size // 2 ** 20} MB '
+                                  f'({max(0, free - self.min_free) // 2 ** 20} MB available)', 507)
+            os.makedirs(os.path.join(upload_dir, 'chunks'), exist_ok=True)
+            with open(self._part_path(upload_id), 'wb') as f:
+                f.truncate(size)
+            manifest = {
+                'upload_id': upload_id,
+                'filename': filename,
+                'size': size,
+                'chunk_size': chunk_size,
+                'chunks': -(-size // chunk_size),
+                'sha256': sha256,
+                'created': time.time()
+            }
+            with open(os.path.join(upload_dir, 'manifest.json.tmp'), 'w') as f:
+                json.dump(manifest, f)
+            os.replace(os.path.join(upload_dir, 'manifest.json.tmp'), os.path.join(upload_dir, 'manifest.json'))
+        return self.status(upload_id)
+
+    def _outstanding(self):
+        """Bytes the unfinished uploads still have to write (their .part files are sparse until then)"""
+        if not os.path.isdir(self.state_folder):
+            return 0
+        total = 0
+        for upload_id in os.listdir(self.state_folder):
+            if not UPLOAD_ID.match(upload_id):
+                continue
+            try:
+                size = self._manifest(upload_id)['size']
+                allocated = getattr(os.stat(self._part_path(upload_id)), 'st_blocks', 0) * 512
+            except (UploadError, ValueError, KeyError, FileNotFoundError):
+                continue
+            total += max(0, size - allocated)
+        return total
+
+    def status(self, upload_id):
+        manifest = self._manifest(upload_id)
+        received = self._received(upload_id)
+        received_set = set(received)
+        return {
+            'upload_id': upload_id,
+            'filename': manifest['filename'],
+            'size': manifest['size'],
+            'chunk_size': manifest['chunk_size'],
+            'chunks': manifest['chunks'],
+            'received': received,
+            'missing': [i for i in range(manifest['chunks']) if i not in received_set]
+        }
+
+    def _received(self, upload_id):
+        try:
+            names = os.listdir(os.path.join(self._dir(upload_id), 'chunks'))
+        except FileNotFoundError:
+            return []
+        return sorted(int(name) for name in names if name.isdigit())
+
+    def write_chunk(self, upload_id, index, data, sha256=None):
+        """Verify one chunk and write it at its offset; returns the chunk's SHA-256"""
+        manifest = self._manifest(upload_id)
+        if not 0 <= index < manifest['chunks']:
+            raise UploadError(f"Chunk index must be between 0 and {manifest['chunks'] - 1}")
+        offset = index * manifest['chunk_size']
+        expected = min(manifest['chunk_size'], manifest['size'] - offset)
+        if len(data) != expected:
+            raise UploadError(f'Chunk {index} should be {expected} bytes, got {len(data)}')
+        digest = hashlib.sha256(data).hexdigest()
+        if sha256 and sha256.lower() != digest:
+            raise UploadError(f'Checksum mismatch for chunk {index}', 422)
+
+        fd = os.open(self._part_path(upload_id), os.O_WRONLY)
+        try:
+            os.pwrite(fd, data, offset)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        # The marker is written last, so a chunk only counts once its bytes are on disk
+        with open(os.path.join(self._dir(upload_id), 'chunks', str(index)), 'w') as f:
+            f.write(digest)
+        return digest
+
+    def complete(self, upload_id, target_name, overwrite=False):
+        """Check every chunk arrived (and the whole-file checksum, if given) and move the file into place"""
+        manifest = self._manifest(upload_id)
+        missing = self.status(upload_id)['missing']
+        if missing:
+            raise UploadError(f'{len(missing)} chunk(s) missing', 409)
+
+        part_path = self._part_path(upload_id)
+        if manifest.get('sha256'):
+            digest = hashlib.sha256()
+            with open(part_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            if digest.hexdigest() != manifest['sha256'].lower():
+                raise UploadError('Checksum mismatch for the assembled file', 422)
+
+        target_path = os.path.join(self.data_folder, target_name)
+        if os.path.exists(target_path) and not overwrite:
+            raise UploadError(f'{target_name} already exists', 409)
+        os.replace(part_path, target_path)
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+        return target_path
+
+    def abort(self, upload_id):
+        self._manifest(upload_id)
+        try:
+            os.remove(self._part_path(upload_id))
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+    def purge_stale(self, max_age=STALE_SECONDS):
+        """Drop uploads that were started more than max_age seconds ago and never completed"""
+        if not os.path.isdir(self.state_folder):
+            return
+        cutoff = time.time() - max_age
+        for upload_id in os.listdir(self.state_folder):
+            if not UPLOAD_ID.match(upload_id):
+                continue
+            try:
+                if self._manifest(upload_id)['created'] < cutoff:
+                    self.abort(upload_id)
+            except (UploadError, ValueError, KeyError):
+                continue
@@ -0,0 +1,257 @@
+"""Short clips around annotations for loop mode, cut with cv2.VideoWriter.
+
+Clips live as files in a size-capped folder. The file name encodes the video,
+the annotated frame and the clip settings, so the folder itself is the index:
+it survives restarts, is shared by every worker process, and a clip for a frame
+that is no longer annotated can be found and removed without extra state.
+"""
+import hashlib
+import os
+import queue
+import threading
+
+import renditions
+
+# Browser-playable codecs first; mp4v is the last resort that every OpenCV build can write
+CODECS = (
+    ('VP80', '.webm', 'video/webm'),
+    ('avc1', '.mp4', 'video/mp4'),
+    ('mp4v', '.mp4', 'video/mp4')
+)
+CLIP_EXTENSIONS = tuple(sorted({ext for _, ext, _ in CODECS}))
+
+
+def _digest(value, size=8):
+    return hashlib.blake2b(repr(value).encode('utf-8'), digest_size=size).hexdigest()
+
+
+class ClipCache:
+    def __init__(self, folder, max_bytes=500 * 1024 * 1024, seconds_before=2.0, seconds_after=2.0,
+                 max_dimension=None):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.seconds_before = seconds_before
+        self.seconds_after = seconds_after
+        self.max_dimension = max_dimension
+        self._lock = threading.Lock()
+        self._codec = None
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._worker = None
+        self._stopping = threading.Event()
+
+    def _prefix(self, video_path, frame_number):
+        return f"{_digest(os.path.abspath(video_path))}_{int(frame_number):06d}_"
+
+    def _variant(self, video_path, max_dimension):
+        st = os.stat(video_path)
+        return _digest((st.st_mtime_ns, st.st_size, self.seconds_before, self.seconds_after, max_dimension))
+
+    def _find(self, prefix, variant):
+        for ext in CLIP_EXTENSIONS:
+            path = os.path.join(self.folder, f"{prefix}{variant}{ext}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def lookup(self, video_path, frame_number, max_dimension=None):
+        """Path of a cached clip, or None. A hit refreshes the clip's position in the LRU order."""
+        path = self._find(self._prefix(video_path, frame_number), self._variant(video_path, max_dimension))
+        if path:
+            try:
+                os.utime(path)
+            except OSError:
+                return None
+        return path
+
+    def get(self, video_path, frame_number, max_dimension=None):
+        """Path of the clip around a 1-based frame, cutting it now if it is not cached yet"""
+        path = self.lookup(video_path, frame_number, max_dimension)
+        if path is None:
+            path = self._cut(video_path, frame_number, max_dimension)
+        return path
+
+    def clip_range(self, fps, total_frames, frame_number):
+        """0-based (start, end) frame indices covered by the clip around a 1-based frame"""
+        center = int(frame_number) - 1
+        start = max(0, center - int(round(self.seconds_before * fps)))
+        end = min(total_frames - 1, center + int(round(self.seconds_after * fps)))
+        return start, end
+
+    def _open_writer(self, path_base, fps, size):
+        import cv2
+        codecs = [self._codec] if self._codec else CODECS
+        for fourcc, ext, mimetype in codecs:
+            path = f"{path_base}{ext}"
+            writer = cv2.VideoWriter(path, cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+            if writer.isOpened():
+                self._codec = (fourcc, ext, mimetype)
+                return writer, path, ext
+            writer.release()
+            if os.path.exists(path):
+                os.remove(path)
+        raise RuntimeError('No usable video codec for clips')
+
+    def _cut(self, video_path, frame_number, max_dimension):
+        import cv2
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise RuntimeError('Could not open video file')
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        start, end = self.clip_range(fps, total_frames, frame_number)
+
+        os.makedirs(self.folder, exist_ok=True)
+        name = f"{self._prefix(video_path, frame_number)}{self._variant(video_path, max_dimension)}"
+        # VideoWriter picks the container from the extension, so the partial name keeps it
+        partial_base = os.path.join(self.folder, f".{name}.{threading.get_ident()}.partial")
+        writer = None
+        try:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            for _ in range(start, end + 1):
+                if self._stopping.is_set():
+                    raise RuntimeError('Clip cache is shutting down')
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frame = renditions.resize_to_fit(frame, max_dimension)
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    writer, partial_path, ext = self._open_writer(partial_base, fps, (width, height))
+                writer.write(frame)
+        except Exception:
+            if writer is not None:
+                writer.release()
+                writer = None
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+            raise
+        finally:
+            cap.release()
+            if writer is not None:
+                writer.release()
+
+        if writer is None:
+            raise RuntimeError(f'Could not read frames around frame {frame_number}')
+        path = os.path.join(self.folder, f"{name}{ext}")
+        os.replace(partial_path, path)
+        self._enforce_limit()
+        return path
+
+    def _enforce_limit(self):
+        """Delete least recently used clips until the folder fits in max_bytes"""
+        with self._lock:
+            clips = []
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') or not entry.name.endswith(CLIP_EXTENSIONS):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    clips.append((st.st_mtime_ns, st.st_size, entry.path))
+            total = sum(size for _, size, _ in clips)
+            for _, size, path in sorted(clips):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def invalidate(self, video_path, frame_numbers):
+        """Remove every cached clip around the given frames (all variants)"""
+        if not os.path.isdir(self.folder):
+            return 0
+        prefixes = tuple(self._prefix(video_path, n) for n in frame_numbers)
+        if not prefixes:
+            return 0
+        removed = 0
+        for name in os.listdir(self.folder):
+            if name.startswith(prefixes):
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def retain(self, video_path, frame_numbers):
+        """Remove clips of a video whose frame is no longer in frame_numbers"""
+        if not os.path.isdir(self.folder):
+            return 0
+        video_prefix = self._prefix(video_path, 0)[:-7]
+        keep = {int(n) for n in frame_numbers}
+        stale = set()
+        for name in os.listdir(self.folder):
+            if name.startswith(video_prefix):
+                frame = name[len(video_prefix):len(video_prefix) + 6]
+                if frame.isdigit() and int(frame) not in keep:
+                    stale.add(int(frame))
+        return self.invalidate(video_path, stale)
+
+    def schedule(self, video_path, frame_numbers):
+        """Cut missing clips (default settings) in a background thread"""
+        with self._lock:
+            if self._stopping.is_set():
+                return
+            for frame_number in sorted({int(n) for n in frame_numbers}):
+                job = (os.path.abspath(video_path), frame_number)
+                if job not in self._pending:
+                    self._pending.add(job)
+                    self._queue.put(job)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='clip-cache', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._queue.get(timeout=5)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._worker = None
+                        return
+                continue
+            video_path, frame_number = job
+            try:
+                if not self._stopping.is_set() and os.path.exists(video_path) and self.lookup(video_path, frame_number, self.max_dimension) is None:
+                    self._cut(video_path, frame_number, self.max_dimension)
+            except Exception as e:
+                if not self._stopping.is_set():
+                    print(f"Clip cache: could not cut clip for frame {frame_number} of {video_path}: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(job)
+                self._queue.task_done()
+
+    def wait(self):
+        """Block until all scheduled clips are cut"""
+        self._queue.join()
+
+    def shutdown(self, timeout=10.0):
+        """Drop pending clips and wait for the worker to release its capture and writer (registered with atexit)
+
+        OpenCV aborts the process if it exits while the worker still holds them.
+        """
+        self._stopping.set()
+        with self._lock:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._queue.task_done()
+            self._pending.clear()
+            worker = self._worker
+        if worker is not None and worker.is_alive() and worker is not threading.current_thread():
+            worker.join(timeout)
+
+    def mimetype(self, path):
+        for _, ext, mimetype in CODECS:
+            if path.endswith(ext):
+                return mimetype
+        return 'application/octet-stream'
@@ -0,0 +1,102 @@
+import os
+import threading
+
+PREVIEW_ROWS = 5
+
+
+def read_csv(csv_path):
+    """pandas.read_csv, importing pandas on first use so importing this module stays cheap"""
+    import pandas as pd
+    return pd.read_csv(csv_path)
+
+
+def detect_csv_format(columns):
+    """Return 'new' for Touch_Event/Foot_Plant_Event CSVs, 'old' for Body Part/Event Type ones"""
+    return 'new' if 'Touch_Event' in columns and 'Foot_Plant_Event' in columns else 'old'
+
+
+class CsvCatalog:
+    """In-memory catalog of the annotation CSVs in a folder.
+
+    Each entry keeps the file's mtime/size together with its row count, column
+    format and a small preview. Entries are refreshed lazily: a file is only
+    parsed again when its mtime or size changed since it was last seen, and the
+    directory listing is only re-read when the folder itself changed.
+    """
+
+    def __init__(self, folder, reader=read_csv):
+        self.folder = folder
+        self.reader = reader
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._names = set()
+        self._dir_mtime = None
+
+    def _scan_names(self):
+        try:
+            dir_mtime = os.stat(self.folder).st_mtime_ns
+        except FileNotFoundError:
+            self._names = set()
+            self._dir_mtime = None
+            return self._names
+
+        if dir_mtime != self._dir_mtime:
+            self._names = {
+                entry.name for entry in os.scandir(self.folder)
+                if entry.is_file() and entry.name.lower().endswith('.csv')
+            }
+            self._dir_mtime = dir_mtime
+            # Drop entries for files that disappeared
+            for name in list(self._entries):
+                if name not in self._names:
+                    del self._entries[name]
+        return self._names
+
+    def names(self):
+        """Set of CSV filenames currently in the folder"""
+        with self._lock:
+            return set(self._scan_names())
+
+    def has(self, csv_filename):
+        with self._lock:
+            return csv_filename in self._scan_names()
+
+    def get(self, csv_filename):
+        """Return the catalog entry for a CSV, re-parsing it only if it changed on disk"""
+        csv_path = os.path.join(self.folder, csv_filename)
+        try:
+            st = os.stat(csv_path)
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(csv_filename, None)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(csv_filename)
+            if entry and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+                return entry
+
+        df = self.reader(csv_path)
+        entry = {
+            'csv_filename': csv_filename,
+            'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size,
+            'row_count': len(df),
+            'columns': list(df.columns),
+            'format': detect_csv_format(df.columns),
+            'preview': df.head(PREVIEW_ROWS).to_dict('records')
+        }
+
+        with self._lock:
+            self._entries[csv_filename] = entry
+            self._names.add(csv_filename)
+        return entry
+
+    def invalidate(self, csv_filename=None):
+        """Forget a single entry (or everything) so the next lookup re-reads from disk"""
+        with self._lock:
+            if csv_filename is None:
+                self._entries.clear()
+                self._dir_mtime = None
+            else:
+                self._entries.pop(csv_filename, None)
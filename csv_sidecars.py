@@ -0,0 +1,167 @@
+"""Binary sidecars of CSVs: the parsed table, stored so the next read skips text parsing.
+
+A sidecar is Feather when pyarrow is installed, otherwise an uncompressed .npz
+holding the numeric columns as one 2-D block per dtype and each text column
+as one UTF-8 buffer plus a null mask, so nothing needs pickling. Sidecars live in a cache folder as
+{path digest}_{digest of the CSV's mtime, ctime and size}.{ext}: a CSV that
+changed gets a fresh sidecar on its next read and the stale one is removed.
+Writers call invalidate() as well, since a same-size rewrite within the
+filesystem's timestamp granularity keeps the same key. The CSV
+stays the interchange format; a table the sidecar cannot represent exactly
+(e.g. mixed-type columns) is simply read from the CSV every time.
+"""
+import hashlib
+import importlib.util
+import os
+import threading
+
+import numpy as np
+
+from csv_catalog import read_csv
+
+# Separates the values of a text column inside its buffer
+TEXT_SEPARATOR = '\x1f'
+
+
+def _digest(value):
+    return hashlib.blake2b(repr(value).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def feather_available():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def to_arrays(df):
+    """Arrays for np.savez that from_arrays turns back into `df`, or None if a column cannot be stored exactly
+
+    Numeric columns are stored as one 2-D block per dtype, since every array in
+    an .npz is a separate zip member and loading ~90 tracking columns one by one
+    costs more than the parse it replaces.
+    """
+    import pandas as pd
+    arrays = {'columns': np.array([str(c) for c in df.columns]), 'rows': np.array(len(df))}
+    if len(set(arrays['columns'])) != len(df.columns):
+        return None
+    blocks = {}
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        if series.dtype.kind in 'biuf':
+            blocks.setdefault(series.dtype.str, []).append(i)
+            continue
+        if series.dtype != object:
+            return None
+        mask = pd.isna(series).to_numpy()
+        values = series.to_numpy()[~mask]
+        if not all(type(v) is str and TEXT_SEPARATOR not in v for v in values):
+            return None
+        text = TEXT_SEPARATOR.join(np.where(mask, '', series.to_numpy()).tolist())
+        arrays[f"text_{i}"] = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+        arrays[f"mask_{i}"] = mask
+    for number, (dtype, positions) in enumerate(blocks.items()):
+        arrays[f"block_{number}"] = np.column_stack([df.iloc[:, i].to_numpy() for i in positions]).astype(dtype)
+        arrays[f"positions_{number}"] = np.array(positions)
+    return arrays
+
+
+def from_arrays(arrays):
+    import pandas as pd
+    columns = arrays['columns'].tolist()
+    rows = int(arrays['rows'])
+    data = {}
+    number = 0
+    while f"block_{number}" in arrays:
+        block = arrays[f"block_{number}"].reshape(rows, -1)
+        for j, i in enumerate(arrays[f"positions_{number}"].tolist()):
+            data[columns[i]] = block[:, j]
+        number += 1
+    for i, column in enumerate(columns):
+        if f"text_{i}" in arrays:
+            values = np.empty(rows, dtype=object)
+            if rows:
+                values[:] = bytes(arrays[f"text_{i}"]).decode('utf-8').split(TEXT_SEPARATOR)
+            values[arrays[f"mask_{i}"]] = np.nan
+            data[column] = values
+    return pd.DataFrame(data, columns=columns)
+
+
+class CsvSidecars:
+    """Reads CSVs through a binary copy kept in `folder`, refreshed whenever the CSV's mtime, ctime or size changes"""
+
+    def __init__(self, folder, reader=read_csv, use_feather=None):
+        self.folder = folder
+        self.reader = reader
+        self.use_feather = feather_available() if use_feather is None else use_feather
+        self.extension = '.feather' if self.use_feather else '.npz'
+        self._lock = threading.Lock()
+        self._file_locks = {}
+
+    def _path(self, csv_path):
+        st = os.stat(csv_path)
+        prefix = _digest(os.path.abspath(csv_path))
+        version = _digest((st.st_mtime_ns, st.st_ctime_ns, st.st_size))
+        return prefix, os.path.join(self.folder, f"{prefix}_{version}{self.extension}")
+
+    def _file_lock(self, prefix):
+        with self._lock:
+            return self._file_locks.setdefault(prefix, threading.Lock())
+
+    def _remove_sidecars(self, prefix, keep=None):
+        """Remove the complete sidecars of a CSV; another worker may be writing a .partial"""
+        if not os.path.isdir(self.folder):
+            return
+        for name in os.listdir(self.folder):
+            if name.startswith(f"{prefix}_") and name.endswith(self.extension) and name != keep:
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except FileNotFoundError:
+                    pass
+
+    def _load(self, path):
+        if self.use_feather:
+            import pandas as pd
+            return pd.read_feather(path)
+        with np.load(path) as npz:
+            return from_arrays({name: npz[name] for name in npz.files})
+
+    def _store(self, path, df):
+        """Write the sidecar; False if the table cannot be stored exactly"""
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+        if self.use_feather:
+            try:
+                df.to_feather(partial)
+            except (TypeError, ValueError):
+                return False
+        else:
+            arrays = to_arrays(df)
+            if arrays is None:
+                return False
+            with open(partial, 'wb') as f:
+                np.savez(f, **arrays)
+        os.replace(partial, path)
+        return True
+
+    def read(self, csv_path):
+        """(DataFrame, True if it came from the sidecar) for the CSV's current version"""
+        prefix, path = self._path(csv_path)
+        with self._file_lock(prefix):
+            if os.path.exists(path):
+                try:
+                    return self._load(path), True
+                except Exception as e:
+                    print(f"Unreadable CSV sidecar {path}, re-parsing the CSV: {e}")
+
+            df = self.reader(csv_path)
+            os.makedirs(self.folder, exist_ok=True)
+            # Sidecars of older versions only: another worker may be loading the one it saw
+            self._remove_sidecars(prefix, keep=os.path.basename(path))
+            try:
+                self._store(path, df)
+            except OSError as e:
+                print(f"Could not write CSV sidecar for {csv_path}: {e}")
+            return df, False
+
+    def invalidate(self, csv_path):
+        """Drop the CSV's sidecars after it was rewritten, so the next read parses the new contents"""
+        prefix = _digest(os.path.abspath(csv_path))
+        with self._file_lock(prefix):
+            self._remove_sidecars(prefix)
@@ -0,0 +1,186 @@
+"""Cross-process cache of encoded frames built on multiprocessing.shared_memory.
+
+All worker processes attach to the same named segment, so a frame decoded and
+encoded by one worker is served from memory by every other worker. The segment
+holds a small header, a fixed index table and fixed-size data slots:
+
+    header | index[slots] (key digest, length, state, tick) | data[slots][slot_size]
+
+Keys are hashed into a short probe window of the index; on insert the window's
+empty or least recently used slot is overwritten. Access is serialized with an
+flock() on a lock file next to the segment (plus a thread lock inside the
+process), so unrelated processes such as gunicorn workers can share it.
+Lookups copy the bytes under the shared lock; anything that writes the index,
+including the LRU tick a hit bumps, takes the exclusive lock.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: falls back to a per-process lock only
+    fcntl = None
+
+MAGIC = 0x544F5543484A5047  # "TOUCHJPG"
+HEADER_SIZE = 64
+PROBE_WINDOW = 8
+
+STATE_EMPTY = 0
+STATE_FULL = 1
+
+INDEX_DTYPE = np.dtype([
+    ('key', 'V16'),
+    ('length', '<u4'),
+    ('state', '<u4'),
+    ('tick', '<u8')
+])
+
+
+def key_digest(key):
+    """16-byte digest of a cache key tuple such as (video_key, frame_index, quality)"""
+    return hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).digest()
+
+
+class SharedFrameCache:
+    def __init__(self, name, slots=256, slot_size=256 * 1024):
+        self.name = name
+        self._thread_lock = threading.Lock()
+        self._lock_path = os.path.join(tempfile.gettempdir(), f'{name}.lock')
+        self._lock_file = open(self._lock_path, 'a+b')
+
+        with self._locked(exclusive=True):
+            try:
+                self._shm = shared_memory.SharedMemory(name=name)
+                created = False
+            except FileNotFoundError:
+                size = HEADER_SIZE + slots * INDEX_DTYPE.itemsize + slots * slot_size
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+                created = True
+
+            # The segment must outlive whichever worker happened to create it,
+            # so keep Python's resource tracker from unlinking it at exit.
+            try:
+                resource_tracker.unregister(self._shm._name, 'shared_memory')
+            except Exception:
+                pass
+
+            self._header = np.ndarray((4,), dtype='<u8', buffer=self._shm.buf, offset=0)
+            if created:
+                self._header[:] = (MAGIC, slots, slot_size, 0)
+            elif int(self._header[0]) != MAGIC:
+                self.close()
+                raise ValueError(f"Shared memory segment {name} is not a frame cache")
+
+            # Existing segments keep their own geometry
+            self.slots = int(self._header[1])
+            self.slot_size = int(self._header[2])
+            self._index = np.ndarray((self.slots,), dtype=INDEX_DTYPE,
+                                     buffer=self._shm.buf, offset=HEADER_SIZE)
+            self._data_offset = HEADER_SIZE + self.slots * INDEX_DTYPE.itemsize
+            if created:
+                self._index['state'] = STATE_EMPTY
+
+    @contextmanager
+    def _locked(self, exclusive):
+        with self._thread_lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _window(self, digest):
+        start = int.from_bytes(digest[:8], 'little') % self.slots
+        return [(start + i) % self.slots for i in range(min(PROBE_WINDOW, self.slots))]
+
+    def _next_tick(self):
+        self._header[3] += 1
+        return int(self._header[3])
+
+    def _find(self, digest, window):
+        for slot in window:
+            if self._index['state'][slot] == STATE_FULL and self._index['key'][slot].tobytes() == digest:
+                return slot
+        return None
+
+    def get(self, key):
+        """Return the cached bytes for `key`, or None"""
+        digest = key_digest(key)
+        window = self._window(digest)
+        with self._locked(exclusive=False):
+            slot = self._find(digest, window)
+            if slot is None:
+                return None
+            length = int(self._index['length'][slot])
+            start = self._data_offset + slot * self.slot_size
+            data = bytes(self._shm.buf[start:start + length])
+
+        # Readers share the lock, so the LRU tick is only bumped under the exclusive one
+        with self._locked(exclusive=True):
+            if self._index['state'][slot] == STATE_FULL and self._index['key'][slot].tobytes() == digest:
+                self._index['tick'][slot] = self._next_tick()
+        return data
+
+    def put(self, key, data):
+        """Store bytes under `key`; values larger than a slot are not cached"""
+        data = bytes(data)
+        if len(data) > self.slot_size:
+            return False
+
+        digest = key_digest(key)
+        window = self._window(digest)
+        with self._locked(exclusive=True):
+            slot = self._find(digest, window)
+            if slot is None:
+                empty = [s for s in window if self._index['state'][s] == STATE_EMPTY]
+                slot = empty[0] if empty else min(window, key=lambda s: int(self._index['tick'][s]))
+
+            # Invalidate the slot while its bytes are rewritten
+            self._index['state'][slot] = STATE_EMPTY
+            start = self._data_offset + slot * self.slot_size
+            self._shm.buf[start:start + len(data)] = data
+            self._index['key'][slot] = np.void(digest)
+            self._index['length'][slot] = len(data)
+            self._index['tick'][slot] = self._next_tick()
+            self._index['state'][slot] = STATE_FULL
+        return True
+
+    def clear(self):
+        with self._locked(exclusive=True):
+            self._index['state'] = STATE_EMPTY
+
+    def stats(self):
+        with self._locked(exclusive=False):
+            full = self._index['state'] == STATE_FULL
+            return {
+                'name': self.name,
+                'slots': self.slots,
+                'slot_size': self.slot_size,
+                'used_slots': int(full.sum()),
+                'used_bytes': int(self._index['length'][full].sum())
+            }
+
+    def close(self):
+        """Detach this process; the segment stays available to other workers"""
+        self._header = None
+        self._index = None
+        self._shm.close()
+        self._lock_file.close()
+
+    def unlink(self):
+        """Remove the segment and its lock file for every process (call once on shutdown)"""
+        # Balance the unregister() from __init__ before SharedMemory.unlink() unregisters again
+        resource_tracker.register(self._shm._name, 'shared_memory')
+        self._shm.unlink()
+        try:
+            os.remove(self._lock_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,340 @@
+"""Background ingest of new videos.
+
+Every video that lands in data/ (or is uploaded) goes through a few stages on a
+small thread pool, so the first person to open it does not pay for them:
+
+- probe:       fps, frame count, size and duration
+- frame_count: one grab() pass over the video for the exact frame count
+               (containers often only estimate it)
+- thumbnails:  a strip of evenly spaced thumbnails in a single JPEG
+- csv:         validation of the paired annotation CSV against the video
+
+Results are written to one folder per video (keyed by path, mtime and size), so
+they survive restarts and are shared by every worker process. The pool is
+shut down with the app; a job stopped midway is simply ingested again later.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from csv_catalog import detect_csv_format, read_csv
+
+STAGES = ('probe', 'frame_count', 'thumbnails', 'csv')
+THUMBNAIL_COUNT = 40
+THUMBNAIL_WIDTH = 160
+
+
+class IngestStopped(Exception):
+    """Raised inside a stage when the pipeline is shutting down"""
+
+
+def probe_video(video_path):
+    """Container metadata in the shape the app's video_info uses, or None if the file cannot be opened"""
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    metadata = {
+        'fps': fps,
+        'total_frames': total_frames,
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'duration': total_frames / fps if fps > 0 else 0
+    }
+    cap.release()
+    return metadata
+
+
+def validate_annotation_csv(df, total_frames, fps):
+    """Errors and warnings for an annotation CSV checked against its video"""
+    import pandas as pd
+    errors = []
+    warnings = []
+    fmt = detect_csv_format(df.columns)
+    required = ['Frame Number', 'Time (seconds)'] + (['Touch_Event', 'Foot_Plant_Event'] if fmt == 'new' else ['Body Part'])
+    missing = [column for column in required if column not in df.columns]
+    if missing:
+        errors.append(f"Missing columns: {', '.join(missing)}")
+    if 'Frame Number' in df.columns and len(df):
+        frames = pd.to_numeric(df['Frame Number'], errors='coerce')
+        if frames.isna().any():
+            errors.append(f"{int(frames.isna().sum())} row(s) with a non-numeric frame number")
+        out_of_range = frames[(frames < 1) | (frames > total_frames)]
+        if len(out_of_range):
+            errors.append(f"{len(out_of_range)} frame number(s) outside 1..{total_frames}")
+        duplicates = frames[frames.duplicated()].dropna()
+        if len(duplicates):
+            warnings.append(f"{len(duplicates)} duplicate frame number(s)")
+        if 'Time (seconds)' in df.columns and fps > 0:
+            times = pd.to_numeric(df['Time (seconds)'], errors='coerce')
+            drift = (times - (frames - 1) / fps).abs()
+            off = int((drift > 1.5 / fps).sum())
+            if off:
+                warnings.append(f"{off} row(s) whose time does not match the frame number at {fps:g} fps")
+    return {'rows': len(df), 'format': fmt, 'errors': errors, 'warnings': warnings}
+
+
+class IngestPipeline:
+    def __init__(self, cache_folder, csv_folder, reader=read_csv, max_workers=2,
+                 thumbnail_count=THUMBNAIL_COUNT, thumbnail_width=THUMBNAIL_WIDTH):
+        self.cache_folder = cache_folder
+        self.csv_folder = csv_folder
+        self.reader = reader
+        self.max_workers = max_workers
+        self.thumbnail_count = thumbnail_count
+        self.thumbnail_width = thumbnail_width
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._executor = None
+        self._stopping = threading.Event()
+
+    @staticmethod
+    def video_key(video_path):
+        st = os.stat(video_path)
+        return [os.path.abspath(video_path), st.st_mtime_ns, st.st_size]
+
+    def _dir(self, video_key):
+        digest = hashlib.blake2b(repr(video_key).encode('utf-8'), digest_size=12).hexdigest()
+        return os.path.join(self.cache_folder, digest)
+
+    def _load(self, video_key, name):
+        try:
+            with open(os.path.join(self._dir(video_key), name)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _save(self, video_key, name, value):
+        folder = self._dir(video_key)
+        os.makedirs(folder, exist_ok=True)
+        tmp_path = os.path.join(folder, f".{name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(value, f)
+        os.replace(tmp_path, os.path.join(folder, name))
+
+    def metadata(self, video_path):
+        """Ingested metadata for the current version of a video, or None if it was not probed yet"""
+        try:
+            return self._load(self.video_key(video_path), 'metadata.json')
+        except FileNotFoundError:
+            return None
+
+    def thumbnails(self, video_path):
+        """(strip path, layout) once the thumbnail stage finished, else None"""
+        video_key = self.video_key(video_path)
+        layout = self._load(video_key, 'thumbnails.json')
+        if layout is None:
+            return None
+        return os.path.join(self._dir(video_key), 'thumbnails.jpg'), layout
+
+    def submit(self, video_path):
+        """Queue a video unless it is already queued, running or ingested; returns its status"""
+        video_path = os.path.abspath(video_path)
+        video_key = self.video_key(video_path)
+        with self._lock:
+            job = self._jobs.get(video_path)
+            if job and job['video_key'] == video_key and job['state'] in ('queued', 'running', 'done'):
+                return self._public(job)
+            stored = self._load(video_key, 'status.json')
+            if stored and stored['state'] == 'done':
+                return stored
+            job = {
+                'video': os.path.basename(video_path),
+                'video_key': video_key,
+                'state': 'queued',
+                'stage': None,
+                'stages': {stage: 'pending' for stage in STAGES},
+                'progress': 0.0,
+                'error': None,
+                'updated': time.time()
+            }
+            self._jobs[video_path] = job
+            if self._stopping.is_set():
+                return self._public(job)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ingest')
+            self._executor.submit(self._run, video_path, job)
+            return self._public(job)
+
+    def scan(self, data_folder, extensions):
+        """Queue every video in data_folder that has not been ingested in its current version"""
+        queued = 0
+        for filename in os.listdir(data_folder):
+            if filename.startswith('.') or filename.rsplit('.', 1)[-1].lower() not in extensions:
+                continue
+            path = os.path.join(data_folder, filename)
+            # Failed ingests are only retried on request, not on every scan
+            if self.status(path)['state'] == 'new':
+                self.submit(path)
+                queued += 1
+        return queued
+
+    def status(self, video_path):
+        """Progress of a video's ingest; the CSV check is refreshed if the CSV changed since"""
+        video_path = os.path.abspath(video_path)
+        video_key = self.video_key(video_path)
+        with self._lock:
+            job = self._jobs.get(video_path)
+            if job and job['video_key'] == video_key:
+                status = self._public(job)
+            else:
+                status = self._load(video_key, 'status.json') or {
+                    'video': os.path.basename(video_path), 'state': 'new', 'stage': None,
+                    'stages': {stage: 'pending' for stage in STAGES}, 'progress': 0.0, 'error': None
+                }
+        if status['state'] == 'done':
+            status['csv'] = self._csv_report(video_path, video_key)
+        return status
+
+    def jobs(self):
+        with self._lock:
+            return [self._public(job) for job in self._jobs.values()]
+
+    def _public(self, job):
+        return {key: value for key, value in job.items() if key != 'video_key'}
+
+    def _update(self, job, **changes):
+        with self._lock:
+            job.update(changes)
+            job['updated'] = time.time()
+
+    def _run(self, video_path, job):
+        video_key = job['video_key']
+        self._update(job, state='running')
+        try:
+            for i, stage in enumerate(STAGES):
+                self._update(job, stage=stage, stages={**job['stages'], stage: 'running'})
+                getattr(self, f"_stage_{stage}")(video_path, video_key, job, i)
+                self._update(job, stages={**job['stages'], stage: 'done'}, progress=(i + 1) / len(STAGES))
+            self._update(job, state='done', stage=None)
+        except IngestStopped:
+            # Nothing is saved, so the next scan queues the video again
+            return
+        except Exception as e:
+            self._update(job, state='error', error=str(e),
+                         stages={**job['stages'], job['stage']: 'error'})
+            print(f"Ingest failed for {video_path}: {e}")
+        self._save(video_key, 'status.json', self._public(job))
+
+    def _stage_probe(self, video_path, video_key, job, index):
+        metadata = probe_video(video_path)
+        if metadata is None:
+            raise RuntimeError('Could not open video file')
+        self._save(video_key, 'metadata.json', metadata)
+
+    def _stage_frame_count(self, video_path, video_key, job, index):
+        import cv2
+        metadata = self._load(video_key, 'metadata.json')
+        cap = cv2.VideoCapture(video_path)
+        count = 0
+        estimate = max(1, metadata['total_frames'])
+        try:
+            while cap.grab():
+                count += 1
+                if count % 250 == 0:
+                    if self._stopping.is_set():
+                        raise IngestStopped()
+                    self._update(job, progress=(index + min(1.0, count / estimate)) / len(STAGES))
+        finally:
+            cap.release()
+
+        # The decoded count is exact; the container's FRAME_COUNT is only an estimate
+        if count and count != metadata['total_frames']:
+            metadata['total_frames'] = count
+            metadata['duration'] = count / metadata['fps'] if metadata['fps'] > 0 else 0
+        metadata['frame_count_exact'] = bool(count)
+        self._save(video_key, 'metadata.json', metadata)
+
+    def _stage_thumbnails(self, video_path, video_key, job, index):
+        import cv2
+        metadata = self._load(video_key, 'metadata.json')
+        total_frames = metadata['total_frames']
+        count = max(1, min(self.thumbnail_count, total_frames))
+        positions = np.linspace(0, total_frames - 1, count).round().astype(int).tolist()
+
+        cap = cv2.VideoCapture(video_path)
+        tiles = []
+        frames = []
+        try:
+            for position in positions:
+                if self._stopping.is_set():
+                    raise IngestStopped()
+                cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+                ret, frame = cap.read()
+                if not ret:
+                    continue
+                height = max(1, round(frame.shape[0] * self.thumbnail_width / frame.shape[1]))
+                tiles.append(cv2.resize(frame, (self.thumbnail_width, height), interpolation=cv2.INTER_AREA))
+                frames.append(position + 1)
+        finally:
+            cap.release()
+        if not tiles:
+            raise RuntimeError('Could not read any frame for thumbnails')
+
+        ok, buffer = cv2.imencode('.jpg', np.hstack(tiles), [cv2.IMWRITE_JPEG_QUALITY, 70])
+        if not ok:
+            raise RuntimeError('Could not encode thumbnail strip')
+        folder = self._dir(video_key)
+        tmp_path = os.path.join(folder, f".thumbnails.{threading.get_ident()}.jpg")
+        with open(tmp_path, 'wb') as f:
+            f.write(buffer.tobytes())
+        os.replace(tmp_path, os.path.join(folder, 'thumbnails.jpg'))
+        self._save(video_key, 'thumbnails.json', {
+            'tile_width': self.thumbnail_width,
+            'tile_height': tiles[0].shape[0],
+            'frame_numbers': frames
+        })
+
+    def _stage_csv(self, video_path, video_key, job, index):
+        self._csv_report(video_path, video_key)
+
+    def _csv_report(self, video_path, video_key):
+        """Validation of the paired CSV, cached until the CSV's mtime or size changes"""
+        csv_filename = f"{os.path.splitext(os.path.basename(video_path))[0]}.csv"
+        csv_path = os.path.join(self.csv_folder, csv_filename)
+        if not os.path.exists(csv_path):
+            return {'csv_filename': None}
+        st = os.stat(csv_path)
+        report = self._load(video_key, 'csv.json')
+        if report and report.get('csv_key') == [csv_filename, st.st_mtime_ns, st.st_size]:
+            return report
+
+        metadata = self._load(video_key, 'metadata.json')
+        try:
+            report = validate_annotation_csv(self.reader(csv_path), metadata['total_frames'], metadata['fps'])
+        except Exception as e:
+            report = {'rows': 0, 'format': None, 'errors': [f'Could not read CSV: {e}'], 'warnings': []}
+        report['csv_filename'] = csv_filename
+        report['csv_key'] = [csv_filename, st.st_mtime_ns, st.st_size]
+        self._save(video_key, 'csv.json', report)
+        return report
+
+    def wait(self, timeout=60):
+        """Block until no job is queued or running (used by tests and benchmarks)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not any(job['state'] in ('queued', 'running') for job in self._jobs.values()):
+                    return True
+            time.sleep(0.05)
+        return False
+
+    def shutdown(self):
+        """Drop queued jobs and wait for running ones to release their captures (registered with atexit)
+
+        Running stages check for shutdown between frames, so this returns
+        quickly; their videos are left un-ingested and queued again later.
+        """
+        self._stopping.set()
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,149 @@
+"""Minimal in-process metrics (counters and histograms) rendered in Prometheus text format"""
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple((name, labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple((name, labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['counts']):
+                    cumulative += count
+                    labels = key + (('le', _format_value(bound)),)
+                    lines.append(f'{self.name}_bucket{_format_labels(labels)} {cumulative}')
+                lines.append(f'{self.name}_sum{_format_labels(key)} {_format_value(series["sum"])}')
+                lines.append(f'{self.name}_count{_format_labels(key)} {series["count"]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    'touch_request_duration_seconds', 'Request latency per route until the response is returned',
+    ('route', 'method', 'status'))
+EXTRACTION_PHASE = registry.histogram(
+    'touch_extraction_phase_seconds', 'Time spent per phase while extracting frames',
+    ('mode', 'phase'))
+EXTRACTED_FRAMES = registry.counter(
+    'touch_extracted_frames_total', 'Frames decoded and written by the extraction routes', ('mode',))
+VIDEO_BYTES_SERVED = registry.counter(
+    'touch_video_bytes_served_total', 'Bytes streamed by /api/video')
+FRAME_CACHE_REQUESTS = registry.counter(
+    'touch_frame_cache_requests_total', 'Shared frame cache lookups', ('result',))
+READ_AHEAD_REQUESTS = registry.counter(
+    'touch_read_ahead_requests_total', '/get_frame lookups in the per-session read-ahead cache', ('result',))
+CSV_IO = registry.histogram(
+    'touch_csv_io_seconds', 'Annotation CSV read/write durations', ('op',))
+
+
+def record_phase(mode, phase, seconds):
+    """Observe a phase duration and, inside a request, add it to the per-request breakdown"""
+    EXTRACTION_PHASE.observe(seconds, mode=mode, phase=phase)
+    if has_request_context():
+        phases = g.setdefault('phase_seconds', {})
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def phase(mode, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(mode, name, time.perf_counter() - start)
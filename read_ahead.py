@@ -0,0 +1,237 @@
+"""Background read-ahead for the annotator's frame stepping.
+
+Each annotator session gets a worker thread that watches the frames it asks
+for. Once recent requests show a steady direction and step (forward, backward,
+every Nth frame), the worker keeps its own capture open and decodes and encodes
+the frames the user is about to ask for into a small per-session cache. The
+look-ahead depth follows the request rate (about one second ahead). A jump
+larger than `max_step` counts as a seek away: queued work is dropped and the
+worker waits for a new pattern.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+import renditions
+
+HISTORY = 4
+# Forward gaps up to this size are skipped with grab() instead of a seek
+GRAB_LIMIT = 30
+
+
+class _SessionState:
+    def __init__(self):
+        self.history = deque(maxlen=HISTORY)
+        self.frames = OrderedDict()
+        self.video_path = None
+        self.video_key = None
+        self.total_frames = 0
+        self.rendition = None
+        self.plan = []
+        self.generation = 0
+        self.last_seen = time.monotonic()
+        self.worker = None
+        self.wake = threading.Event()
+        self.stopped = False
+
+
+class ReadAhead:
+    def __init__(self, min_depth=4, max_depth=48, lookahead_seconds=1.0, cache_frames=96,
+                 max_step=10, max_sessions=16, idle_seconds=60):
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.lookahead_seconds = lookahead_seconds
+        self.cache_frames = cache_frames
+        self.max_step = max_step
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id, video_key, frame_idx, rendition):
+        """Encoded bytes of a frame the worker already prepared for this session, or None"""
+        key = (frame_idx, renditions.rendition_key(rendition))
+        with self._lock:
+            state = self._sessions.get(session_id)
+            data = None
+            if state is not None and state.video_key == video_key:
+                data = state.frames.get(key)
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return data
+
+    def note(self, session_id, video_path, video_key, frame_idx, rendition, total_frames):
+        """Record a /get_frame request and (re)plan the worker's look-ahead"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = _SessionState()
+                self._sessions[session_id] = state
+                while len(self._sessions) > self.max_sessions:
+                    _, evicted = self._sessions.popitem(last=False)
+                    self._stop(evicted)
+            self._sessions.move_to_end(session_id)
+
+            if state.video_key != video_key or state.rendition != rendition:
+                state.frames.clear()
+                state.history.clear()
+            state.video_path = video_path
+            state.video_key = video_key
+            state.total_frames = total_frames
+            state.rendition = rendition
+            state.last_seen = now
+
+            if state.history and abs(frame_idx - state.history[-1][1]) > self.max_step:
+                # Seek away: the pattern (and anything queued for it) no longer applies
+                state.history.clear()
+            state.history.append((now, frame_idx))
+
+            plan = self._plan(state, frame_idx)
+            if plan != state.plan:
+                state.plan = plan
+                state.generation += 1
+            if plan:
+                if state.worker is None or not state.worker.is_alive():
+                    state.stopped = False
+                    state.worker = threading.Thread(target=self._run, args=(state,),
+                                                    name='read-ahead', daemon=True)
+                    state.worker.start()
+                state.wake.set()
+
+    def _plan(self, state, frame_idx):
+        """Frames to prepare next, nearest first, or [] if there is no steady pattern yet"""
+        if len(state.history) < 2:
+            return []
+        steps = [b[1] - a[1] for a, b in zip(state.history, list(state.history)[1:])]
+        step = steps[-1]
+        if step == 0 or any(s != step for s in steps):
+            return []
+
+        elapsed = state.history[-1][0] - state.history[0][0]
+        rate = (len(state.history) - 1) / elapsed if elapsed > 0 else self.max_depth
+        depth = max(self.min_depth, min(self.max_depth, math.ceil(rate * self.lookahead_seconds)))
+        depth = min(depth, self.cache_frames // 2)
+
+        plan = []
+        for i in range(1, depth + 1):
+            target = frame_idx + step * i
+            if not 0 <= target < state.total_frames:
+                break
+            plan.append(target)
+        return plan
+
+    def _run(self, state):
+        import cv2
+        cap = None
+        cap_path = None
+        position = None
+        try:
+            while True:
+                if not state.wake.wait(timeout=1.0):
+                    with self._lock:
+                        if state.stopped or time.monotonic() - state.last_seen > self.idle_seconds:
+                            state.worker = None
+                            return
+                    continue
+                state.wake.clear()
+
+                with self._lock:
+                    if state.stopped:
+                        state.worker = None
+                        return
+                    generation = state.generation
+                    plan = list(state.plan)
+                    video_path = state.video_path
+                    rendition = state.rendition
+                    rendition_key = renditions.rendition_key(rendition)
+
+                if cap_path != video_path:
+                    if cap is not None:
+                        cap.release()
+                    cap = cv2.VideoCapture(video_path)
+                    cap_path = video_path
+                    position = None
+
+                # Decode in file order so backward stepping also reads sequentially instead of seeking per frame
+                for target in sorted(plan):
+                    with self._lock:
+                        if state.generation != generation or state.stopped:
+                            break
+                        if (target, rendition_key) in state.frames:
+                            continue
+                    if position is None or not 0 <= target - position <= GRAB_LIMIT:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                        position = target
+                    while position < target:
+                        cap.grab()
+                        position += 1
+                    ret, frame = cap.read()
+                    if not ret:
+                        position = None
+                        break
+                    position = target + 1
+                    data = renditions.encode(frame, rendition)
+                    with self._lock:
+                        if state.generation != generation:
+                            break
+                        state.frames[(target, rendition_key)] = data
+                        state.frames.move_to_end((target, rendition_key))
+                        while len(state.frames) > self.cache_frames:
+                            state.frames.popitem(last=False)
+        finally:
+            if cap is not None:
+                cap.release()
+
+    def _stop(self, state):
+        state.stopped = True
+        state.generation += 1
+        state.frames.clear()
+        state.wake.set()
+
+    def stop(self, session_id):
+        """Stop the session's worker and drop its frames (new video, cleared session)"""
+        with self._lock:
+            state = self._sessions.pop(session_id, None)
+            if state is not None:
+                self._stop(state)
+
+    def shutdown(self, timeout=2.0):
+        """Stop every worker and wait for it to release its capture (registered with atexit)"""
+        with self._lock:
+            states = list(self._sessions.values())
+            self._sessions.clear()
+            for state in states:
+                self._stop(state)
+        for state in states:
+            worker = state.worker
+            if worker is not None and worker.is_alive():
+                worker.join(timeout)
+
+    def wait_idle(self, session_id, timeout=5.0):
+        """Block until the worker has prepared everything planned (used by tests and benchmarks)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                state = self._sessions.get(session_id)
+                if state is None or not state.plan:
+                    return True
+                rendition_key = renditions.rendition_key(state.rendition)
+                if all((target, rendition_key) in state.frames for target in state.plan):
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'frames': sum(len(state.frames) for state in self._sessions.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
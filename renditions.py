@@ -0,0 +1,112 @@
+"""Frame rendition settings (image format, quality, max dimension) and encoding"""
+
+FORMATS = {
+    'jpeg': {'extension': '.jpg', 'mimetype': 'image/jpeg'},
+    'webp': {'extension': '.webp', 'mimetype': 'image/webp'},
+    'png': {'extension': '.png', 'mimetype': 'image/png'}
+}
+FORMAT_ALIASES = {'jpg': 'jpeg'}
+FRAME_EXTENSIONS = tuple(spec['extension'] for spec in FORMATS.values())
+
+# Defaults match what the app always produced: full-size JPEGs on disk,
+# low-quality thumbnails inline, and quality 85 for the annotator's frames
+DEFAULT_FULL = {'format': 'jpeg', 'quality': 90, 'max_dimension': None}
+DEFAULT_THUMBNAIL = {'format': 'jpeg', 'quality': 50, 'max_dimension': None}
+DEFAULT_FRAME = {'format': 'jpeg', 'quality': 85, 'max_dimension': None}
+
+
+def parse_rendition(spec, default):
+    """Merge a client-supplied rendition dict over `default`, raising ValueError if invalid"""
+    rendition = dict(default)
+    if not spec:
+        return rendition
+    if not isinstance(spec, dict):
+        raise ValueError('Rendition must be an object with format, quality and max_dimension')
+
+    if spec.get('format') is not None:
+        fmt = str(spec['format']).lower()
+        fmt = FORMAT_ALIASES.get(fmt, fmt)
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format '{spec['format']}'. Allowed: {', '.join(FORMATS)}")
+        rendition['format'] = fmt
+
+    if spec.get('quality') is not None:
+        quality = int(spec['quality'])
+        if not 1 <= quality <= 100:
+            raise ValueError('Quality must be between 1 and 100')
+        rendition['quality'] = quality
+
+    if 'max_dimension' in spec:
+        max_dimension = spec['max_dimension']
+        if max_dimension in (None, '', 0, '0'):
+            rendition['max_dimension'] = None
+        else:
+            max_dimension = int(max_dimension)
+            if max_dimension < 16:
+                raise ValueError('max_dimension must be at least 16 pixels')
+            rendition['max_dimension'] = max_dimension
+
+    return rendition
+
+
+def rendition_key(rendition):
+    """Hashable identity of a rendition, used in frame cache keys"""
+    key = (rendition['format'], rendition['quality'], rendition['max_dimension'])
+    if rendition.get('crop') is not None:
+        key += (tuple(rendition['crop']),)
+    return key
+
+
+def cropped(rendition, crop):
+    """The rendition restricted to an (x, y, width, height) region of the frame; None keeps the full frame"""
+    if crop is None:
+        return rendition
+    return {**rendition, 'crop': tuple(int(v) for v in crop)}
+
+
+def extension(rendition):
+    return FORMATS[rendition['format']]['extension']
+
+
+def mimetype(rendition):
+    return FORMATS[rendition['format']]['mimetype']
+
+
+def fitted_shape(shape, max_dimension):
+    """(height, width) that resize_to_fit gives a frame of `shape`"""
+    height, width = shape[:2]
+    longest = max(height, width)
+    if not max_dimension or longest <= max_dimension:
+        return height, width
+    scale = max_dimension / longest
+    return max(1, round(height * scale)), max(1, round(width * scale))
+
+
+def resize_to_fit(frame, max_dimension):
+    """Downscale so the longest side is at most max_dimension (INTER_AREA); never upscales"""
+    import cv2
+    height, width = fitted_shape(frame.shape, max_dimension)
+    if (height, width) == frame.shape[:2]:
+        return frame
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def encode(frame, rendition):
+    """Encode a BGR frame according to a rendition (cropped first, then downscaled) and return the bytes"""
+    import cv2
+    if rendition.get('crop') is not None:
+        x, y, width, height = rendition['crop']
+        frame = frame[y:y + height, x:x + width]
+    image = resize_to_fit(frame, rendition['max_dimension'])
+    fmt = rendition['format']
+    if fmt == 'jpeg':
+        params = [cv2.IMWRITE_JPEG_QUALITY, rendition['quality']]
+    elif fmt == 'webp':
+        params = [cv2.IMWRITE_WEBP_QUALITY, rendition['quality']]
+    else:
+        # PNG is lossless; map quality onto zlib effort (higher quality -> faster, larger)
+        params = [cv2.IMWRITE_PNG_COMPRESSION, max(0, min(9, (100 - rendition['quality']) // 10))]
+    ok, buffer = cv2.imencode(FORMATS[fmt]['extension'], image, params)
+    if not ok:
+        raise RuntimeError(f"Could not encode frame as {fmt}")
+    return buffer.tobytes()
@@ -0,0 +1,201 @@
+"""Pinned segments: frames A..B of a video decoded once into a raw uint8 memmap.
+
+While an annotator works through one drill segment frame by frame, frames in a
+pinned range are served by slicing the memmap (frames x H x W x 3, BGR) and
+encoding, with no decoding at all. The files are plain .npy arrays, so the OS
+page cache decides what stays in memory and every worker process can map the
+same pin. Like the clip cache, the file name is the index: it encodes the video,
+the frame range, the video's version and the size (`full` or the max_dimension
+the frames were downscaled to), so pins of one range at different sizes are
+separate files. Callers that need source-size frames pass the source shape and
+never get a downscaled pin.
+"""
+import hashlib
+import os
+import re
+import threading
+
+import numpy as np
+
+import renditions
+
+PIN_NAME = re.compile(r'^([0-9a-f]{16})_(\d{6})_(\d{6})_([0-9a-f]{16})_(full|\d+)\.npy$')
+
+
+def _digest(value):
+    return hashlib.blake2b(repr(value).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class SegmentPins:
+    def __init__(self, folder, max_bytes=2 * 1024 ** 3, max_frames=3000):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_frames = max_frames
+        self._lock = threading.Lock()
+        self._listing_mtime = None
+        self._listing = []
+        self._maps = {}
+
+    def _names(self, video_key):
+        path, mtime_ns, size = video_key
+        return _digest(path), _digest((mtime_ns, size))
+
+    def _scan(self):
+        """Parsed pin file names, re-listed only when the folder changes"""
+        try:
+            mtime = os.stat(self.folder).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            if mtime != self._listing_mtime:
+                listing = []
+                for name in os.listdir(self.folder):
+                    match = PIN_NAME.match(name)
+                    if match:
+                        video, start, end, variant, _ = match.groups()
+                        listing.append((video, int(start), int(end), variant, name))
+                self._listing = listing
+                self._listing_mtime = mtime
+                # Forget maps of pins that were removed
+                for name in list(self._maps):
+                    if not any(entry[4] == name for entry in listing):
+                        del self._maps[name]
+            return self._listing
+
+    def _open(self, name):
+        with self._lock:
+            array = self._maps.get(name)
+            if array is None:
+                array = np.load(os.path.join(self.folder, name), mmap_mode='r')
+                self._maps[name] = array
+            return array
+
+    def _pins(self, video_key, start_idx, end_idx, shape):
+        """(start, memmap) of the pins covering start_idx..end_idx, only those of frame `shape` (height, width) if given"""
+        video, variant = self._names(video_key)
+        for pin_video, start, end, pin_variant, name in self._scan():
+            if pin_video == video and pin_variant == variant and start <= start_idx and end_idx <= end:
+                try:
+                    array = self._open(name)
+                except (FileNotFoundError, ValueError):
+                    continue
+                if shape is None or tuple(array.shape[1:3]) == tuple(shape):
+                    yield start, array
+
+    def frame(self, video_key, frame_idx, shape=None):
+        """The BGR frame for a 0-based index if it is inside a pinned segment (of frame `shape`, if given), else None"""
+        for start, array in self._pins(video_key, frame_idx, frame_idx, shape):
+            return array[frame_idx - start]
+        return None
+
+    def covers(self, video_key, start_idx, end_idx, shape=None):
+        return any(True for _ in self._pins(video_key, start_idx, end_idx, shape))
+
+    def pin(self, video_path, video_key, start_idx, end_idx, max_dimension=None):
+        """Decode 0-based frames start_idx..end_idx once (one seek, sequential reads) into a memmap"""
+        import cv2
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise RuntimeError('Could not open video file')
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        start_idx = max(0, int(start_idx))
+        end_idx = min(total_frames - 1, int(end_idx))
+        if end_idx < start_idx:
+            cap.release()
+            raise ValueError('Segment is empty')
+        count = end_idx - start_idx + 1
+        if count > self.max_frames:
+            cap.release()
+            raise ValueError(f'Segments are limited to {self.max_frames} frames')
+
+        video, variant = self._names(video_key)
+        name = f"{video}_{start_idx:06d}_{end_idx:06d}_{variant}_{max_dimension or 'full'}.npy"
+        path = os.path.join(self.folder, name)
+        if os.path.exists(path):
+            cap.release()
+            return self._describe(name)
+
+        os.makedirs(self.folder, exist_ok=True)
+        partial_path = os.path.join(self.folder, f".{name}.{threading.get_ident()}.partial")
+        array = None
+        try:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_idx)
+            for i in range(count):
+                ret, frame = cap.read()
+                if not ret:
+                    raise RuntimeError(f'Could not read frame {start_idx + i}')
+                frame = renditions.resize_to_fit(frame, max_dimension)
+                if array is None:
+                    segment_bytes = count * frame.nbytes
+                    if segment_bytes > self.max_bytes:
+                        raise ValueError(f'Segment needs {segment_bytes // 2 ** 20} MB, over the '
+                                         f'{self.max_bytes // 2 ** 20} MB limit; pin fewer frames or downscale')
+                    self._make_room(segment_bytes)
+                    array = np.lib.format.open_memmap(partial_path, mode='w+', dtype=np.uint8,
+                                                      shape=(count,) + frame.shape)
+                array[i] = frame
+            array.flush()
+            del array
+            os.replace(partial_path, path)
+        except Exception:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        finally:
+            cap.release()
+        return self._describe(name)
+
+    def _describe(self, name):
+        match = PIN_NAME.match(name)
+        array = self._open(name)
+        return {
+            'start_frame': int(match.group(2)),
+            'end_frame': int(match.group(3)),
+            'frames': int(array.shape[0]),
+            'width': int(array.shape[2]),
+            'height': int(array.shape[1]),
+            'max_dimension': None if match.group(5) == 'full' else int(match.group(5)),
+            'size_mb': round(os.path.getsize(os.path.join(self.folder, name)) / 2 ** 20, 1)
+        }
+
+    def _make_room(self, needed):
+        """Unpin the oldest segments until `needed` more bytes fit under max_bytes"""
+        pins = []
+        for entry in self._scan():
+            try:
+                st = os.stat(os.path.join(self.folder, entry[4]))
+            except FileNotFoundError:
+                continue
+            pins.append((st.st_mtime_ns, st.st_size, entry[4]))
+        total = sum(size for _, size, _ in pins)
+        for _, size, name in sorted(pins):
+            if total + needed <= self.max_bytes:
+                break
+            self._remove(name)
+            total -= size
+
+    def _remove(self, name):
+        with self._lock:
+            self._maps.pop(name, None)
+        try:
+            os.remove(os.path.join(self.folder, name))
+        except FileNotFoundError:
+            pass
+
+    def segments(self, video_key):
+        video, variant = self._names(video_key)
+        return [self._describe(name) for pin_video, _, _, pin_variant, name in sorted(self._scan())
+                if pin_video == video and pin_variant == variant]
+
+    def unpin(self, video_key, start_idx=None, end_idx=None):
+        """Remove pins of a video, or only those overlapping start_idx..end_idx; returns how many"""
+        video, variant = self._names(video_key)
+        removed = 0
+        for pin_video, start, end, pin_variant, name in list(self._scan()):
+            if pin_video != video:
+                continue
+            if start_idx is not None and (end < start_idx or (end_idx is not None and start > end_idx)):
+                continue
+            self._remove(name)
+            removed += 1
+        return removed
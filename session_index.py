@@ -0,0 +1,164 @@
+"""Indexed SQLite catalog of the sessions in reviewed_extracted_frames/.
+
+Each session directory's metadata.json stays the source of truth. A session is
+parsed once and re-read only when its metadata.json changes (mtime or size), so
+listing and filtering past sessions by video, date and frame count is a single
+indexed query instead of opening every JSON file.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, time as dt_time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    video_filename TEXT,
+    extraction_timestamp TEXT,
+    saved_timestamp TEXT,
+    saved_at REAL,
+    total_frames INTEGER,
+    mode TEXT,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    summary_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_video_saved ON sessions (video_filename, saved_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_saved ON sessions (saved_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_frames ON sessions (total_frames);
+"""
+
+SUMMARY_KEYS = ('session_id', 'video_filename', 'extraction_timestamp', 'saved_timestamp', 'total_frames', 'renditions')
+
+
+def parse_date(value, end_of_day=False):
+    """Epoch seconds for an ISO date or datetime; a plain date covers the whole day when end_of_day"""
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) <= 10:
+        parsed = datetime.combine(parsed.date(), dt_time.max)
+    return parsed.timestamp()
+
+
+class SessionIndex:
+    def __init__(self, db_path, reviewed_folder):
+        self.db_path = db_path
+        self.reviewed_folder = reviewed_folder
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # ---- sync -----------------------------------------------------------
+
+    def sync(self):
+        """Index new or changed sessions and drop removed ones; returns the sessions re-read"""
+        with self._sync_lock:
+            conn = self._connect()
+            known = {row['session_id']: (row['mtime_ns'], row['size'])
+                     for row in conn.execute('SELECT session_id, mtime_ns, size FROM sessions')}
+            on_disk = {}
+            if os.path.isdir(self.reviewed_folder):
+                for entry in os.scandir(self.reviewed_folder):
+                    # Hidden directories are batch extractions still being written
+                    if entry.name.startswith('.') or not entry.is_dir():
+                        continue
+                    try:
+                        st = os.stat(os.path.join(entry.path, 'metadata.json'))
+                    except FileNotFoundError:
+                        continue
+                    on_disk[entry.name] = (st.st_mtime_ns, st.st_size)
+
+            changed = [name for name, sig in on_disk.items() if known.get(name) != sig]
+            for name in changed:
+                self._index_session(conn, name)
+            removed = set(known) - set(on_disk)
+            if removed:
+                with conn:
+                    conn.executemany('DELETE FROM sessions WHERE session_id = ?', [(name,) for name in removed])
+            return changed
+
+    def record(self, session_id):
+        """Index one session right after it was saved"""
+        with self._sync_lock:
+            self._index_session(self._connect(), session_id)
+
+    def _index_session(self, conn, session_id):
+        metadata_path = os.path.join(self.reviewed_folder, session_id, 'metadata.json')
+        st = os.stat(metadata_path)
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+        except ValueError:
+            metadata = {}
+
+        saved_at = None
+        if metadata.get('saved_timestamp'):
+            try:
+                saved_at = parse_date(metadata['saved_timestamp'])
+            except ValueError:
+                pass
+        if saved_at is None:
+            saved_at = st.st_mtime_ns / 1e9
+
+        summary = {key: metadata.get(key) for key in SUMMARY_KEYS}
+        summary['session_id'] = session_id
+        mode = (metadata.get('batch') or {}).get('source', {}).get('mode')
+        summary['batch'] = bool(metadata.get('batch'))
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sessions (session_id, video_filename, extraction_timestamp, saved_timestamp, '
+                'saved_at, total_frames, mode, mtime_ns, size, summary_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (session_id, metadata.get('video_filename'), metadata.get('extraction_timestamp'),
+                 metadata.get('saved_timestamp'), saved_at, metadata.get('total_frames'), mode,
+                 st.st_mtime_ns, st.st_size, json.dumps(summary)))
+
+    # ---- queries --------------------------------------------------------
+
+    def query(self, video=None, date_from=None, date_to=None, min_frames=None, max_frames=None,
+              limit=50, offset=0):
+        """Newest-first sessions matching the filters; returns (sessions, total_matching)
+
+        `video` matches part of the video filename (case-insensitive); dates are ISO
+        dates or datetimes, and a plain `date_to` includes that whole day.
+        """
+        clauses, params = [], []
+        if video:
+            clauses.append("video_filename LIKE ? ESCAPE '\\'")
+            escaped = video.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f'%{escaped}%')
+        if date_from:
+            clauses.append('saved_at >= ?')
+            params.append(parse_date(date_from))
+        if date_to:
+            clauses.append('saved_at <= ?')
+            params.append(parse_date(date_to, end_of_day=True))
+        if min_frames is not None:
+            clauses.append('total_frames >= ?')
+            params.append(int(min_frames))
+        if max_frames is not None:
+            clauses.append('total_frames <= ?')
+            params.append(int(max_frames))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        conn = self._connect()
+        total = conn.execute(f'SELECT COUNT(*) FROM sessions {where}', params).fetchone()[0]
+        rows = conn.execute(
+            f'SELECT summary_json, mode FROM sessions {where} ORDER BY saved_at DESC, session_id LIMIT ? OFFSET ?',
+            params + [int(limit), int(offset)])
+        sessions = []
+        for row in rows:
+            summary = json.loads(row['summary_json'])
+            summary['mode'] = row['mode']
+            sessions.append(summary)
+        return sessions, total
@@ -83,6 +83,7 @@ let abortController = null;
 let frameCache = new SimpleFrameCache(50); // Limit to 50 frames
 let continuousNavInterval = null;
 let isLoadingFrame = false;
+let csvEtag = null; // Version of the CSV the displayed annotations came from
 
 document.addEventListener('DOMContentLoaded', function() {
     setupUpload();
@@ -350,6 +351,7 @@ async function loadCsvData(videoFilename) {
         }
 
         const result = await response.json();
+        csvEtag = result.etag || null;
 
         if (result.success && result.csv_data && result.csv_data.length > 0) {
             displayCsvData(result.csv_data);
@@ -528,12 +530,16 @@ async function addLiveAnnotation() {
                 video_filename: videoInfo.filename,
                 frame_number: currentFrame,
                 body_part: bodyPart,
-                event_type: eventType
+                event_type: eventType,
+                etag: csvEtag
             })
         });
 
         if (!response.ok) {
             const error = await response.json();
+            if (response.status === 409) {
+                await loadCsvData(videoInfo.filename);
+            }
             throw new Error(error.error || 'Failed to add annotation');
         }
 
@@ -605,12 +611,16 @@ async function deleteLiveAnnotation() {
             },
             body: JSON.stringify({
                 video_filename: videoInfo.filename,
-                frame_number: currentFrame
+                frame_number: currentFrame,
+                etag: csvEtag
             })
         });
 
         if (!response.ok) {
             const error = await response.json();
+            if (response.status === 409) {
+                await loadCsvData(videoInfo.filename);
+            }
             throw new Error(error.error || 'Failed to delete annotation');
         }
 
@@ -829,10 +839,28 @@ async function handleVideoUpload(file) {
     formData.append('video', file);
     
     try {
-        const response = await fetch('/upload_video', {
-            method: 'POST',
-            body: formData
-        });
+        let response;
+        if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+            // Large videos go through the resumable chunked upload into the data folder
+            const videoFilename = await uploadVideoChunked(file, (done, total) => {
+                uploadStatus.innerHTML = `
+                    <div class="alert alert-info">
+                        <span class="spinner-border spinner-border-sm me-2"></span>
+                        Uploading video... ${Math.round(done / total * 100)}%
+                    </div>
+                `;
+            });
+            response = await fetch('/api/load_data_video', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ video_filename: videoFilename })
+            });
+        } else {
+            response = await fetch('/upload_video', {
+                method: 'POST',
+                body: formData
+            });
+        }
         
         if (!response.ok) {
             const error = await response.json();
@@ -866,6 +894,75 @@ async function handleVideoUpload(file) {
     }
 }
 
+const CHUNKED_UPLOAD_THRESHOLD = 64 * 1024 * 1024;
+const CHUNK_SIZE = 8 * 1024 * 1024;
+const PARALLEL_CHUNKS = 4;
+
+async function sha256Hex(buffer) {
+    // crypto.subtle only exists in secure contexts (https, localhost); the server checks the hash when sent
+    if (!window.crypto?.subtle) return null;
+    const digest = await crypto.subtle.digest('SHA-256', buffer);
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function uploadVideoChunked(file, onProgress) {
+    // Same file, size and modification time resume the same upload
+    const initResponse = await fetch('/api/uploads', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            filename: file.name,
+            size: file.size,
+            chunk_size: CHUNK_SIZE,
+            fingerprint: String(file.lastModified)
+        })
+    });
+    const upload = await initResponse.json();
+    if (!initResponse.ok) throw new Error(upload.error || 'Upload failed');
+    
+    const pending = [...upload.missing];
+    let done = upload.received.length;
+    onProgress(done, upload.chunks);
+    
+    async function sendChunk(index) {
+        const start = index * upload.chunk_size;
+        const buffer = await file.slice(start, start + upload.chunk_size).arrayBuffer();
+        const checksum = await sha256Hex(buffer);
+        for (let attempt = 1; ; attempt++) {
+            try {
+                const response = await fetch(`/api/uploads/${upload.upload_id}/chunks/${index}`, {
+                    method: 'PUT',
+                    headers: checksum ? { 'X-Chunk-SHA256': checksum } : {},
+                    body: buffer
+                });
+                if (response.ok) return;
+                const error = await response.json();
+                if (attempt >= 3) throw new Error(error.error || `Chunk ${index} failed`);
+            } catch (error) {
+                if (attempt >= 3) throw error;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+        }
+    }
+    
+    async function worker() {
+        while (pending.length) {
+            await sendChunk(pending.shift());
+            onProgress(++done, upload.chunks);
+        }
+    }
+    await Promise.all(Array.from({ length: PARALLEL_CHUNKS }, worker));
+    
+    const completeResponse = await fetch(`/api/uploads/${upload.upload_id}/complete`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({})
+    });
+    const result = await completeResponse.json();
+    if (!completeResponse.ok) throw new Error(result.error || 'Upload failed');
+    return result.video_filename;
+}
+
 function initializeAnnotationInterface() {
     // Clear frame cache for new video
     frameCache.clear();
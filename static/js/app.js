@@ -13,12 +13,12 @@ let editMode = false;
 let originalCSVData = [];
 let pendingChanges = [];
 let editingTouchData = new Map(); // Map of frame_number -> touch_data
+let csvEtag = null; // Version of the CSV the edits are based on
 
 // Video player state
 let videoPlayer = null;
 let currentVideoFilename = null;
 let videoSyncEnabled = true;
-let loopIntervalId = null;
 
 document.addEventListener('DOMContentLoaded', function() {
     loadAvailableVideos();
@@ -567,7 +567,7 @@ function downloadCurrentFrame() {
         const frame = extractedFrames[currentFrameIndex];
         const link = document.createElement('a');
         link.href = `/frame/${frame.filename}`;
-        link.download = `frame_${frame.frame_number}.jpg`;
+        link.download = `frame_${frame.frame_number}${frame.filename.slice(frame.filename.lastIndexOf('.'))}`;
         link.click();
     }
 }
@@ -801,6 +801,7 @@ async function loadCSVData() {
         if (response.ok) {
             const result = await response.json();
             originalCSVData = result.csv_data;
+            csvEtag = result.etag || null;
             
             // Initialize editing touch data
             editingTouchData.clear();
@@ -932,12 +933,19 @@ async function saveCSVChanges() {
             },
             body: JSON.stringify({
                 video_filename: selectedVideo.filename,
-                touch_data: touchData
+                touch_data: touchData,
+                etag: csvEtag
             })
         });
         
-        if (response.ok) {
+        if (response.status === 409) {
+            // Someone else changed the same frames; keep the pending edits so they can be re-applied
+            const conflict = await response.json();
+            const frames = conflict.conflicts.map(c => c.frame_number).join(', ');
+            showAlert(`Not saved: frame(s) ${frames} were changed by someone else. Reload the CSV and re-apply these edits.`, 'warning');
+        } else if (response.ok) {
             const result = await response.json();
+            csvEtag = result.etag || null;
             pendingChanges = [];
             
             // Remove pending change styling
@@ -1057,6 +1065,7 @@ function loadVideoSource() {
     if (!selectedVideo || !videoPlayer) return;
     
     const videoUrl = `/api/video/${selectedVideo.filename}`;
+    videoPlayer.loop = false;
     videoPlayer.src = videoUrl;
     currentVideoFilename = selectedVideo.filename;
     
@@ -1090,6 +1099,11 @@ function syncVideoToFrame() {
     const currentFrame = extractedFrames[currentFrameIndex];
     if (!currentFrame) return;
     
+    // A loop clip may be playing; switch back to the full video first
+    if (currentVideoFilename !== selectedVideo.filename) {
+        loadVideoSource();
+    }
+    
     const timeInSeconds = currentFrame.frame_number / selectedVideo.video_info.fps;
     
     // Only seek if time difference is significant (> 0.5 seconds)
@@ -1112,7 +1126,6 @@ function playAroundCurrentFrame() {
     
     const frameTime = currentFrame.frame_number / selectedVideo.video_info.fps;
     const startTime = Math.max(0, frameTime - 2); // 2 seconds before
-    const endTime = Math.min(selectedVideo.video_info.duration, frameTime + 2); // 2 seconds after
     
     // Show video if hidden
     const videoContainer = document.getElementById('videoContainer');
@@ -1120,6 +1133,17 @@ function playAroundCurrentFrame() {
         toggleVideoVisibility();
     }
     
+    // In loop mode play the short cached clip around the frame instead of range-requesting the full video
+    const loopMode = document.getElementById('loopMode');
+    if (loopMode?.checked) {
+        playClipLoop(currentFrame.frame_number);
+        return;
+    }
+    
+    if (currentVideoFilename !== selectedVideo.filename) {
+        loadVideoSource();
+    }
+    
     // Set video time and play
     videoPlayer.currentTime = startTime;
     
@@ -1127,29 +1151,21 @@ function playAroundCurrentFrame() {
     videoPlayer.addEventListener('seeked', function onSeeked() {
         videoPlayer.removeEventListener('seeked', onSeeked);
         videoPlayer.play();
-        
-        // Set up loop if enabled
-        const loopMode = document.getElementById('loopMode');
-        if (loopMode?.checked) {
-            setupVideoLoop(startTime, endTime);
-        }
     });
 }
 
-function setupVideoLoop(startTime, endTime) {
+function playClipLoop(frameNumber) {
     clearVideoLoop();
     
-    loopIntervalId = setInterval(() => {
-        if (videoPlayer.currentTime >= endTime) {
-            videoPlayer.currentTime = startTime;
-        }
-    }, 100);
+    videoPlayer.src = `/api/clip/${encodeURIComponent(selectedVideo.filename)}/${frameNumber}`;
+    currentVideoFilename = null;  // Full video is reloaded when leaving loop mode
+    videoPlayer.loop = true;
+    videoPlayer.play();
 }
 
 function clearVideoLoop() {
-    if (loopIntervalId) {
-        clearInterval(loopIntervalId);
-        loopIntervalId = null;
+    if (videoPlayer) {
+        videoPlayer.loop = false;
     }
 }
 
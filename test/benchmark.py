@@ -0,0 +1,326 @@
+"""Benchmark suite for the extraction and serving hot paths.
+
+Generates synthetic videos (various lengths, resolutions and GOP sizes) plus
+matching annotation CSVs in a scratch folder, then times:
+
+  * extract_frames
+  * extract_timeline at several extraction FPS values and adaptive frame budgets
+  * /get_frame with sequential and random access
+  * /api/video range-request throughput
+  * the CSV edit routes as the number of annotations grows
+
+Results are written as JSON so runs can be compared:
+
+    python test/benchmark.py --output bench_results.json
+    python test/benchmark.py --quick --compare bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+
+from synthetic_media import make_media_set, write_annotation_csv
+
+VIDEO_CONFIGS = [
+    # name, frames, width, height, gop
+    ('short_360p_gop30', 300, 640, 360, 30),
+    ('short_720p_gop30', 300, 1280, 720, 30),
+    ('short_720p_gop250', 300, 1280, 720, 250),
+    ('long_360p_gop60', 1800, 640, 360, 60),
+]
+
+QUICK_VIDEO_CONFIGS = [
+    ('quick_360p_gop30', 150, 640, 360, 30),
+    ('quick_360p_gop150', 150, 640, 360, 150),
+]
+
+TIMELINE_FPS = [1, 5, 15, 30]
+ADAPTIVE_BUDGETS = [50, 200]
+EDIT_ANNOTATION_COUNTS = [10, 100, 1000]
+
+
+def summarize(samples):
+    """Turn a list of durations (seconds) into ms statistics"""
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pct(p):
+        return ordered[min(n - 1, int(round(p / 100 * (n - 1))))] * 1000
+
+    return {
+        'count': n,
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': pct(50),
+        'p95_ms': pct(95),
+        'max_ms': ordered[-1] * 1000
+    }
+
+
+def configure_app(app_module, root):
+    """Point the app's folders, databases and caches at a scratch directory"""
+    # Private shared frame cache so runs never see frames cached by a live server
+    app_module.create_app(root, FRAME_CACHE_NAME=f"touch_bench_{os.getpid()}")
+    app_module.ensure_folders()
+
+
+def run_to_completion(generator):
+    for update in generator:
+        if update['type'] == 'complete':
+            return update
+        if update['type'] == 'error':
+            raise RuntimeError(update['error'])
+    raise RuntimeError('Extraction did not complete')
+
+
+def bench_extraction(app_module, video_filename):
+    config = app_module.app.config
+    video_path = os.path.join(config['DATA_FOLDER'], video_filename)
+    csv_path = os.path.join(config['CSV_FOLDER'], os.path.splitext(video_filename)[0] + '.csv')
+    results = []
+
+    start = time.perf_counter()
+    result = run_to_completion(app_module.extract_frames(video_path, csv_path, video_filename))
+    elapsed = time.perf_counter() - start
+    results.append({
+        'benchmark': 'extract_frames',
+        'video': video_filename,
+        'frames_extracted': result['total_frames'],
+        'seconds': elapsed,
+        'frames_per_second': result['total_frames'] / elapsed if elapsed else 0
+    })
+
+    for fps in TIMELINE_FPS:
+        start = time.perf_counter()
+        result = run_to_completion(app_module.extract_timeline(video_path, csv_path, video_filename, fps))
+        elapsed = time.perf_counter() - start
+        results.append({
+            'benchmark': f'extract_timeline@{fps}fps',
+            'video': video_filename,
+            'frames_extracted': result['total_frames'],
+            'seconds': elapsed,
+            'frames_per_second': result['total_frames'] / elapsed if elapsed else 0
+        })
+
+    for budget in ADAPTIVE_BUDGETS:
+        start = time.perf_counter()
+        result = run_to_completion(app_module.extract_timeline(video_path, csv_path, video_filename,
+                                                               sampling='adaptive', frame_budget=budget))
+        elapsed = time.perf_counter() - start
+        results.append({
+            'benchmark': f'extract_timeline_adaptive@{budget}',
+            'video': video_filename,
+            'frames_extracted': result['total_frames'],
+            'seconds': elapsed,
+            'frames_per_second': result['total_frames'] / elapsed if elapsed else 0
+        })
+    return results
+
+
+def bench_get_frame(client, video_filename, total_frames, requests=60):
+    response = client.post('/api/load_data_video', json={'video_filename': video_filename})
+    if response.status_code != 200:
+        raise RuntimeError(response.get_json())
+
+    results = []
+    rng = random.Random(1234)
+    patterns = {
+        'sequential': [i % total_frames for i in range(requests)],
+        'random': [rng.randrange(total_frames) for _ in range(requests)]
+    }
+    for pattern, frames in patterns.items():
+        samples = []
+        for frame in frames:
+            start = time.perf_counter()
+            response = client.get(f'/get_frame/{frame}')
+            response.get_data()
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(response.get_json())
+        results.append({
+            'benchmark': f'get_frame_{pattern}',
+            'video': video_filename,
+            **summarize(samples)
+        })
+    return results
+
+
+def bench_stream(client, video_filename, chunk_size=1024 * 1024):
+    video_path = os.path.join(client.application.config['DATA_FOLDER'], video_filename)
+    file_size = os.path.getsize(video_path)
+
+    samples = []
+    total_bytes = 0
+    start_all = time.perf_counter()
+    for byte_start in range(0, file_size, chunk_size):
+        byte_end = min(byte_start + chunk_size, file_size) - 1
+        start = time.perf_counter()
+        response = client.get(f'/api/video/{video_filename}',
+                              headers={'Range': f'bytes={byte_start}-{byte_end}'})
+        body = response.get_data()
+        samples.append(time.perf_counter() - start)
+        total_bytes += len(body)
+    elapsed = time.perf_counter() - start_all
+
+    return [{
+        'benchmark': 'stream_video_range',
+        'video': video_filename,
+        'bytes': total_bytes,
+        'megabytes_per_second': total_bytes / elapsed / 1e6 if elapsed else 0,
+        **summarize(samples)
+    }]
+
+
+def bench_csv_edits(client, video_filename, fps, rounds=10):
+    config = client.application.config
+    csv_path = os.path.join(config['CSV_FOLDER'], os.path.splitext(video_filename)[0] + '.csv')
+    results = []
+
+    for count in EDIT_ANNOTATION_COUNTS:
+        # Every other frame annotated, so free frames remain for add_touch
+        frames = [f for f in range(1, 2 * count + 1, 2)]
+        write_annotation_csv(csv_path, frames, fps, new_format=True)
+
+        timings = {'load_csv': [], 'add_touch': [], 'delete_touch': [], 'save_csv_changes': []}
+        for i in range(rounds):
+            free_frame = 2 * (i + 1)
+
+            start = time.perf_counter()
+            client.post('/api/load_csv', json={'video_filename': video_filename}).get_data()
+            timings['load_csv'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            client.post('/api/add_touch', json={
+                'video_filename': video_filename, 'frame_number': free_frame,
+                'touch_event': 1, 'foot_plant_event': 0
+            }).get_data()
+            timings['add_touch'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            client.post('/api/delete_touch', json={
+                'video_filename': video_filename, 'frame_number': free_frame
+            }).get_data()
+            timings['delete_touch'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            client.post('/api/save_csv_changes', json={
+                'video_filename': video_filename,
+                'touch_data': [{
+                    'Frame Number': frames[i % len(frames)],
+                    'Time (seconds)': (frames[i % len(frames)] - 1) / fps,
+                    'Touch_Event': 2, 'Foot_Plant_Event': 0,
+                    'Timestamp': '2025-07-31T10:24:10.831Z'
+                }],
+                'use_new_format': True
+            }).get_data()
+            timings['save_csv_changes'].append(time.perf_counter() - start)
+
+        for route, samples in timings.items():
+            results.append({
+                'benchmark': f'csv_{route}',
+                'annotations': count,
+                **summarize(samples)
+            })
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    """Print benchmarks that got slower than the baseline by more than `threshold`"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def key(r):
+        return (r['benchmark'], r.get('video'), r.get('annotations'))
+
+    def metric(r):
+        return r.get('p50_ms', r.get('seconds', 0) * 1000)
+
+    previous = {key(r): r for r in baseline.get('results', [])}
+    regressions = []
+    for r in results:
+        old = previous.get(key(r))
+        if not old or not metric(old):
+            continue
+        ratio = metric(r) / metric(old)
+        marker = 'REGRESSION' if ratio > 1 + threshold else ''
+        print(f"  {r['benchmark']:<28} {str(r.get('video') or r.get('annotations')):<22} "
+              f"{metric(old):9.2f}ms -> {metric(r):9.2f}ms  x{ratio:5.2f} {marker}")
+        if marker:
+            regressions.append(r['benchmark'])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark extraction and serving hot paths')
+    parser.add_argument('--output', default='bench_results.json', help='Where to write the JSON results')
+    parser.add_argument('--quick', action='store_true', help='Small videos only (CI smoke run)')
+    parser.add_argument('--compare', help='Baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Relative slowdown reported as a regression (default 0.25)')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch folder')
+    args = parser.parse_args()
+
+    import app as app_module
+
+    root = tempfile.mkdtemp(prefix='touch_bench_')
+    configure_app(app_module, root)
+    config = app_module.app.config
+    client = app_module.app.test_client()
+    fps = 30.0
+
+    results = []
+    try:
+        for name, frames, width, height, gop in (QUICK_VIDEO_CONFIGS if args.quick else VIDEO_CONFIGS):
+            print(f"Generating {name} ({frames} frames, {width}x{height}, GOP {gop})...")
+            video_filename = make_media_set(config['DATA_FOLDER'], config['CSV_FOLDER'], name,
+                                            num_frames=frames, width=width, height=height,
+                                            fps=fps, gop=gop, touches=max(5, frames // 30))
+            results += bench_extraction(app_module, video_filename)
+            results += bench_get_frame(client, video_filename, frames)
+            results += bench_stream(client, video_filename)
+
+        # Edit routes only depend on CSV size, so one video is enough
+        results += bench_csv_edits(client, video_filename, fps)
+    finally:
+        cache = app_module.frame_cache
+        if cache is not None:
+            cache.close()
+            cache.unlink()
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'quick': args.quick
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def app_module(tmp_path):
+    """The app module with its folders, databases and caches in tmp_path
+
+    The shared frame cache gets a private name so tests never see frames cached
+    by a live server; it is removed again afterwards, and background clip
+    cutting and ingest are stopped before the next test rebuilds the app.
+    """
+    import app as app_module
+    app_module.create_app(str(tmp_path), FRAME_CACHE_NAME=f"touch_test_{os.getpid()}")
+    app_module.ensure_folders()
+    try:
+        yield app_module
+    finally:
+        app_module.clip_cache.shutdown()
+        app_module.ingest_pipeline.shutdown()
+        cache = app_module.frame_cache
+        if cache is not None:
+            cache.close()
+            cache.unlink()
+            app_module.frame_cache = None
@@ -0,0 +1,422 @@
+"""Load test: simulate several annotators against one server and report per-route latency.
+
+Starts the app in a separate process on synthetic videos (or targets a running
+server with --url) and runs N concurrent simulated users. Each user plays one
+role, assigned in proportion to --mix:
+
+  * annotator  loads a video and steps through frames, preloading the frames
+               around the current one like the annotator UI (6 parallel requests)
+  * timeline   runs /extract_timeline on a video, then pauses
+  * stream     plays a video through /api/video with 1 MB range requests
+  * editor     loads a CSV and adds, moves and deletes touches
+
+The report gives request count, errors, p50/p95/p99 latency and throughput per
+route, and is written as JSON so runs on different hardware or commits can be
+compared:
+
+    python test/loadtest.py --users 8 --duration 30
+    python test/loadtest.py --users 16 --mix annotator:3,stream:1 --output load.json
+    python test/loadtest.py --url http://annotate.local:5001 --users 32 --compare load.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.cookiejar import CookieJar
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROLES = ('annotator', 'timeline', 'stream', 'editor')
+DEFAULT_MIX = 'annotator:6,stream:2,timeline:1,editor:1'
+PRELOAD_RADIUS = 5
+BROWSER_CONNECTIONS = 6
+STREAM_CHUNK = 1024 * 1024
+
+VIDEO_CONFIGS = [
+    # name, frames, width, height, gop
+    ('load_720p_gop30', 600, 1280, 720, 30),
+    ('load_360p_gop60', 900, 640, 360, 60),
+]
+QUICK_VIDEO_CONFIGS = [
+    ('load_quick_360p', 150, 640, 360, 30),
+]
+
+# Runs in the server process: the app on the scratch folders, threaded like the dev server
+SERVER = """
+import atexit, signal, sys
+sys.path.insert(0, sys.argv[1])
+import app as app_module
+app_module.create_app(sys.argv[2], FRAME_CACHE_NAME=sys.argv[4])
+
+def unlink_frame_cache():
+    if app_module.frame_cache is not None:
+        app_module.frame_cache.close()
+        app_module.frame_cache.unlink()
+
+atexit.register(unlink_frame_cache)
+signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+app_module.app.run(host='127.0.0.1', port=int(sys.argv[3]), threaded=True, use_reloader=False)
+"""
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def parse_mix(spec):
+    """'annotator:6,stream:2' -> {'annotator': 6, 'stream': 2}"""
+    mix = {}
+    for part in spec.split(','):
+        role, _, weight = part.partition(':')
+        role = role.strip()
+        if role not in ROLES:
+            raise ValueError(f"Unknown role '{role}'. Roles: {', '.join(ROLES)}")
+        mix[role] = float(weight or 1)
+    return mix
+
+
+def assign_roles(mix, users):
+    """Roles for `users` users in proportion to the mix weights (largest remainder)"""
+    total = sum(mix.values())
+    shares = {role: weight / total * users for role, weight in mix.items()}
+    counts = {role: int(share) for role, share in shares.items()}
+    leftover = sorted(shares, key=lambda role: shares[role] - counts[role], reverse=True)
+    for role in leftover[:users - sum(counts.values())]:
+        counts[role] += 1
+    # Interleave so a ramp-up starts every role early
+    roles = []
+    while len(roles) < users:
+        for role in mix:
+            if counts[role]:
+                roles.append(role)
+                counts[role] -= 1
+    return roles
+
+
+class Recorder:
+    """Thread-safe per-route latency samples"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def add(self, route, seconds, ok):
+        with self._lock:
+            self.samples.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def report(self, elapsed):
+        results = []
+        with self._lock:
+            for route in sorted(self.samples):
+                ordered = sorted(self.samples[route])
+                results.append({
+                    'route': route,
+                    'requests': len(ordered),
+                    'errors': self.errors.get(route, 0),
+                    'throughput_rps': len(ordered) / elapsed if elapsed else 0,
+                    'mean_ms': sum(ordered) / len(ordered) * 1000,
+                    'p50_ms': percentile(ordered, 50) * 1000,
+                    'p95_ms': percentile(ordered, 95) * 1000,
+                    'p99_ms': percentile(ordered, 99) * 1000,
+                    'max_ms': ordered[-1] * 1000
+                })
+        return results
+
+
+class User:
+    """One simulated browser: its own cookie jar (annotator session) and request helpers"""
+
+    def __init__(self, base_url, recorder, stop, rng):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.stop = stop
+        self.rng = rng
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def request(self, route, path, method='GET', payload=None, headers=None):
+        """Send a request and record its latency under `route`; returns (status, body)"""
+        data = None
+        headers = dict(headers or {})
+        if payload is not None:
+            data = json.dumps(payload).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=120) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except OSError:
+            status, body = 0, b''
+        self.recorder.add(route, time.perf_counter() - start, 200 <= status < 300)
+        return status, body
+
+    def json(self, route, path, method='GET', payload=None):
+        status, body = self.request(route, path, method, payload)
+        try:
+            return status, json.loads(body)
+        except ValueError:
+            return status, {}
+
+    def pause(self, seconds):
+        self.stop.wait(seconds * self.rng.uniform(0.5, 1.5))
+
+
+def run_annotator(user, video, think):
+    status, _ = user.json('load_data_video', '/api/load_data_video', 'POST', {'video_filename': video['filename']})
+    if status != 200:
+        return
+    total_frames = video['video_info']['total_frames']
+    cached = set()
+    frame = user.rng.randrange(total_frames)
+    with ThreadPoolExecutor(max_workers=BROWSER_CONNECTIONS) as preloads:
+        while not user.stop.is_set():
+            if frame not in cached:
+                user.request('get_frame', f'/get_frame/{frame}')
+                cached.add(frame)
+            # Same neighbourhood the annotator UI preloads after every frame
+            for neighbour in range(frame - PRELOAD_RADIUS, frame + PRELOAD_RADIUS + 1):
+                if 0 <= neighbour < total_frames and neighbour not in cached:
+                    cached.add(neighbour)
+                    preloads.submit(user.request, 'get_frame (preload)', f'/get_frame/{neighbour}')
+            user.pause(think)
+            # Mostly single steps, sometimes a jump to another part of the video
+            if user.rng.random() < 0.05:
+                frame = user.rng.randrange(total_frames)
+            else:
+                frame = min(total_frames - 1, max(0, frame + user.rng.choice((1, 1, 1, 1, -1))))
+
+
+def run_timeline(user, video, think):
+    while not user.stop.is_set():
+        user.json('extract_timeline', '/extract_timeline', 'POST',
+                  {'video_filename': video['filename'], 'extraction_fps': 5})
+        user.pause(think * 20)
+
+
+def run_stream(user, video, think):
+    size = video['file_size']
+    while not user.stop.is_set():
+        for start in range(0, size, STREAM_CHUNK):
+            if user.stop.is_set():
+                return
+            end = min(start + STREAM_CHUNK, size) - 1
+            user.request('stream_video_range', f"/api/video/{video['filename']}",
+                         headers={'Range': f'bytes={start}-{end}'})
+            user.pause(think * 2)
+
+
+def run_editor(user, video, think, stripe, stripes):
+    status, loaded = user.json('load_csv', '/api/load_csv', 'POST', {'video_filename': video['filename']})
+    if status != 200:
+        return
+    taken = {int(row['Frame Number']) for row in loaded.get('csv_data', [])}
+    etag = loaded.get('etag')
+    total_frames = video['video_info']['total_frames']
+    # Each editor works on its own stripe of frames so concurrent edits never collide; edits carry the
+    # editor's last ETag, so other editors' writes make them stale and exercise the merge path
+    free = [f for f in range(1 + stripe, total_frames - stripes, stripes) if f not in taken and f + stripes not in taken]
+    while not user.stop.is_set() and free:
+        frame = user.rng.choice(free)
+        _, added = user.json('add_touch', '/api/add_touch', 'POST', {
+            'video_filename': video['filename'], 'frame_number': frame,
+            'touch_event': 1, 'foot_plant_event': 0, 'etag': etag
+        })
+        etag = added.get('etag', etag)
+        user.pause(think * 5)
+        user.json('move_touch', '/api/move_touch', 'POST', {
+            'video_filename': video['filename'], 'from_frame': frame, 'to_frame': frame + stripes
+        })
+        user.pause(think * 5)
+        _, deleted = user.json('delete_touch', '/api/delete_touch', 'POST', {
+            'video_filename': video['filename'], 'frame_number': frame, 'etag': etag
+        })
+        etag = deleted.get('etag', etag)
+        user.pause(think * 5)
+
+
+def simulate(base_url, videos, roles, duration, think, ramp, seed):
+    """Run every user until `duration` seconds have passed; returns (recorder, elapsed)"""
+    recorder = Recorder()
+    stop = threading.Event()
+    editors = [i for i, role in enumerate(roles) if role == 'editor']
+
+    def run(index, role):
+        rng = random.Random(seed + index)
+        user = User(base_url, recorder, stop, rng)
+        stop.wait(ramp * index / max(1, len(roles)))
+        video = videos[index % len(videos)]
+        if role == 'annotator':
+            run_annotator(user, video, think)
+        elif role == 'timeline':
+            run_timeline(user, video, think)
+        elif role == 'stream':
+            run_stream(user, video, think)
+        else:
+            run_editor(user, video, think, editors.index(index), len(editors))
+
+    threads = [threading.Thread(target=run, args=(i, role), daemon=True) for i, role in enumerate(roles)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=120)
+    return recorder, time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_local_server(root, port):
+    """Start the app on the scratch folders in its own process and wait until it answers"""
+    process = subprocess.Popen([sys.executable, '-c', SERVER, REPO, root, str(port), f"touch_load_{os.getpid()}"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Server exited during startup')
+        try:
+            urllib.request.urlopen(base_url + '/api/videos', timeout=5).read()
+            return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('Server did not start within 30s')
+
+
+def list_videos(base_url):
+    """Videos on the server that have a paired CSV, with the metadata the scenarios need"""
+    with urllib.request.urlopen(base_url + '/api/videos', timeout=60) as response:
+        videos = json.load(response)['videos']
+    videos = [v for v in videos if v['has_csv'] and v['video_info'].get('total_frames')]
+    if not videos:
+        raise RuntimeError('No videos with a CSV on the server')
+    return videos
+
+
+def compare(results, baseline_path, threshold):
+    """Print routes whose p95 got slower than the baseline by more than `threshold`"""
+    with open(baseline_path) as f:
+        previous = {r['route']: r for r in json.load(f).get('results', [])}
+    regressions = []
+    for r in results:
+        old = previous.get(r['route'])
+        if not old or not old['p95_ms']:
+            continue
+        ratio = r['p95_ms'] / old['p95_ms']
+        marker = 'REGRESSION' if ratio > 1 + threshold else ''
+        print(f"  {r['route']:<22} p95 {old['p95_ms']:9.2f}ms -> {r['p95_ms']:9.2f}ms  x{ratio:5.2f} {marker}")
+        if marker:
+            regressions.append(r['route'])
+    return regressions
+
+
+def print_report(results, elapsed, users):
+    print(f"\n{users} users for {elapsed:.1f}s")
+    print(f"  {'route':<22} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in results:
+        print(f"  {r['route']:<22} {r['requests']:>8} {r['errors']:>6} {r['throughput_rps']:>8.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate concurrent annotators and report per-route latency')
+    parser.add_argument('--users', type=int, default=8, help='Concurrent simulated users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run after ramp-up starts')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Role weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--think', type=float, default=0.15, help='Seconds between annotator steps')
+    parser.add_argument('--ramp', type=float, default=5, help='Seconds over which users start')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--url', help='Load an already running server instead of starting one')
+    parser.add_argument('--quick', action='store_true', help='One small video (CI smoke run)')
+    parser.add_argument('--output', default='loadtest_results.json', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Relative p95 slowdown reported as a regression (default 0.25)')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch folder')
+    args = parser.parse_args(argv)
+
+    roles = assign_roles(parse_mix(args.mix), args.users)
+    root = None
+    server = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            from synthetic_media import make_media_set
+
+            root = tempfile.mkdtemp(prefix='touch_load_')
+            for name, frames, width, height, gop in (QUICK_VIDEO_CONFIGS if args.quick else VIDEO_CONFIGS):
+                print(f"Generating {name} ({frames} frames, {width}x{height}, GOP {gop})...")
+                make_media_set(os.path.join(root, 'data'), os.path.join(root, 'csv'), name, num_frames=frames,
+                               width=width, height=height, gop=gop, touches=max(5, frames // 30))
+            server, base_url = start_local_server(root, free_port())
+
+        videos = list_videos(base_url)
+        print(f"{args.users} users ({', '.join(f'{roles.count(r)} {r}' for r in ROLES if r in roles)}) "
+              f"against {base_url} for {args.duration:.0f}s...")
+        recorder, elapsed = simulate(base_url, videos, roles, args.duration, args.think, args.ramp, args.seed)
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        if root and not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    results = recorder.report(elapsed)
+    print_report(results, elapsed, args.users)
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'url': args.url or 'local',
+            'users': args.users,
+            'roles': {role: roles.count(role) for role in ROLES},
+            'duration_seconds': elapsed,
+            'think_seconds': args.think,
+            'cpu_count': os.cpu_count(),
+            'quick': args.quick
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} route results to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Synthetic videos and annotation CSVs for tests, benchmarks and load tests"""
+import os
+
+import cv2
+import numpy as np
+
+
+def write_synthetic_video(path, num_frames=300, width=640, height=360, fps=30.0, gop=30):
+    """Write a video with a moving ball and a frame counter so every frame is distinct.
+
+    `gop` is the keyframe interval passed to the FFMPEG writer, which is what makes
+    seeks cheap or expensive for the reader.
+    """
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    params = [cv2.VIDEOWRITER_PROP_KEY_INTERVAL, int(gop)]
+    writer = cv2.VideoWriter(path, cv2.CAP_FFMPEG, fourcc, fps, (width, height), params)
+    if not writer.isOpened():
+        # Fall back to the default backend without the keyframe hint
+        writer = cv2.VideoWriter(path, fourcc, fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open VideoWriter for {path}")
+
+    yy, xx = np.mgrid[0:height, 0:width]
+    background = ((xx * 255 // max(width - 1, 1)) // 2).astype(np.uint8)
+    radius = max(height // 20, 4)
+
+    for i in range(num_frames):
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:, :, 0] = background
+        frame[:, :, 1] = (background + i) % 256
+        frame[:, :, 2] = 60
+
+        # Ball bounces across the pitch; long static stretches every 100 frames
+        phase = i % 200
+        x = int((phase if phase < 100 else 100) / 100 * (width - 2 * radius)) + radius
+        y = int(height * 0.75)
+        cv2.circle(frame, (x, y), radius, (255, 255, 255), -1)
+        cv2.putText(frame, str(i + 1), (10, max(height // 8, 20)),
+                    cv2.FONT_HERSHEY_SIMPLEX, max(height / 360, 0.5), (0, 0, 0), 2)
+        writer.write(frame)
+
+    writer.release()
+    return path
+
+
+def touch_frames_for(num_frames, count):
+    """Evenly spread `count` 1-based touch frames over a video"""
+    count = max(1, min(count, num_frames))
+    step = num_frames / count
+    return sorted({int(i * step) + 1 for i in range(count)})
+
+
+def write_annotation_csv(path, frames, fps=30.0, new_format=False):
+    """Write an annotation CSV in the old (Body Part/Event Type) or new (Touch_Event) layout"""
+    with open(path, 'w') as f:
+        if new_format:
+            f.write("Frame Number,Time (seconds),Touch_Event,Foot_Plant_Event,Timestamp\n")
+        else:
+            f.write("Frame Number,Time (seconds),Body Part,Event Type,Timestamp\n")
+        for i, frame in enumerate(frames):
+            time_sec = (frame - 1) / fps
+            timestamp = "2025-07-31T10:24:10.831Z"
+            if new_format:
+                f.write(f"{frame},{time_sec:.3f},{1 + i % 2},0,{timestamp}\n")
+            else:
+                body_part = 'Right Foot' if i % 2 == 0 else 'Left Foot'
+                f.write(f"{frame},{time_sec:.3f},{body_part},ball_touch,{timestamp}\n")
+    return path
+
+
+def make_media_set(data_folder, csv_folder, name, num_frames=300, width=640, height=360,
+                   fps=30.0, gop=30, touches=20, new_format=False):
+    """Create `<name>.mp4` in data_folder and a paired `<name>.csv` in csv_folder"""
+    os.makedirs(data_folder, exist_ok=True)
+    os.makedirs(csv_folder, exist_ok=True)
+    video_filename = f"{name}.mp4"
+    write_synthetic_video(os.path.join(data_folder, video_filename), num_frames, width, height, fps, gop)
+    write_annotation_csv(os.path.join(csv_folder, f"{name}.csv"),
+                         touch_frames_for(num_frames, touches), fps, new_format)
+    return video_filename
+
+
+def write_tracking_csv(path, feet, balls, fps=30.0, keypoints=26):
+    """Write a tracking CSV (tracking_csv/ layout) with one row per frame.
+
+    feet[i] is the (x, y) of frame i+1's ankles and feet, balls[i] a football box
+    (x1, y1, x2, y2); either may be None for a frame where nothing was tracked.
+    """
+    header = ['frame_id', 'timestamp_ms', 'fps', 'person_id', 'person_count']
+    for k in range(keypoints):
+        header += [f"kp_{k}_x", f"kp_{k}_y", f"kp_{k}_confidence"]
+    header += ['object_count', 'objects_detected', 'inference_time_ms']
+    with open(path, 'w') as f:
+        f.write(','.join(header) + '\n')
+        for i, (foot, ball) in enumerate(zip(feet, balls)):
+            row = [str(i + 1), f"{i * 1000 / fps:.1f}", str(fps), '1' if foot else '-1', '1' if foot else '0']
+            for k in range(keypoints):
+                if foot is not None and k in (15, 16, 20, 21, 22, 23, 24, 25):
+                    # Left and right foot 20px apart
+                    row += [f"{foot[0] + (10 if k % 2 else -10):.1f}", f"{foot[1]:.1f}", '0.9']
+                elif foot is not None:
+                    row += [f"{foot[0]:.1f}", f"{foot[1] - 100:.1f}", '0.9']
+                else:
+                    row += ['0.0', '0.0', '0.0']
+            objects = f"cone:0.850:5,5,15,15|football:0.900:{','.join(str(int(v)) for v in ball)}" if ball else 'cone:0.850:5,5,15,15'
+            row += ['2' if ball else '1', f'"{objects}"', '25.0']
+            f.write(','.join(row) + '\n')
+    return path
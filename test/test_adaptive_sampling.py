@@ -0,0 +1,45 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adaptive_sampling import compute_motion_energy, select_adaptive_frames
+
+
+def test_budget_follows_motion_and_keeps_touches():
+    # 1000 static frames with a burst of action in 400..500
+    energy = np.full(1000, 0.1, dtype=np.float32)
+    energy[400:500] = 10.0
+    touches = [5, 950]
+
+    frames = select_adaptive_frames(energy, 100, touches)
+    assert len(frames) == 100
+    assert set(touches) <= set(frames)
+    assert frames == sorted(frames)
+
+    in_burst = sum(400 <= f < 500 for f in frames)
+    assert in_burst > 50
+    # Static stretches still get some coverage
+    assert any(f < 400 for f in frames if f not in touches)
+    assert any(f >= 500 for f in frames if f not in touches)
+
+
+def test_small_and_large_budgets():
+    energy = np.ones(50, dtype=np.float32)
+    assert select_adaptive_frames(energy, 2, [10, 20, 30]) == [10, 20, 30]
+    assert select_adaptive_frames(energy, 500) == list(range(50))
+    assert select_adaptive_frames(np.zeros(0, dtype=np.float32), 10, [3]) == []
+
+
+def test_motion_energy_from_video(tmp_path):
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from synthetic_media import write_synthetic_video
+
+    video_path = str(tmp_path / 'clip.mp4')
+    write_synthetic_video(video_path, num_frames=60, width=320, height=180)
+    energy = compute_motion_energy(video_path)
+    assert energy.shape == (60,)
+    assert energy.dtype == np.float32
+    assert (energy >= 0).all()
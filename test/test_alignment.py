@@ -0,0 +1,108 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import alignment
+from synthetic_media import write_annotation_csv
+
+
+def drifting_frames(count, seed=7, size=(320, 240)):
+    """Smoothly changing random texture; unlike the bouncing-ball video it never repeats"""
+    rng = np.random.default_rng(seed)
+    state = rng.random((9, 12)) * 255
+    frames = []
+    for _ in range(count):
+        state = 0.85 * state + 0.15 * rng.random((9, 12)) * 255
+        gray = cv2.resize(state.astype(np.uint8), size, interpolation=cv2.INTER_LINEAR)
+        frames.append(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+    return frames
+
+
+def write_video(path, frames, fps=30.0, size=(320, 240)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    for frame in frames:
+        writer.write(cv2.resize(frame, size))
+    writer.release()
+    return path
+
+
+def test_align_trimmed_and_frame_dropped_copies(tmp_path):
+    frames = drifting_frames(600)
+    source, source_fps = alignment.compute_signatures(write_video(str(tmp_path / 'source.mp4'), frames))
+
+    # Trimmed and re-encoded at a lower resolution: a pure offset
+    trimmed, fps = alignment.compute_signatures(write_video(str(tmp_path / 'trim.mp4'), frames[37:520], size=(240, 180)))
+    result = alignment.align(source, source_fps, trimmed, fps)
+    assert round(result['offset']) == -37 and abs(result['scale'] - 1) < 1e-3
+    assert result['confidence'] > 0.9
+    assert alignment.map_frames([1, 38, 300, 530], result, len(trimmed)) == [None, 1, 263, None]
+
+    # Every tenth frame dropped: drift, mapped to within a frame
+    dropped_frames = [frame for i, frame in enumerate(frames[10:]) if i % 10 != 9]
+    dropped, fps = alignment.compute_signatures(write_video(str(tmp_path / 'drop.mp4'), dropped_frames))
+    result = alignment.align(source, source_fps, dropped, fps)
+    assert abs(result['scale'] - 0.9) < 0.02
+    kept = [frame - 11 for frame in (100, 300, 500)]
+    expected = [k - k // 10 + 1 for k in kept]
+    for mapped, wanted in zip(alignment.map_frames([100, 300, 500], result, len(dropped)), expected):
+        assert abs(mapped - wanted) <= 1
+
+
+def test_align_route_rewrites_csv_and_caches_signatures(app_module, monkeypatch):
+    config = app_module.app.config
+    frames = drifting_frames(300)
+    write_video(os.path.join(config['DATA_FOLDER'], 'match.mp4'), frames)
+    write_video(os.path.join(config['DATA_FOLDER'], 'match_trimmed.mp4'), frames[25:])
+    write_annotation_csv(os.path.join(config['CSV_FOLDER'], 'match.csv'), [10, 100, 200], new_format=True)
+    client = app_module.app.test_client()
+    payload = {'source_video': 'match.mp4', 'target_video': 'match_trimmed.mp4'}
+
+    response = client.post('/api/align_annotations', json=payload)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['dropped_frames'] == [10]
+    # The written CSV is versioned like any edit, so annotators can go on from the returned ETag
+    assert response.headers['ETag'] == f'"{body["etag"]}"'
+    loaded = client.post('/api/load_csv', json={'video_filename': 'match_trimmed.mp4'}).get_json()
+    assert loaded['etag'] == body['etag']
+    df = pd.read_csv(os.path.join(config['CSV_FOLDER'], 'match_trimmed.csv'))
+    assert df['Frame Number'].tolist() == [75, 175]
+    assert df['Time (seconds)'].tolist() == [74 / 30.0, 174 / 30.0]
+
+    assert client.post('/api/align_annotations', json=payload).status_code == 409
+
+    # Signatures come from the cache the second time
+    def fail(*args, **kwargs):
+        raise AssertionError('signatures recomputed')
+    monkeypatch.setattr(alignment, 'compute_signatures', fail)
+    response = client.post('/api/align_annotations', json={**payload, 'overwrite': True})
+    assert response.status_code == 200
+    assert len(os.listdir(config['SIGNATURE_FOLDER'])) == 2
+    app_module.clip_cache.wait()
+
+
+def test_align_route_reports_collisions_on_a_slower_target(app_module, monkeypatch):
+    config = app_module.app.config
+    frames = drifting_frames(240)
+    write_video(os.path.join(config['DATA_FOLDER'], 'match60.mp4'), frames, fps=60.0)
+    write_video(os.path.join(config['DATA_FOLDER'], 'match30.mp4'), frames[::2], fps=30.0)
+    write_annotation_csv(os.path.join(config['CSV_FOLDER'], 'match60.csv'), [100, 101, 102, 103, 180], fps=60.0,
+                         new_format=True)
+    monkeypatch.setattr(app_module.clip_cache, 'schedule', lambda *args, **kwargs: None)
+
+    response = app_module.app.test_client().post('/api/align_annotations',
+                                                 json={'source_video': 'match60.mp4', 'target_video': 'match30.mp4'})
+    assert response.status_code == 200
+    body = response.get_json()
+    df = pd.read_csv(os.path.join(config['CSV_FOLDER'], 'match30.csv'))
+    assert df['Frame Number'].is_unique
+    assert len(df) + len(body['collided_frames']) + len(body['dropped_frames']) == 5
+    assert len(body['collided_frames']) == 2
+    for collision in body['collided_frames']:
+        assert collision['to'] in df['Frame Number'].tolist() and collision['kept_from'] < collision['from']
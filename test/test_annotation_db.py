@@ -0,0 +1,65 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from annotation_db import AnnotationDatabase
+
+OLD_CSV = """Frame Number,Time (seconds),Body Part,Event Type,Timestamp
+10,0.3,Right Foot,ball_touch,2025-07-31T10:24:10.831Z
+20,0.633,Left Foot,ball_touch,2025-07-31T10:24:11.831Z
+30,0.967,Left Foot,foot_touchdown,2025-07-31T10:24:12.831Z
+"""
+
+NEW_CSV = """Frame Number,Time (seconds),Touch_Event,Foot_Plant_Event,Timestamp
+5,0.133,2,0,2025-07-31T10:24:10.831Z
+15,0.467,0,1,2025-07-31T10:24:11.831Z
+"""
+
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_import_query_and_export(tmp_path):
+    csv_dir = tmp_path / 'csv'
+    csv_dir.mkdir()
+    (csv_dir / 'drill_a.csv').write_text(OLD_CSV)
+    (csv_dir / 'drill_b.csv').write_text(NEW_CSV)
+
+    db = AnnotationDatabase(str(tmp_path / 'annotations.db'), str(csv_dir))
+    assert sorted(db.sync()) == ['drill_a.csv', 'drill_b.csv']
+    assert db.sync() == []
+
+    rows, total = db.query(event_type='ball_touch', foot='left')
+    assert total == 2
+    assert [(r['video'], r['frame_number']) for r in rows] == [('drill_a', 20), ('drill_b', 5)]
+
+    rows, total = db.query(event_type='foot_plant')
+    assert {(r['video'], r['foot']) for r in rows} == {('drill_a', 'left'), ('drill_b', 'right')}
+
+    rows, total = db.query(video='drill_a', frame_min=15, frame_max=25)
+    assert [r['frame_number'] for r in rows] == [20]
+
+    assert db.export_csv('drill_a') == OLD_CSV
+    assert db.export_csv('missing') is None
+
+
+def test_incremental_resync(tmp_path):
+    csv_dir = tmp_path / 'csv'
+    csv_dir.mkdir()
+    (csv_dir / 'drill_a.csv').write_text(OLD_CSV)
+    (csv_dir / 'drill_b.csv').write_text(NEW_CSV)
+    db = AnnotationDatabase(str(tmp_path / 'annotations.db'), str(csv_dir))
+    db.sync()
+
+    (csv_dir / 'drill_b.csv').write_text(NEW_CSV + "25,0.8,1,0,2025-07-31T10:24:12.831Z\n")
+    bump_mtime(csv_dir / 'drill_b.csv')
+    assert db.sync() == ['drill_b.csv']
+    assert db.query(video='drill_b')[1] == 3
+
+    os.remove(csv_dir / 'drill_a.csv')
+    db.sync()
+    assert db.query(video='drill_a')[1] == 0
+    assert {row['video'] for row in db.summary()} == {'drill_b'}
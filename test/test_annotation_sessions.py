@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from annotation_sessions import AnnotationSessionStore
+
+
+def make_annotation(frame, body_part='Right Foot'):
+    return {
+        'frame_number': frame,
+        'time_seconds': round(frame / 30, 3),
+        'body_part': body_part,
+        'timestamp': '2025-07-31T10:24:10.831Z'
+    }
+
+
+def test_upsert_delete_and_order(tmp_path):
+    store = AnnotationSessionStore(str(tmp_path / 'sessions.db'))
+    store.start('a')
+
+    assert store.upsert('a', make_annotation(30)) == 1
+    assert store.upsert('a', make_annotation(10)) == 2
+    # Same frame replaces instead of duplicating
+    assert store.upsert('a', make_annotation(30, 'Left Foot')) == 2
+
+    annotations = store.list('a')
+    assert [a['frame_number'] for a in annotations] == [10, 30]
+    assert annotations[1]['body_part'] == 'Left Foot'
+
+    assert store.delete('a', 10) == 1
+    assert store.delete('a', 999) == 1
+
+
+def test_sessions_are_isolated_and_restartable(tmp_path):
+    store = AnnotationSessionStore(str(tmp_path / 'sessions.db'))
+    store.start('a')
+    store.start('b')
+    store.upsert('a', make_annotation(1))
+    store.upsert('b', make_annotation(2))
+
+    assert [a['frame_number'] for a in store.list('a')] == [1]
+    store.start('a')
+    assert store.list('a') == []
+    assert store.count('b') == 1
+
+    store.clear('b')
+    assert store.list('b') == []
+
+
+def test_cookie_does_not_grow_with_annotations(app_module):
+    client = app_module.app.test_client()
+
+    with client.session_transaction() as sess:
+        sess['video_info'] = {'path': 'video.mp4', 'filename': 'video.mp4', 'fps': 30.0, 'total_frames': 1000}
+
+    cookie_sizes = []
+    for frame in range(200):
+        response = client.post('/add_annotation', json={'frame_number': frame, 'body_part': 'Right Foot'})
+        assert response.status_code == 200
+        cookie = client.get_cookie('session')
+        cookie_sizes.append(len(cookie.value))
+
+    assert response.get_json()['total_annotations'] == 200
+    assert max(cookie_sizes) == min(cookie_sizes)
+    assert client.get('/get_annotations').get_json()['total'] == 200
+
+    client.post('/remove_annotation', json={'frame_number': 5})
+    assert client.get('/get_annotations').get_json()['total'] == 199
@@ -0,0 +1,94 @@
+import io
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import annotation_versions as versioning
+from synthetic_media import make_media_set
+
+
+def test_find_conflicts_only_flags_frames_changed_on_both_sides():
+    row = lambda frame, part: {'Frame Number': frame, 'Body Part': part}
+    base = {10: row(10, 'Right Foot'), 20: row(20, 'Left Foot'), 30: row(30, 'Left Foot')}
+    current = {10: row(10, 'Left Foot'), 20: row(20, 'Left Foot'), 40: row(40, 'Right Foot')}
+
+    edits = {
+        10: row(10, 'Right Foot'),  # Unchanged by the client: not an edit
+        20: row(20, 'Right Foot'),  # Edited by the client only
+        30: None,                   # Deleted on both sides
+        40: row(40, 'Left Foot'),   # Added on the server, set differently by the client
+    }
+    conflicts = versioning.find_conflicts(base, current, edits)
+    assert [c['frame_number'] for c in conflicts] == [40]
+    assert conflicts[0]['server'] == current[40] and conflicts[0]['base'] is None
+
+    changes = versioning.diff(base, current)
+    assert [r['Frame Number'] for r in changes['added']] == [40]
+    assert [r['Frame Number'] for r in changes['removed']] == [30]
+    assert [c['frame_number'] for c in changes['changed']] == [10]
+
+    # Without the client's version every edit that differs from the file is a conflict
+    assert [c['frame_number'] for c in versioning.find_conflicts(None, current, {10: row(10, 'Right Foot')})] == [10]
+
+
+def test_concurrent_annotators_merge_and_stale_writes_are_rejected(app_module, monkeypatch):
+    # Loop clips are not under test and cutting them dominates the runtime
+    monkeypatch.setattr(app_module.clip_cache, 'schedule', lambda *args, **kwargs: None)
+    config = app_module.app.config
+    video_filename = make_media_set(config['DATA_FOLDER'], config['CSV_FOLDER'], 'match', num_frames=120, touches=4)
+    csv_path = os.path.join(config['CSV_FOLDER'], 'match.csv')
+    alice = app_module.app.test_client()
+    bob = app_module.app.test_client()
+
+    loaded = alice.post('/api/load_csv', json={'video_filename': video_filename})
+    etag = loaded.get_json()['etag']
+    assert loaded.headers['ETag'] == f'"{etag}"'
+    assert bob.post('/api/load_csv', json={'video_filename': video_filename}).get_json()['etag'] == etag
+    rows = pd.read_csv(csv_path).to_dict('records')
+
+    # Alice relabels frame 31; Bob, still on the old version, adds frame 50: no overlap, both kept
+    relabeled = {**rows[1], 'Body Part': 'Right Foot'}
+    saved = alice.post('/api/save_csv_changes', json={'video_filename': video_filename, 'use_new_format': False,
+                                                      'touch_data': [relabeled], 'etag': etag})
+    assert saved.status_code == 200 and saved.get_json()['etag'] != etag
+    added = bob.post('/api/add_touch', json={'video_filename': video_filename, 'frame_number': 50, 'etag': etag})
+    assert added.status_code == 200
+
+    # Bob's stale full-list save does not undo Alice's relabel
+    stale_rows = rows + [{'Frame Number': 70, 'Time (seconds)': 2.3, 'Body Part': 'Left Foot'}]
+    assert bob.post('/api/save_csv_changes', json={'video_filename': video_filename, 'use_new_format': False,
+                                                   'touch_data': stale_rows, 'etag': etag}).status_code == 200
+    df = pd.read_csv(csv_path).set_index('Frame Number')
+    assert df.loc[31, 'Body Part'] == 'Right Foot'
+    assert {50, 70} <= set(df.index)
+
+    # Deleting the frame Alice changed, from the old version, is a conflict reported with the diff
+    rejected = bob.post('/api/delete_touch', json={'video_filename': video_filename, 'frame_number': 31,
+                                                   'etag': etag})
+    assert rejected.status_code == 409
+    body = rejected.get_json()
+    assert [c['frame_number'] for c in body['conflicts']] == [31]
+    assert [c['frame_number'] for c in body['diff']['changed']] == [31]
+    assert {r['Frame Number'] for r in body['diff']['added']} == {50, 70}
+    assert 31 in pd.read_csv(csv_path)['Frame Number'].values
+
+    # With the current ETag the delete goes through
+    current = bob.post('/api/load_csv', json={'video_filename': video_filename}).get_json()['etag']
+    assert body['etag'] == current
+    assert bob.post('/api/delete_touch', json={'video_filename': video_filename, 'frame_number': 31},
+                    headers={'If-Match': f'"{current}"'}).status_code == 200
+
+
+def test_uploaded_csv_comes_back_with_its_etag(app_module):
+    csv_bytes = b'Frame Number,Time (seconds),Body Part\n10,0.3,Left Foot\n'
+    response = app_module.app.test_client().post('/upload', data={
+        'video': (io.BytesIO(b'not really a video'), 'drill.mp4'),
+        'csv': (io.BytesIO(csv_bytes), 'drill.csv')
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.get_json()['etag'] == versioning.content_etag(csv_bytes)
+    assert response.headers['ETag'] == f'"{versioning.content_etag(csv_bytes)}"'
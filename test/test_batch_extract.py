@@ -0,0 +1,34 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import batch_extract
+from synthetic_media import make_media_set
+
+
+def test_batch_extracts_each_video_once(tmp_path, capsys):
+    data_folder, csv_folder, output = str(tmp_path / 'data'), str(tmp_path / 'csv'), str(tmp_path / 'reviewed')
+    for name in ('drill_a', 'drill_b'):
+        make_media_set(data_folder, csv_folder, name, num_frames=60, touches=4)
+    args = ['--data', data_folder, '--csv', csv_folder, '--output', output, '--workers', '2']
+
+    assert batch_extract.main(args) == 0
+    sessions = sorted(os.listdir(output))
+    assert len(sessions) == 2
+    for session_id in sessions:
+        with open(os.path.join(output, session_id, 'metadata.json')) as f:
+            metadata = json.load(f)
+        assert metadata['session_id'] == session_id
+        assert metadata['total_frames'] == 4
+        assert sorted(os.listdir(os.path.join(output, session_id, 'frames'))) == metadata['frame_files']
+        assert os.path.exists(os.path.join(output, session_id, 'annotations.csv'))
+    assert '2 extracted, 0 skipped' in capsys.readouterr().out
+
+    # Unchanged inputs are skipped; other settings are a new session
+    assert batch_extract.main(args) == 0
+    assert '0 extracted, 2 skipped' in capsys.readouterr().out
+    assert batch_extract.main(args + ['--mode', 'windows', '--window', '2', 'drill_a.mp4']) == 0
+    assert len(os.listdir(output)) == 3
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunked_uploads import ChunkedUploads, UploadError
+
+PAYLOAD = os.urandom(10 * 1024 + 123)
+CHUNK = 1024
+
+
+def chunk(index):
+    return PAYLOAD[index * CHUNK:(index + 1) * CHUNK]
+
+
+def test_parallel_chunks_resume_and_assemble(tmp_path):
+    uploads = ChunkedUploads(str(tmp_path / 'state'), str(tmp_path / 'data'))
+    sha256 = hashlib.sha256(PAYLOAD).hexdigest()
+    status = uploads.init('match.mp4', len(PAYLOAD), CHUNK, fingerprint='1', sha256=sha256)
+    assert status['chunks'] == 11 and status['missing'] == list(range(11))
+
+    # First attempt dies after a few chunks
+    for index in (0, 5, 10):
+        uploads.write_chunk(status['upload_id'], index, chunk(index), hashlib.sha256(chunk(index)).hexdigest())
+
+    # Starting the same file again resumes the same upload
+    resumed = uploads.init('match.mp4', len(PAYLOAD), CHUNK, fingerprint='1', sha256=sha256)
+    assert resumed['upload_id'] == status['upload_id']
+    assert resumed['received'] == [0, 5, 10]
+
+    with pytest.raises(UploadError) as missing:
+        uploads.complete(status['upload_id'], 'match.mp4')
+    assert missing.value.status == 409
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda i: uploads.write_chunk(status['upload_id'], i, chunk(i)), resumed['missing']))
+
+    path = uploads.complete(status['upload_id'], 'match.mp4')
+    with open(path, 'rb') as f:
+        assert f.read() == PAYLOAD
+    assert sorted(os.listdir(tmp_path / 'data')) == ['match.mp4']
+    assert os.listdir(tmp_path / 'state') == []
+
+
+def test_chunk_validation(tmp_path):
+    uploads = ChunkedUploads(str(tmp_path / 'state'), str(tmp_path / 'data'))
+    upload_id = uploads.init('match.mp4', len(PAYLOAD), CHUNK)['upload_id']
+
+    with pytest.raises(UploadError) as bad_checksum:
+        uploads.write_chunk(upload_id, 1, chunk(1), '0' * 64)
+    assert bad_checksum.value.status == 422
+    with pytest.raises(UploadError):
+        uploads.write_chunk(upload_id, 1, chunk(1)[:-1])
+    with pytest.raises(UploadError):
+        uploads.write_chunk(upload_id, 11, b'x')
+    with pytest.raises(UploadError) as unknown:
+        uploads.status('../../etc')
+    assert unknown.value.status == 404
+
+    uploads.abort(upload_id)
+    assert os.listdir(tmp_path / 'data') == []
+
+
+def test_declared_size_is_bounded(tmp_path):
+    uploads = ChunkedUploads(str(tmp_path / 'state'), str(tmp_path / 'data'), max_size=len(PAYLOAD))
+    with pytest.raises(UploadError) as too_large:
+        uploads.init('match.mp4', len(PAYLOAD) + 1, CHUNK)
+    assert too_large.value.status == 413
+
+    # Free space is checked before anything is preallocated, counting what unfinished uploads still need
+    size = 64 * 1024 ** 2
+    free = shutil.disk_usage(tmp_path).free
+    uploads = ChunkedUploads(str(tmp_path / 'state'), str(tmp_path / 'data'), max_size=None, min_free=free - size * 3 // 2)
+    uploads.init('first.mp4', size, CHUNK)
+    with pytest.raises(UploadError) as no_space:
+        uploads.init('second.mp4', size, CHUNK)
+    assert no_space.value.status == 507
+    assert len(os.listdir(tmp_path / 'data')) == 1
@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import cv2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from clip_cache import ClipCache
+from synthetic_media import write_synthetic_video
+
+
+def clip_files(cache):
+    return sorted(os.listdir(cache.folder)) if os.path.isdir(cache.folder) else []
+
+
+def test_clip_covers_window_and_is_downscaled(tmp_path):
+    video_path = str(tmp_path / 'clip.mp4')
+    write_synthetic_video(video_path, num_frames=90, width=640, height=360, fps=30.0)
+    cache = ClipCache(str(tmp_path / 'clips'), seconds_before=0.5, seconds_after=0.5)
+
+    path = cache.get(video_path, 45, max_dimension=160)
+    cap = cv2.VideoCapture(path)
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 31
+    assert (cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (160, 90)
+    cap.release()
+
+    assert cache.lookup(video_path, 45, max_dimension=160) == path
+    # Other settings are a different clip
+    assert cache.lookup(video_path, 45) is None
+    # Clamped at the start of the video
+    assert cache.clip_range(30.0, 90, 1) == (0, 15)
+
+
+def test_background_schedule_retain_and_invalidate(tmp_path):
+    video_path = str(tmp_path / 'clip.mp4')
+    write_synthetic_video(video_path, num_frames=90, width=320, height=180, fps=30.0)
+    cache = ClipCache(str(tmp_path / 'clips'), seconds_before=0.2, seconds_after=0.2)
+
+    cache.schedule(video_path, [10, 40, 70])
+    cache.wait()
+    assert all(cache.lookup(video_path, n) for n in (10, 40, 70))
+
+    # Annotation at 40 moved away: its clip is dropped, the others stay
+    assert cache.retain(video_path, [10, 70]) == 1
+    assert cache.lookup(video_path, 40) is None
+    assert cache.invalidate(video_path, [10]) == 1
+    assert len(clip_files(cache)) == 1
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    video_path = str(tmp_path / 'clip.mp4')
+    write_synthetic_video(video_path, num_frames=90, width=320, height=180, fps=30.0)
+    cache = ClipCache(str(tmp_path / 'clips'), seconds_before=0.2, seconds_after=0.2)
+
+    first = cache.get(video_path, 10)
+    cache.max_bytes = os.path.getsize(first) * 1.5
+    cache.get(video_path, 50)
+    assert cache.lookup(video_path, 10) is None
+    assert cache.lookup(video_path, 50) is not None
+
+
+def test_shutdown_stops_the_worker_before_exit(tmp_path):
+    video_path = str(tmp_path / 'clip.mp4')
+    write_synthetic_video(video_path, num_frames=300, width=320, height=180, fps=30.0)
+    cache = ClipCache(str(tmp_path / 'clips'), seconds_before=2.0, seconds_after=2.0)
+
+    before = set(threading.enumerate())
+    cache.schedule(video_path, range(1, 300, 10))
+    time.sleep(0.3)
+    cache.shutdown()
+    assert not any(thread.name == 'clip-cache' for thread in set(threading.enumerate()) - before)
+    # Pending clips were dropped and nothing half-written is left behind
+    cache.wait()
+    assert not any('.partial' in name for name in clip_files(cache))
+    cache.schedule(video_path, [5])
+    assert cache.lookup(video_path, 5) is None
+
+    # A process that exits with clips still being cut must not abort inside OpenCV
+    script = ("import sys; sys.path.insert(0, %r); import atexit; from clip_cache import ClipCache; "
+              "cache = ClipCache(%r); atexit.register(cache.shutdown); cache.schedule(%r, range(1, 300, 10)); "
+              "import time; time.sleep(0.3)"
+              % (os.path.dirname(os.path.dirname(os.path.abspath(__file__))), str(tmp_path / 'exit'), video_path))
+    assert subprocess.run([sys.executable, '-c', script], timeout=60).returncode == 0
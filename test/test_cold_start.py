@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous enough for a loaded CI machine; importing cv2 and pandas eagerly took ~650ms here
+IMPORT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', 1500))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get('FIRST_REQUEST_BUDGET_MS', 1000))
+
+PROBE = """
+import json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+import app as app_module
+import_ms = (time.perf_counter() - start) * 1000
+heavy = sorted(name for name in ('cv2', 'pandas', 'PIL') if name in sys.modules)
+created = sorted(os.listdir(os.environ['DATA_ROOT']))
+
+client = app_module.app.test_client()
+start = time.perf_counter()
+status = client.get('/api/videos').status_code
+first_request_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({'import_ms': import_ms, 'heavy': heavy, 'created': created,
+                  'first_request_ms': first_request_ms, 'status': status,
+                  'folders': sorted(os.listdir(os.environ['DATA_ROOT']))}))
+"""
+
+
+def test_cold_import_and_first_request(tmp_path):
+    env = dict(os.environ, DATA_ROOT=str(tmp_path), FRAME_CACHE_SLOTS='0')
+    output = subprocess.run([sys.executable, '-c', PROBE, REPO], env=env, cwd=str(tmp_path),
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    # Importing the app neither loads OpenCV/pandas nor touches the disk
+    assert result['heavy'] == []
+    assert result['created'] == []
+    assert result['import_ms'] < IMPORT_BUDGET_MS
+
+    assert result['status'] == 200
+    assert {'uploads', 'data', 'csv', 'extracted_frames', 'reviewed_extracted_frames'} <= set(result['folders'])
+    assert result['first_request_ms'] < FIRST_REQUEST_BUDGET_MS
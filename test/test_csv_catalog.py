@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_catalog import CsvCatalog
+
+
+def write_csv(path, rows, new_format=False):
+    with open(path, 'w') as f:
+        if new_format:
+            f.write("Frame Number,Time (seconds),Touch_Event,Foot_Plant_Event,Timestamp\n")
+            for frame in rows:
+                f.write(f"{frame},{frame / 30:.3f},1,0,2025-07-31T10:24:10.831Z\n")
+        else:
+            f.write("Frame Number,Time (seconds),Body Part,Timestamp\n")
+            for frame in rows:
+                f.write(f"{frame},{frame / 30:.3f},Right Foot,2025-07-31T10:24:10.831Z\n")
+
+
+def test_catalog_entry_and_lazy_refresh(tmp_path):
+    csv_path = tmp_path / "drill.csv"
+    write_csv(csv_path, range(1, 11))
+
+    catalog = CsvCatalog(str(tmp_path))
+    entry = catalog.get("drill.csv")
+    assert entry['row_count'] == 10
+    assert entry['format'] == 'old'
+    assert len(entry['preview']) == 5
+
+    # Unchanged file returns the cached entry object
+    assert catalog.get("drill.csv") is entry
+
+    write_csv(csv_path, range(1, 4), new_format=True)
+    st = os.stat(csv_path)
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    entry = catalog.get("drill.csv")
+    assert entry['row_count'] == 3
+    assert entry['format'] == 'new'
+
+
+def test_catalog_names_and_missing(tmp_path):
+    catalog = CsvCatalog(str(tmp_path))
+    assert catalog.names() == set()
+    assert catalog.get("missing.csv") is None
+
+    write_csv(tmp_path / "a.csv", [1])
+    (tmp_path / "notes.txt").write_text("x")
+    catalog.invalidate()
+    assert catalog.names() == {"a.csv"}
+    assert catalog.has("a.csv")
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import csv_sidecars
+from csv_sidecars import CsvSidecars
+from synthetic_media import write_tracking_csv
+
+
+def test_npz_sidecar_round_trips_and_follows_the_csv(tmp_path):
+    path = str(tmp_path / 'match.csv')
+    pd.DataFrame({
+        'Frame Number': [1, 5, 9],
+        'Time (seconds)': [0.0, 0.133, 0.267],
+        'Body Part': ['Right Foot', None, 'Left Foot, inside'],
+        'Reviewed': [True, False, True],
+        'Note': [np.nan, np.nan, np.nan]
+    }).to_csv(path, index=False)
+    sidecars = CsvSidecars(str(tmp_path / 'sidecars'), use_feather=False)
+
+    first, from_sidecar = sidecars.read(path)
+    assert not from_sidecar
+    second, from_sidecar = sidecars.read(path)
+    assert from_sidecar
+    pd.testing.assert_frame_equal(second, pd.read_csv(path))
+    assert len(os.listdir(tmp_path / 'sidecars')) == 1
+
+    # A rewritten CSV is re-parsed once and its old sidecar removed; another worker's partial write is left alone
+    old_sidecar = os.listdir(tmp_path / 'sidecars')[0]
+    partial = tmp_path / 'sidecars' / f"{old_sidecar}.4242.1.partial"
+    partial.write_bytes(b'in progress')
+    time.sleep(0.01)
+    pd.read_csv(path).iloc[:2].to_csv(path, index=False)
+    df, from_sidecar = sidecars.read(path)
+    assert not from_sidecar and len(df) == 2
+    assert old_sidecar not in os.listdir(tmp_path / 'sidecars') and partial.exists()
+    partial.unlink()
+    assert len(os.listdir(tmp_path / 'sidecars')) == 1
+    assert sidecars.read(path)[1]
+
+    # A writer's invalidate() catches a same-size rewrite even when the timestamps did not move
+    st = os.stat(path)
+    pd.read_csv(path).replace({'Right Foot': 'Right Knee'}).to_csv(path, index=False)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    sidecars.invalidate(path)
+    df, from_sidecar = sidecars.read(path)
+    assert not from_sidecar and df['Body Part'][0] == 'Right Knee'
+
+    # Columns mixing strings and other objects are not stored; the CSV stays the source
+    assert csv_sidecars.to_arrays(pd.DataFrame({'a': ['x', 1]})) is None
+
+
+def test_app_reads_tracking_csvs_through_sidecars(app_module):
+    folder = app_module.app.config['TRACKING_CSV_FOLDER']
+    os.makedirs(folder)
+    path = write_tracking_csv(os.path.join(folder, 'drill_tracked.csv'),
+                              [(100, 200), None] * 10, [None, (10, 10, 30, 30)] * 10)
+    pd.testing.assert_frame_equal(app_module.read_csv(path), pd.read_csv(path))
+    assert os.listdir(app_module.app.config['CSV_SIDECAR_FOLDER'])[0].endswith('.npz')
+    pd.testing.assert_frame_equal(app_module.read_csv(path), pd.read_csv(path))
+    assert 'op="read_sidecar"' in app_module.metrics.registry.render()
+
+    # Annotation edits saved through write_csv are never answered from the old sidecar
+    csv_path = os.path.join(app_module.app.config['CSV_FOLDER'], 'drill.csv')
+    app_module.write_csv(pd.DataFrame({'Frame Number': [1, 2], 'Body Part': ['Head', 'Knee']}), csv_path)
+    assert app_module.read_csv(csv_path)['Body Part'].tolist() == ['Head', 'Knee']
+    app_module.write_csv(pd.DataFrame({'Frame Number': [1, 2], 'Body Part': ['Head', 'Shin']}), csv_path)
+    assert app_module.read_csv(csv_path)['Body Part'].tolist() == ['Head', 'Shin']
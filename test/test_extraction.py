@@ -8,7 +8,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 def test_frame_extraction():
     print("Testing frame extraction logic...")
     
-    csv_file = "../ingapore 7 Cone 3_annotations (2).csv"
+    csv_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "csv", "ingapore 7 Cone 3.csv")
     
     if not os.path.exists(csv_file):
         print(f"Error: CSV file not found at {csv_file}")
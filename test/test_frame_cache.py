@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+import sys
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_cache import SharedFrameCache
+
+
+def _put_from_other_process(name, payload):
+    cache = SharedFrameCache(name)
+    cache.put(('video.mp4', 10, 85), payload)
+    cache.close()
+
+
+def _get_from_other_process(name, count):
+    cache = SharedFrameCache(name)
+    for _ in range(count):
+        assert cache.get(('video.mp4', 1, 85)) == b'hot'
+    cache.close()
+
+
+def test_put_get_and_miss():
+    cache = SharedFrameCache(f"touch_test_{uuid.uuid4().hex[:8]}", slots=16, slot_size=1024)
+    try:
+        assert cache.get(('video.mp4', 1, 85)) is None
+        assert cache.put(('video.mp4', 1, 85), b'jpeg-bytes')
+        assert cache.get(('video.mp4', 1, 85)) == b'jpeg-bytes'
+        assert cache.get(('video.mp4', 1, 50)) is None
+
+        # Values larger than a slot are skipped rather than truncated
+        assert not cache.put(('video.mp4', 2, 85), b'x' * 2048)
+        assert cache.get(('video.mp4', 2, 85)) is None
+    finally:
+        cache.close()
+        cache.unlink()
+
+
+def test_eviction_keeps_cache_bounded():
+    cache = SharedFrameCache(f"touch_test_{uuid.uuid4().hex[:8]}", slots=8, slot_size=64)
+    try:
+        for frame in range(50):
+            cache.put(('video.mp4', frame, 85), bytes([frame]) * 10)
+        stats = cache.stats()
+        assert stats['used_slots'] <= 8
+        assert cache.get(('video.mp4', 49, 85)) == bytes([49]) * 10
+    finally:
+        cache.close()
+        cache.unlink()
+
+
+def test_entries_are_shared_across_processes():
+    name = f"touch_test_{uuid.uuid4().hex[:8]}"
+    cache = SharedFrameCache(name, slots=16, slot_size=1024)
+    try:
+        ctx = multiprocessing.get_context('spawn')
+        process = ctx.Process(target=_put_from_other_process, args=(name, b'from-worker'))
+        process.start()
+        process.join(30)
+        assert process.exitcode == 0
+        assert cache.get(('video.mp4', 10, 85)) == b'from-worker'
+    finally:
+        cache.close()
+        cache.unlink()
+
+
+def test_hits_refresh_lru_order_across_processes():
+    name = f"touch_test_{uuid.uuid4().hex[:8]}"
+    cache = SharedFrameCache(name, slots=8, slot_size=64)
+    lock_path = cache._lock_path
+    try:
+        for frame in range(8):
+            cache.put(('video.mp4', frame, 85), b'hot' if frame == 1 else b'cold')
+        ticks = int(cache._header[3])
+
+        # Concurrent readers must not lose tick increments
+        ctx = multiprocessing.get_context('spawn')
+        processes = [ctx.Process(target=_get_from_other_process, args=(name, 200)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+            assert process.exitcode == 0
+        assert int(cache._header[3]) == ticks + 600
+
+        # The frame that was read is the most recent one, so a new frame evicts frame 0 instead
+        cache.put(('video.mp4', 8, 85), b'new')
+        assert cache.get(('video.mp4', 1, 85)) == b'hot'
+        assert cache.get(('video.mp4', 0, 85)) is None
+    finally:
+        cache.close()
+        cache.unlink()
+    assert not os.path.exists(lock_path)
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ingest import IngestPipeline, validate_annotation_csv
+from synthetic_media import make_media_set
+
+
+def test_pipeline_runs_every_stage_once(tmp_path):
+    data_folder, csv_folder = str(tmp_path / 'data'), str(tmp_path / 'csv')
+    video_filename = make_media_set(data_folder, csv_folder, 'drill', num_frames=90, touches=5)
+    video_path = os.path.join(data_folder, video_filename)
+    pipeline = IngestPipeline(str(tmp_path / 'ingest'), csv_folder, thumbnail_count=6)
+
+    assert pipeline.status(video_path)['state'] == 'new'
+    assert pipeline.scan(data_folder, {'mp4'}) == 1
+    assert pipeline.wait()
+
+    status = pipeline.status(video_path)
+    assert status['state'] == 'done' and status['progress'] == 1.0
+    assert set(status['stages'].values()) == {'done'}
+    assert status['csv']['rows'] == 5 and status['csv']['errors'] == []
+
+    metadata = pipeline.metadata(video_path)
+    assert metadata['total_frames'] == 90 and metadata['frame_count_exact']
+    strip_path, layout = pipeline.thumbnails(video_path)
+    assert os.path.exists(strip_path)
+    assert layout['frame_numbers'][0] == 1 and layout['frame_numbers'][-1] == 90
+
+    # A fresh pipeline (another process, or after a restart) reuses the results
+    assert IngestPipeline(str(tmp_path / 'ingest'), csv_folder).scan(data_folder, {'mp4'}) == 0
+
+
+def test_shutdown_leaves_unfinished_videos_for_the_next_scan(tmp_path):
+    data_folder, csv_folder = str(tmp_path / 'data'), str(tmp_path / 'csv')
+    for name in ('first', 'second', 'third'):
+        make_media_set(data_folder, csv_folder, name, num_frames=30, touches=1)
+    pipeline = IngestPipeline(str(tmp_path / 'ingest'), csv_folder, max_workers=1)
+    assert pipeline.scan(data_folder, {'mp4'}) == 3
+    pipeline.shutdown()
+
+    # Nothing left running, no failures recorded, and a restarted pipeline finishes the rest
+    restarted = IngestPipeline(str(tmp_path / 'ingest'), csv_folder, max_workers=1)
+    videos = [os.path.join(data_folder, name) for name in sorted(os.listdir(data_folder))]
+    assert all(restarted.status(video)['state'] in ('new', 'done') for video in videos)
+    restarted.scan(data_folder, {'mp4'})
+    assert restarted.wait()
+    assert all(restarted.status(video)['state'] == 'done' for video in videos)
+
+
+def test_csv_validation_reports_problems():
+    df = pd.DataFrame({
+        'Frame Number': [1, 31, 31, 500],
+        'Time (seconds)': [0.0, 1.0, 1.0, 5.0],
+        'Touch_Event': [1, 2, 2, 1],
+        'Foot_Plant_Event': [0, 0, 0, 0]
+    })
+    report = validate_annotation_csv(df, total_frames=300, fps=30.0)
+    assert report['format'] == 'new'
+    assert report['errors'] == ['1 frame number(s) outside 1..300']
+    assert '1 duplicate frame number(s)' in report['warnings']
+    assert any('does not match' in warning for warning in report['warnings'])
+
+    report = validate_annotation_csv(pd.DataFrame({'Frame Number': [1]}), total_frames=300, fps=30.0)
+    assert report['errors'][0].startswith('Missing columns')
@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Registry
+
+
+def test_histogram_and_counter_render():
+    registry = Registry()
+    latency = registry.histogram('test_latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+    served = registry.counter('test_bytes_total', 'Bytes')
+
+    latency.observe(0.05, route='/a')
+    latency.observe(0.5, route='/a')
+    latency.observe(5, route='/a')
+    served.inc(100)
+    served.inc(28)
+
+    text = registry.render()
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+    assert 'test_bytes_total 128' in text
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    counter = registry.counter('test_total', 'Escaping', ('path',))
+    counter.inc(path='a"b\\c')
+    assert 'test_total{path="a\\"b\\\\c"} 1' in registry.render()
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+
+import cv2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_media import write_annotation_csv, write_synthetic_video
+
+
+def write_late_start_copy(source, path, skip):
+    """Second 'angle': the same footage with the first `skip` frames missing"""
+    cap = cv2.VideoCapture(source)
+    writer = None
+    index = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index >= skip:
+            if writer is None:
+                height, width = frame.shape[:2]
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 30.0, (width, height))
+            writer.write(frame)
+        index += 1
+    cap.release()
+    writer.release()
+
+
+def test_extract_multi_returns_each_instant_from_every_angle(app_module):
+    config = app_module.app.config
+    main = write_synthetic_video(os.path.join(config['DATA_FOLDER'], 'drill_main.mp4'), num_frames=120,
+                                 width=320, height=180)
+    write_late_start_copy(main, os.path.join(config['DATA_FOLDER'], 'drill_side.mp4'), 15)
+    write_annotation_csv(os.path.join(config['CSV_FOLDER'], 'drill_main.csv'), [10, 40, 100])
+    client = app_module.app.test_client()
+
+    # The side camera started recording half a second after the main one
+    response = client.post('/extract_multi', json={'videos': [
+        'drill_main.mp4', {'video_filename': 'drill_side.mp4', 'offset_seconds': -0.5}]})
+    assert response.status_code == 200
+    result = response.get_json()
+
+    assert [a['extracted_frames'] for a in result['angles']] == [3, 2]
+    assert [i['frame_number'] for i in result['instants']] == [10, 40, 100]
+    main_views, side_views = zip(*(i['angles'] for i in result['instants']))
+    assert [v['frame_number'] for v in main_views] == [10, 40, 100]
+    assert side_views[0] is None
+    assert [v['frame_number'] for v in side_views[1:]] == [25, 85]
+    assert side_views[1]['filename'] == 'angle2_frame_000025.jpg'
+    assert len(os.listdir(config['FRAMES_FOLDER'])) == 5
+
+    saved = client.post('/api/save_current_frames').get_json()
+    with open(os.path.join(saved['saved_location'], 'metadata.json')) as f:
+        metadata = json.load(f)
+    assert [a['video_filename'] for a in metadata['angles']] == ['drill_main.mp4', 'drill_side.mp4']
+    assert metadata['total_frames'] == 5
+
+    assert client.post('/extract_multi', json={'videos': ['drill_main.mp4']}).status_code == 400
+    assert client.post('/extract_multi', json={'videos': ['drill_side.mp4', 'drill_main.mp4']}).status_code == 404
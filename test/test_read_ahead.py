@@ -0,0 +1,53 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import renditions
+from read_ahead import ReadAhead
+from synthetic_media import write_synthetic_video
+
+
+def test_steady_stepping_is_served_from_read_ahead(tmp_path):
+    video_path = str(tmp_path / 'clip.mp4')
+    write_synthetic_video(video_path, num_frames=120, width=320, height=180)
+    key = (video_path, 0, 0)
+    rendition = renditions.DEFAULT_FRAME
+    read_ahead = ReadAhead(min_depth=4, max_depth=8)
+    try:
+        # No pattern after a single request
+        read_ahead.note('s', video_path, key, 10, rendition, 120)
+        assert read_ahead.get('s', key, 11, rendition) is None
+
+        for frame_idx in (11, 12):
+            read_ahead.note('s', video_path, key, frame_idx, rendition, 120)
+        assert read_ahead.wait_idle('s')
+        assert all(read_ahead.get('s', key, n, rendition) is not None for n in range(13, 17))
+        # Another session or rendition never sees these frames
+        assert read_ahead.get('other', key, 13, rendition) is None
+        assert read_ahead.get('s', key, 13, renditions.DEFAULT_FULL) is None
+
+        # Backward stepping by two
+        for frame_idx in (80, 78, 76):
+            read_ahead.note('s', video_path, key, frame_idx, rendition, 120)
+        assert read_ahead.wait_idle('s')
+        assert read_ahead.get('s', key, 74, rendition) is not None
+        assert read_ahead.get('s', key, 75, rendition) is None
+    finally:
+        read_ahead.shutdown()
+
+
+def test_seek_away_drops_the_plan(tmp_path):
+    video_path = str(tmp_path / 'clip.mp4')
+    write_synthetic_video(video_path, num_frames=120, width=320, height=180)
+    key = (video_path, 0, 0)
+    read_ahead = ReadAhead()
+    try:
+        for frame_idx in (10, 11, 12, 100):
+            read_ahead.note('s', video_path, key, frame_idx, renditions.DEFAULT_FRAME, 120)
+        assert read_ahead._sessions['s'].plan == []
+        read_ahead.stop('s')
+        assert read_ahead.stats()['sessions'] == 0
+    finally:
+        read_ahead.shutdown()
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import renditions
+
+
+def test_parse_rendition_merges_and_validates():
+    rendition = renditions.parse_rendition({'format': 'webp', 'max_dimension': 640}, renditions.DEFAULT_FULL)
+    assert rendition == {'format': 'webp', 'quality': 90, 'max_dimension': 640}
+    assert renditions.parse_rendition(None, renditions.DEFAULT_FRAME) == renditions.DEFAULT_FRAME
+    assert renditions.parse_rendition({'format': 'JPG'}, renditions.DEFAULT_FULL)['format'] == 'jpeg'
+
+    with pytest.raises(ValueError):
+        renditions.parse_rendition({'format': 'gif'}, renditions.DEFAULT_FULL)
+    with pytest.raises(ValueError):
+        renditions.parse_rendition({'quality': 0}, renditions.DEFAULT_FULL)
+    with pytest.raises(ValueError):
+        renditions.parse_rendition({'max_dimension': 4}, renditions.DEFAULT_FULL)
+
+
+@pytest.mark.parametrize('fmt', ['jpeg', 'webp', 'png'])
+def test_encode_downscales_to_max_dimension(fmt):
+    frame = np.random.default_rng(0).integers(0, 255, (2160, 3840, 3), dtype=np.uint8)
+    data = renditions.encode(frame, {'format': fmt, 'quality': 80, 'max_dimension': 960})
+
+    decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    assert decoded.shape == (540, 960, 3)
+
+
+def test_encode_never_upscales():
+    frame = np.zeros((360, 640, 3), dtype=np.uint8)
+    data = renditions.encode(frame, {'format': 'jpeg', 'quality': 80, 'max_dimension': 1920})
+    assert cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR).shape == (360, 640, 3)
+
+
+def test_crop_is_applied_before_downscaling_and_keyed_separately():
+    frame = np.zeros((360, 640, 3), dtype=np.uint8)
+    base = {'format': 'png', 'quality': 80, 'max_dimension': 100}
+    rendition = renditions.cropped(base, (40, 20, 200, 120))
+    data = renditions.encode(frame, rendition)
+    assert cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR).shape == (60, 100, 3)
+    assert renditions.rendition_key(rendition) != renditions.rendition_key(base)
+    assert renditions.cropped(renditions.DEFAULT_FULL, None) is renditions.DEFAULT_FULL
@@ -0,0 +1,85 @@
+import base64
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from segment_pins import SegmentPins
+from synthetic_media import make_media_set, write_synthetic_video
+
+
+def video_key(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def test_pinned_frames_match_decoded_frames(tmp_path):
+    video_path = str(tmp_path / 'clip.mp4')
+    write_synthetic_video(video_path, num_frames=60, width=320, height=180)
+    pins = SegmentPins(str(tmp_path / 'pins'))
+    key = video_key(video_path)
+
+    segment = pins.pin(video_path, key, 10, 30)
+    assert (segment['start_frame'], segment['end_frame'], segment['frames']) == (10, 30, 21)
+    assert pins.covers(key, 12, 30) and not pins.covers(key, 5, 12)
+    assert pins.frame(key, 9) is None and pins.frame(key, 31) is None
+
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 25)
+    _, decoded = cap.read()
+    cap.release()
+    assert np.array_equal(pins.frame(key, 25), decoded)
+
+    assert pins.unpin(key, 0, 5) == 0
+    assert pins.unpin(key) == 1
+    assert pins.frame(key, 25) is None
+
+
+def test_downscaled_pin_and_limits(tmp_path):
+    video_path = str(tmp_path / 'clip.mp4')
+    write_synthetic_video(video_path, num_frames=40, width=320, height=180)
+    key = video_key(video_path)
+
+    pins = SegmentPins(str(tmp_path / 'pins'), max_frames=20)
+    assert pins.frame(key, 0) is None
+    assert pins.pin(video_path, key, 0, 9, max_dimension=160)['width'] == 160
+    assert pins.frame(key, 5).shape == (90, 160, 3)
+    # Source-size callers never get the downscaled pin; a full-size pin of the same range is its own file
+    assert pins.frame(key, 5, (180, 320)) is None and not pins.covers(key, 0, 9, (180, 320))
+    assert pins.pin(video_path, key, 0, 9)['width'] == 320
+    assert pins.frame(key, 5, (180, 320)).shape == (180, 320, 3)
+    assert pins.frame(key, 5, (90, 160)).shape == (90, 160, 3)
+    assert pins.unpin(key) == 2
+    pins.pin(video_path, key, 0, 9, max_dimension=160)
+    with pytest.raises(ValueError):
+        pins.pin(video_path, key, 0, 39)
+
+    # A new pin that does not fit evicts the oldest one
+    pins.max_bytes = 15 * 90 * 160 * 3
+    pins.pin(video_path, key, 20, 29, max_dimension=160)
+    assert pins.frame(key, 5) is None
+    assert pins.frame(key, 25) is not None
+
+
+def test_downscaled_pin_never_stands_in_for_full_frames(app_module):
+    config = app_module.app.config
+    video_filename = make_media_set(config['DATA_FOLDER'], config['CSV_FOLDER'], 'pinned', num_frames=90, touches=3)
+    client = app_module.app.test_client()
+    pin = client.post('/api/pin_segment', json={'video_filename': video_filename, 'start_frame': 0,
+                                               'end_frame': 89, 'max_dimension': 160})
+    assert pin.get_json()['segment']['width'] == 160
+
+    result = client.post('/extract', json={'video_filename': video_filename}).get_json()
+    image = cv2.imread(os.path.join(config['FRAMES_FOLDER'], result['frames'][0]['filename']))
+    assert image.shape == (360, 640, 3)
+
+    client.post('/api/load_data_video', json={'video_filename': video_filename})
+    for query, shape in (('', (360, 640, 3)), ('?max_dimension=160', (90, 160, 3))):
+        data = client.get(f'/get_frame/10{query}').get_json()['frame'].split(',', 1)[1]
+        decoded = cv2.imdecode(np.frombuffer(base64.b64decode(data), np.uint8), cv2.IMREAD_COLOR)
+        assert decoded.shape == shape
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_index import SessionIndex
+
+
+def write_session(reviewed, session_id, video, saved, frames):
+    os.makedirs(os.path.join(reviewed, session_id), exist_ok=True)
+    with open(os.path.join(reviewed, session_id, 'metadata.json'), 'w') as f:
+        json.dump({
+            'session_id': session_id,
+            'video_filename': video,
+            'extraction_timestamp': saved,
+            'saved_timestamp': saved,
+            'total_frames': frames,
+            'frame_files': [f"frame_{i:06d}.jpg" for i in range(frames)]
+        }, f)
+
+
+def test_query_filters_and_paginates(tmp_path):
+    reviewed = str(tmp_path / 'reviewed')
+    write_session(reviewed, 'a', 'Drill_1.mp4', '2024-05-01T10:00:00', 12)
+    write_session(reviewed, 'b', 'drill_2.mp4', '2024-05-03T23:30:00', 40)
+    write_session(reviewed, 'c', 'match.mp4', '2024-06-10T08:00:00', 5)
+    index = SessionIndex(str(tmp_path / 'sessions.db'), reviewed)
+    assert sorted(index.sync()) == ['a', 'b', 'c']
+
+    sessions, total = index.query()
+    assert total == 3
+    assert [s['session_id'] for s in sessions] == ['c', 'b', 'a']
+    assert 'frame_files' not in sessions[0]
+
+    sessions, total = index.query(video='drill')
+    assert total == 2
+    sessions, _ = index.query(date_from='2024-05-02', date_to='2024-05-03')
+    assert [s['session_id'] for s in sessions] == ['b']
+    sessions, _ = index.query(min_frames=10, max_frames=20)
+    assert [s['session_id'] for s in sessions] == ['a']
+    sessions, total = index.query(limit=1, offset=1)
+    assert total == 3 and [s['session_id'] for s in sessions] == ['b']
+
+
+def test_sync_rereads_only_changed_sessions(tmp_path):
+    reviewed = str(tmp_path / 'reviewed')
+    write_session(reviewed, 'a', 'drill.mp4', '2024-05-01T10:00:00', 12)
+    write_session(reviewed, 'b', 'drill.mp4', '2024-05-02T10:00:00', 8)
+    index = SessionIndex(str(tmp_path / 'sessions.db'), reviewed)
+    index.sync()
+    assert index.sync() == []
+
+    write_session(reviewed, 'b', 'drill.mp4', '2024-05-02T10:00:00', 30)
+    os.makedirs(os.path.join(reviewed, '.batch-123'))
+    os.remove(os.path.join(reviewed, 'a', 'metadata.json'))
+    assert index.sync() == ['b']
+    sessions, total = index.query()
+    assert total == 1 and sessions[0]['total_frames'] == 30
+
+    # A fresh instance on the same database keeps what was indexed
+    assert SessionIndex(str(tmp_path / 'sessions.db'), reviewed).sync() == []
@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from touch_analytics import TouchAnalytics
+
+NEW_CSV = """Frame Number,Time (seconds),Touch_Event,Foot_Plant_Event,Timestamp,Player
+31,1.0,1,0,2025-07-31T10:24:10.831Z,p1
+61,2.0,2,0,2025-07-31T10:24:11.831Z,p1
+76,2.5,0,1,2025-07-31T10:24:12.831Z,p1
+91,3.0,1,0,2025-07-31T10:24:13.831Z,p2
+"""
+
+OLD_CSV = """Frame Number,Time (seconds),Body Part,Timestamp
+10,0.5,Right Foot,2025-07-31T10:24:10.831Z
+20,1.0,Right Foot,2025-07-31T10:24:11.831Z
+"""
+
+
+def test_video_player_and_corpus_stats(tmp_path):
+    (tmp_path / 'a.csv').write_text(NEW_CSV)
+    (tmp_path / 'b.csv').write_text(OLD_CSV)
+    analytics = TouchAnalytics(str(tmp_path))
+
+    report = analytics.report()
+    assert report['recomputed'] == ['a.csv', 'b.csv']
+
+    a = report['videos']['a']
+    assert a['touches'] == {'total': 3, 'right': 2, 'left': 1, 'other': 0}
+    assert a['foot_plants']['right'] == 1
+    assert a['plant_to_touch_ratio'] == round(1 / 3, 4)
+    assert a['inter_touch_interval']['mean'] == 1.0
+    assert a['touch_rate_per_second'] == 1.0
+    assert a['same_foot_interval']['right']['median'] == 2.0
+
+    assert report['players']['p1']['touches']['total'] == 2
+    assert report['corpus']['touches']['total'] == 5
+    assert report['corpus']['inter_touch_interval']['count'] == 3
+
+
+def test_only_changed_csvs_are_recomputed(tmp_path):
+    (tmp_path / 'a.csv').write_text(NEW_CSV)
+    (tmp_path / 'b.csv').write_text(OLD_CSV)
+    analytics = TouchAnalytics(str(tmp_path))
+    analytics.report()
+
+    assert analytics.report()['recomputed'] == []
+
+    (tmp_path / 'b.csv').write_text(OLD_CSV + "30,1.5,Left Foot,2025-07-31T10:24:12.831Z\n")
+    st = os.stat(tmp_path / 'b.csv')
+    os.utime(tmp_path / 'b.csv', ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    report = analytics.report(video='b')
+    assert report['recomputed'] == ['b.csv']
+    assert list(report['videos']) == ['b']
+    assert report['videos']['b']['touches']['left'] == 1
@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from synthetic_media import make_media_set
+
+
+def test_merge_windows_clamps_and_merges():
+    assert app.merge_windows([2, 10, 12, 40], 3, 3, 42) == [[0, 5], [7, 15], [37, 41]]
+    # Adjacent windows are merged too, out-of-range centers are ignored
+    assert app.merge_windows([5, 12, 99], 2, 4, 50) == [[3, 16]]
+
+
+def test_extract_windows_groups_frames_per_touch(app_module):
+    video_filename = make_media_set(app_module.app.config['DATA_FOLDER'], app_module.app.config['CSV_FOLDER'],
+                                    'windows', num_frames=120, touches=4)
+    client = app_module.app.test_client()
+
+    response = client.post('/extract_windows', json={'video_filename': video_filename,
+                                                      'frames_before': 2, 'frames_after': 3})
+    assert response.status_code == 200
+    result = response.get_json()
+
+    numbers = [frame['frame_number'] for frame in result['frames']]
+    assert numbers == sorted(set(numbers))
+    assert result['total_frames'] == len(numbers)
+    for touch in result['touches']:
+        # Windows are clamped at the start and end of the video
+        first, last = max(1, touch['frame_number'] - 2), min(120, touch['frame_number'] + 3)
+        assert touch['offsets'] == list(range(first - touch['frame_number'], last - touch['frame_number'] + 1))
+        assert touch['frame_numbers'] == [touch['frame_number'] + o for o in touch['offsets']]
+        assert set(touch['frame_numbers']) <= set(numbers)
+    assert sum(frame['is_touch'] for frame in result['frames']) == len(result['touches'])
+    assert all(os.path.exists(os.path.join(app_module.app.config['FRAMES_FOLDER'], frame['filename']))
+               for frame in result['frames'])
+
+    bad = client.post('/extract_windows', json={'video_filename': video_filename, 'window': 'wide'})
+    assert bad.status_code == 400
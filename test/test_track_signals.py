@@ -0,0 +1,73 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tracking
+import track_signals
+from synthetic_media import write_tracking_csv
+
+
+def test_signals_follow_feet_and_ball(tmp_path):
+    # Feet walk right at 2px per frame, lift 12px at frame 31; the ball sits 40px right of the feet
+    feet = [(100 + 2 * i, 300 - (12 if i == 30 else 0)) for i in range(60)]
+    balls = [(130 + 2 * i, 290, 150 + 2 * i, 310) for i in range(60)]
+    feet[45] = balls[45] = None
+    path = write_tracking_csv(str(tmp_path / 'walk.csv'), feet, balls)
+
+    signals = tracking.compute_signals(pd.read_csv(path))
+    assert {name: len(values) for name, values in signals.items()} == {name: 60 for name in track_signals.SIGNALS}
+    assert np.isnan(signals['foot_speed'][0]) and signals['foot_speed'][10] == 60.0
+    assert signals['foot_height'][30] == 12 and signals['foot_height'][10] == 0
+    # The nearer (right) foot averages 5px right of the feet centre, the ball centre is 40px right
+    assert signals['ball_distance'][10] == 35
+    assert all(np.isnan(values[45]) for values in signals.values())
+
+
+def test_pyramid_query_matches_brute_force():
+    rng = np.random.default_rng(3)
+    values = rng.random(10007).astype(np.float32)
+    values[rng.random(len(values)) < 0.05] = np.nan
+    levels = track_signals.build_pyramid(values)
+
+    for start, end, width in [(0, 10006, 300), (17, 9000, 123), (40, 60, 50)]:
+        edges, mins, maxs, bucket = track_signals.query_pyramid(levels, start, end, width)
+        assert len(edges) == len(mins) == min(width, end - start + 1)
+        # Columns are the buckets between rounded edges
+        bounds = [edge // bucket * bucket for edge in edges] + [(end // bucket + 1) * bucket]
+        columns = [values[bounds[i]:bounds[i + 1]] for i in range(len(edges))]
+        np.testing.assert_array_equal(mins, [np.fmin.reduce(column) for column in columns])
+        np.testing.assert_array_equal(maxs, [np.fmax.reduce(column) for column in columns])
+
+
+def test_tracks_route(app_module, monkeypatch):
+    folder = app_module.app.config['TRACKING_CSV_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    feet = [(100 + i % 50, 300) for i in range(3000)]
+    write_tracking_csv(os.path.join(folder, 'match_rtmpose_20250101_000000.csv'), feet, [None] * 3000)
+    client = app_module.app.test_client()
+
+    body = client.get('/api/tracks?video=match.mp4&width=200').get_json()
+    assert body['tracking_csv'] == 'match_rtmpose_20250101_000000.csv'
+    assert body['total_frames'] == 3000 and body['bucket_frames'] == 8 and len(body['frames']) == 200
+    speed = body['signals']['foot_speed']
+    assert len(speed['min']) == len(speed['max']) == 200 and max(speed['max']) == 1470.0
+    assert body['signals']['ball_distance']['max'] == [None] * 200
+
+    zoomed = client.get('/api/tracks?video=match.mp4&signals=foot_speed&start_frame=101&end_frame=150&width=200')
+    body = zoomed.get_json()
+    assert list(body['signals']) == ['foot_speed'] and body['frames'] == list(range(101, 151))
+
+    # Computed once per tracking file version
+    def fail(*args, **kwargs):
+        raise AssertionError('signals recomputed')
+    monkeypatch.setattr(tracking, 'compute_signals', fail)
+    assert client.get('/api/tracks?video=match.mp4&width=10').status_code == 200
+
+    assert client.get('/api/tracks?video=other.mp4').status_code == 404
+    assert client.get('/api/tracks?video=match.mp4&signals=heart_rate').status_code == 400
+    assert client.get('/api/tracks?video=match.mp4&width=0').status_code == 400
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tracking
+from synthetic_media import make_media_set, write_tracking_csv
+
+
+def test_crop_boxes_fill_gaps_and_stay_inside_the_frame(tmp_path):
+    feet = [(100 + i, 300) for i in range(60)]
+    balls = [(130 + i, 310, 150 + i, 330) for i in range(60)]
+    for i in range(20, 30):
+        feet[i] = balls[i] = None
+    path = write_tracking_csv(str(tmp_path / 'drill_rtmpose_20250101_000000.csv'), feet, balls)
+    assert tracking.find_tracking_csv(str(tmp_path), 'drill.mp4') == path
+    assert tracking.find_tracking_csv(str(tmp_path), 'other.mp4') is None
+
+    boxes = tracking.crop_boxes(pd.read_csv(path), 80, 640, 360, padding=0.5, min_size=64, smooth=1)
+    assert boxes.shape == (80, 4)
+    # Feet (x-10..x+10) and ball (x+30..x+50) padded by half their extent on each side
+    x, y, width, height = boxes[0]
+    assert (width, height) == (90, 64) and x == 75
+    # The untracked gap is interpolated, frames after the last row hold the last box
+    assert abs(boxes[25, 0] - boxes[0, 0] - 25) <= 1
+    assert (boxes[79] == boxes[59]).all()
+    # Boxes near the bottom edge are shifted up, not cut
+    assert (boxes[:, 1] + boxes[:, 3] <= 360).all()
+
+    empty = write_tracking_csv(str(tmp_path / 'empty.csv'), [None] * 10, [None] * 10)
+    assert tracking.crop_boxes(pd.read_csv(empty), 10, 640, 360) is None
+
+
+def test_roi_extraction_crops_frames_and_keeps_full_frame(app_module):
+    config = app_module.app.config
+    video_filename = make_media_set(config['DATA_FOLDER'], config['CSV_FOLDER'], 'roi', num_frames=90, touches=3)
+    client = app_module.app.test_client()
+    payload = {'video_filename': video_filename, 'roi': {'min_size': 96}}
+    assert client.post('/extract', json=payload).status_code == 404
+
+    os.makedirs(config['TRACKING_CSV_FOLDER'])
+    write_tracking_csv(os.path.join(config['TRACKING_CSV_FOLDER'], 'roi_tracked.csv'),
+                       [(300, 270)] * 90, [(320, 252, 356, 288)] * 90)
+    response = client.post('/extract', json=payload)
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['session_info']['roi']['tracking_csv'] == 'roi_tracked.csv'
+
+    frame = result['frames'][0]
+    x, y, width, height = frame['crop']
+    assert width * height < 640 * 360 / 4
+    image = cv2.imread(os.path.join(config['FRAMES_FOLDER'], frame['filename']))
+    assert image.shape == (height, width, 3)
+
+    assert frame['full_frame_url'].startswith(f"/frame_full/{video_filename}/")
+    full = client.get(frame['full_frame_url'])
+    assert full.status_code == 200 and full.mimetype == 'image/jpeg'
+    assert cv2.imdecode(np.frombuffer(full.data, np.uint8), cv2.IMREAD_COLOR).shape == (360, 640, 3)
+
+    windows = client.post('/extract_windows', json={**payload, 'window': 1}).get_json()
+    assert all(f['crop'] == frame['crop'] for f in windows['frames'])
+    # The link stays valid once another extraction has replaced the current session
+    other = make_media_set(config['DATA_FOLDER'], config['CSV_FOLDER'], 'other', num_frames=30, touches=1)
+    assert client.post('/extract', json={'video_filename': other}).status_code == 200
+    again = client.get(frame['full_frame_url'])
+    assert again.status_code == 200 and again.data == full.data
+    assert client.get(f"/frame_full/{video_filename}/1?quality=900").status_code == 400
+    assert client.get('/frame_full/missing.mp4/1').status_code == 404
+    assert client.post('/extract', json={**payload, 'roi': {'padding': -1}}).status_code == 400
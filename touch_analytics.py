@@ -0,0 +1,180 @@
+"""Per-video and per-player touch statistics computed with vectorized NumPy.
+
+Aggregates are cached per CSV and keyed by the file's (mtime, size), so a query
+over the whole csv/ folder only recomputes the videos whose CSV changed since
+the previous query.
+"""
+import os
+import threading
+
+import numpy as np
+
+from csv_catalog import detect_csv_format, read_csv
+
+PLAYER_COLUMN = 'Player'
+
+
+def classify_events(df):
+    """Vectorized (is_touch, is_plant, foot) arrays for either CSV layout"""
+    import pandas as pd
+    n = len(df)
+    if detect_csv_format(df.columns) == 'new':
+        touch = pd.to_numeric(df['Touch_Event'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        plant = pd.to_numeric(df['Foot_Plant_Event'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        is_touch = touch > 0
+        is_plant = (plant > 0) & ~is_touch
+        code = np.where(is_touch, touch, plant)
+        foot = np.where(code == 1, 'right', np.where(code == 2, 'left', 'other'))
+    else:
+        event = (df['Event Type'].fillna('ball_touch') if 'Event Type' in df.columns
+                 else pd.Series(['ball_touch'] * n, index=df.index)).to_numpy(dtype=object)
+        body_part = (df['Body Part'].fillna('') if 'Body Part' in df.columns
+                     else pd.Series([''] * n, index=df.index)).to_numpy(dtype=object)
+        is_touch = event == 'ball_touch'
+        is_plant = np.isin(event, ['foot_touchdown', 'foot_liftoff'])
+        foot = np.where(body_part == 'Right Foot', 'right', np.where(body_part == 'Left Foot', 'left', 'other'))
+    return is_touch, is_plant, foot
+
+
+def interval_stats(intervals):
+    if len(intervals) == 0:
+        return {'count': 0, 'mean': None, 'median': None, 'std': None, 'min': None, 'max': None,
+                'p10': None, 'p90': None}
+    p10, median, p90 = np.percentile(intervals, [10, 50, 90])
+    return {
+        'count': int(len(intervals)),
+        'mean': round(float(intervals.mean()), 4),
+        'median': round(float(median), 4),
+        'std': round(float(intervals.std()), 4),
+        'min': round(float(intervals.min()), 4),
+        'max': round(float(intervals.max()), 4),
+        'p10': round(float(p10), 4),
+        'p90': round(float(p90), 4)
+    }
+
+
+def summarize_events(times, is_touch, is_plant, foot):
+    """Touch statistics for one group of events; `times` must be sorted ascending"""
+    touch_times = times[is_touch]
+    touch_feet = foot[is_touch]
+    intervals = np.diff(touch_times)
+    span = float(touch_times[-1] - touch_times[0]) if len(touch_times) > 1 else 0.0
+
+    same_foot = {}
+    for side in ('right', 'left'):
+        same_foot[side] = interval_stats(np.diff(touch_times[touch_feet == side]))
+
+    touches = int(is_touch.sum())
+    plants = int(is_plant.sum())
+    return {
+        'touches': {
+            'total': touches,
+            'right': int((touch_feet == 'right').sum()),
+            'left': int((touch_feet == 'left').sum()),
+            'other': int((touch_feet == 'other').sum())
+        },
+        'foot_plants': {
+            'total': plants,
+            'right': int((foot[is_plant] == 'right').sum()),
+            'left': int((foot[is_plant] == 'left').sum())
+        },
+        'plant_to_touch_ratio': round(plants / touches, 4) if touches else None,
+        'touch_span_seconds': round(span, 3),
+        'touch_rate_per_second': round((touches - 1) / span, 4) if span > 0 else None,
+        'inter_touch_interval': interval_stats(intervals),
+        'same_foot_interval': same_foot,
+        # Raw arrays kept for pooling across videos; stripped from API responses
+        '_touch_intervals': intervals
+    }
+
+
+def compute_video_stats(df):
+    """Statistics for one annotation CSV, plus per-player groups when a Player column exists"""
+    df = df.dropna(subset=['Time (seconds)'])
+    order = np.argsort(df['Time (seconds)'].to_numpy(dtype=float), kind='stable')
+    df = df.iloc[order]
+    times = df['Time (seconds)'].to_numpy(dtype=float)
+    is_touch, is_plant, foot = classify_events(df)
+
+    stats = summarize_events(times, is_touch, is_plant, foot)
+    stats['annotations'] = int(len(df))
+
+    players = {}
+    if PLAYER_COLUMN in df.columns:
+        player_ids = df[PLAYER_COLUMN].astype(str).to_numpy()
+        for player in np.unique(player_ids):
+            mask = player_ids == player
+            players[player] = summarize_events(times[mask], is_touch[mask], is_plant[mask], foot[mask])
+    stats['_players'] = players
+    return stats
+
+
+def public(stats):
+    return {k: v for k, v in stats.items() if not k.startswith('_')}
+
+
+def pool(groups):
+    """Combine several per-group stats without going back to the CSVs"""
+    touches = {k: sum(g['touches'][k] for g in groups) for k in ('total', 'right', 'left', 'other')}
+    plants = {k: sum(g['foot_plants'][k] for g in groups) for k in ('total', 'right', 'left')}
+    intervals = np.concatenate([g['_touch_intervals'] for g in groups]) if groups else np.array([])
+    span = sum(g['touch_span_seconds'] for g in groups)
+    rate_touches = sum(max(g['touches']['total'] - 1, 0) for g in groups)
+    return {
+        'groups': len(groups),
+        'touches': touches,
+        'foot_plants': plants,
+        'plant_to_touch_ratio': round(plants['total'] / touches['total'], 4) if touches['total'] else None,
+        'touch_span_seconds': round(span, 3),
+        'touch_rate_per_second': round(rate_touches / span, 4) if span > 0 else None,
+        'inter_touch_interval': interval_stats(intervals)
+    }
+
+
+class TouchAnalytics:
+    def __init__(self, csv_folder, reader=read_csv):
+        self.csv_folder = csv_folder
+        self.reader = reader
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def refresh(self):
+        """Recompute stats for new or changed CSVs only; returns the recomputed filenames"""
+        on_disk = {}
+        if os.path.isdir(self.csv_folder):
+            for entry in os.scandir(self.csv_folder):
+                if entry.is_file() and entry.name.lower().endswith('.csv'):
+                    st = entry.stat()
+                    on_disk[entry.name] = (st.st_mtime_ns, st.st_size)
+
+        recomputed = []
+        with self._lock:
+            for name in set(self._cache) - set(on_disk):
+                del self._cache[name]
+            for name, version in on_disk.items():
+                cached = self._cache.get(name)
+                if cached and cached[0] == version:
+                    continue
+                df = self.reader(os.path.join(self.csv_folder, name))
+                self._cache[name] = (version, compute_video_stats(df))
+                recomputed.append(name)
+        return recomputed
+
+    def report(self, video=None):
+        recomputed = self.refresh()
+        with self._lock:
+            items = {os.path.splitext(name)[0]: stats for name, (_, stats) in self._cache.items()}
+        if video is not None:
+            items = {k: v for k, v in items.items() if k == video}
+
+        players = {}
+        for stats in items.values():
+            for player, player_stats in stats['_players'].items():
+                players.setdefault(player, []).append(player_stats)
+
+        return {
+            'videos': {name: public(stats) for name, stats in sorted(items.items())},
+            'players': {player: pool(groups) for player, groups in sorted(players.items())},
+            'corpus': pool(list(items.values())),
+            'recomputed': sorted(recomputed)
+        }
@@ -0,0 +1,136 @@
+"""Timeline tracks: per-frame tracking signals served at the resolution the timeline can show.
+
+Signals (see tracking.compute_signals) are computed once per tracking file
+version and kept as a min/max decimation pyramid: level 0 holds the frame
+values, level k the minimum and maximum of each run of 2**k frames, built by
+pairing up level k-1. A query for `width` pixel columns over a frame range
+picks the finest level whose buckets are no wider than a column and folds
+its buckets into exactly one (min, max) pair per column, so even a
+full-match track costs O(width) per request rather than O(frames).
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import tracking
+from csv_catalog import read_csv
+
+SIGNALS = ('foot_speed', 'foot_height', 'ball_distance')
+UNITS = {'foot_speed': 'px/s', 'foot_height': 'px', 'ball_distance': 'px'}
+# Tracking files whose pyramids stay in memory (~50 bytes per frame each)
+KEEP_FILES = 8
+
+
+def build_pyramid(values):
+    """[(mins, maxs), ...] from the frame values up to a single bucket; NaN buckets had no data"""
+    values = np.asarray(values, dtype=np.float32)
+    levels = [(values, values)]
+    while len(levels[-1][0]) > 1:
+        mins, maxs = levels[-1]
+        if len(mins) % 2:
+            mins = np.append(mins, np.float32(np.nan))
+            maxs = np.append(maxs, np.float32(np.nan))
+        levels.append((np.fmin.reduce(mins.reshape(-1, 2), axis=1), np.fmax.reduce(maxs.reshape(-1, 2), axis=1)))
+    return levels
+
+
+def query_pyramid(levels, start, end, width):
+    """(first frame index of each column, mins, maxs, bucket frames) for 0-based frames start..end inclusive
+
+    Ranges no wider than `width` come back frame by frame (min == max).
+    Column edges are rounded to the chosen level's buckets, which are at most
+    one column wide.
+    """
+    frames = end - start + 1
+    if frames <= width:
+        values = levels[0][0][start:end + 1]
+        return np.arange(start, end + 1), values, values, 1
+    level = min(int(np.log2(frames / width)), len(levels) - 1)
+    bucket = 1 << level
+    # Each column spans at least `bucket` frames, so the bucket indices strictly increase
+    edges = start + np.arange(width, dtype=np.int64) * frames // width
+    first = edges[0] // bucket
+    offsets = edges // bucket - first
+    mins, maxs = levels[level]
+    mins = np.fmin.reduceat(mins[first:end // bucket + 1], offsets)
+    maxs = np.fmax.reduceat(maxs[first:end // bucket + 1], offsets)
+    return edges, mins, maxs, bucket
+
+
+def as_json(values):
+    """Rounded floats with NaN as None"""
+    return [None if v != v else round(v, 2) for v in values.tolist()]
+
+
+class TrackSignals:
+    """Signal pyramids per tracking CSV, rebuilt only when the file changes"""
+
+    def __init__(self, folder, reader=read_csv, keep=KEEP_FILES):
+        self.folder = folder
+        self.reader = reader
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._file_locks = {}
+        self._pyramids = OrderedDict()
+
+    def tracking_csv(self, video_filename):
+        return tracking.find_tracking_csv(self.folder, video_filename)
+
+    def get(self, tracking_path):
+        """{'fps', 'frames', 'levels': {signal: pyramid}} for the file's current version"""
+        st = os.stat(tracking_path)
+        version = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._pyramids.get(tracking_path)
+            if cached is not None and cached[0] == version:
+                self._pyramids.move_to_end(tracking_path)
+                return cached[1]
+            file_lock = self._file_locks.setdefault(tracking_path, threading.Lock())
+
+        with file_lock:
+            with self._lock:
+                cached = self._pyramids.get(tracking_path)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            df = self.reader(tracking_path)
+            fps = tracking.tracking_fps(df)
+            signals = tracking.compute_signals(df, fps)
+            entry = {
+                'fps': fps,
+                'frames': len(signals[SIGNALS[0]]),
+                'levels': {name: build_pyramid(signals[name]) for name in SIGNALS}
+            }
+            with self._lock:
+                self._pyramids[tracking_path] = (version, entry)
+                self._pyramids.move_to_end(tracking_path)
+                while len(self._pyramids) > self.keep:
+                    self._pyramids.popitem(last=False)
+            return entry
+
+    def query(self, tracking_path, signals, start_frame, end_frame, width):
+        """Columns of the named signals over 1-based frames start_frame..end_frame (clamped to the track)"""
+        entry = self.get(tracking_path)
+        end_frame = min(end_frame, entry['frames'])
+        result = {
+            'fps': entry['fps'],
+            'total_frames': entry['frames'],
+            'start_frame': start_frame,
+            'end_frame': end_frame,
+            'width': width,
+            'signals': {}
+        }
+        if start_frame > end_frame:
+            result['bucket_frames'] = 1
+            result['frames'] = []
+            for name in signals:
+                result['signals'][name] = {'unit': UNITS[name], 'min': [], 'max': []}
+            return result
+
+        for name in signals:
+            edges, mins, maxs, bucket = query_pyramid(entry['levels'][name], start_frame - 1, end_frame - 1, width)
+            result['signals'][name] = {'unit': UNITS[name], 'min': as_json(mins), 'max': as_json(maxs)}
+        result['bucket_frames'] = bucket
+        result['frames'] = (edges + 1).tolist()
+        return result
@@ -0,0 +1,215 @@
+"""Tracking CSVs (pose keypoints and detected objects per frame) and the ROI crop boxes derived from them.
+
+A video's tracking file lives in tracking_csv/ and starts with the video's base
+name, e.g. `Triple cone turn 7_rtmpose_rfdetr_tracked_smoothed_<time>.csv` for
+`Triple cone turn 7.mp4`. Each row has `frame_id` (1-based), keypoints
+`kp_<i>_x/_y/_confidence` in the Halpe-26 layout and `objects_detected` as
+`label:confidence:x1,y1,x2,y2` entries joined with `|`.
+
+Per-frame signals for the timeline (foot speed, foot height, ball distance)
+are computed from the same keypoints and detections.
+
+Crop boxes cover the player's ankles and feet plus the ball. Raw per-frame
+boxes are gap-filled, smoothed over time so the crop does not jitter, padded,
+and shifted (not squeezed) to stay inside the frame; boxes are cached per
+tracking file version and parameters.
+"""
+import os
+import re
+import threading
+
+import numpy as np
+
+from csv_catalog import read_csv
+
+# Ankles (15, 16) and the six foot keypoints (20-25) of the Halpe-26 layout
+FOOT_KEYPOINTS = (15, 16, 20, 21, 22, 23, 24, 25)
+LEFT_FOOT_KEYPOINTS = (15, 20, 22, 24)
+RIGHT_FOOT_KEYPOINTS = (16, 21, 23, 25)
+BALL_LABELS = ('football', 'sports ball', 'ball')
+MIN_KEYPOINT_CONFIDENCE = 0.3
+MIN_OBJECT_CONFIDENCE = 0.3
+
+DEFAULT_PADDING = 0.5
+DEFAULT_MIN_SIZE = 160
+SMOOTH_FRAMES = 15
+
+BALL_PATTERN = re.compile(r'(?:^|\|)(?:%s):([-\d.]+):([-\d.]+),([-\d.]+),([-\d.]+),([-\d.]+)'
+                          % '|'.join(re.escape(label) for label in BALL_LABELS))
+
+
+def find_tracking_csv(folder, video_filename):
+    """Newest tracking CSV in `folder` named after the video (`<base>.csv` or `<base>_*.csv`), else None"""
+    base_name = os.path.splitext(video_filename)[0]
+    try:
+        names = os.listdir(folder)
+    except FileNotFoundError:
+        return None
+    matches = [name for name in names
+               if name.lower().endswith('.csv') and (name == f"{base_name}.csv" or name.startswith(f"{base_name}_"))]
+    if not matches:
+        return None
+    # Names end with the tracking run's timestamp, so the last one is the newest run
+    return os.path.join(folder, max(matches))
+
+
+def foot_boxes(df):
+    """(x1, y1, x2, y2) around the confident ankle/foot keypoints of each row; NaN where there are none"""
+    columns = [f"kp_{i}" for i in FOOT_KEYPOINTS if f"kp_{i}_x" in df.columns]
+    boxes = np.full((len(df), 4), np.nan)
+    if not columns:
+        return boxes
+    xs = df[[f"{c}_x" for c in columns]].to_numpy(dtype=np.float64)
+    ys = df[[f"{c}_y" for c in columns]].to_numpy(dtype=np.float64)
+    confident = df[[f"{c}_confidence" for c in columns]].to_numpy(dtype=np.float64) >= MIN_KEYPOINT_CONFIDENCE
+    found = confident.any(axis=1)
+    boxes[found, 0] = np.where(confident, xs, np.inf).min(axis=1)[found]
+    boxes[found, 1] = np.where(confident, ys, np.inf).min(axis=1)[found]
+    boxes[found, 2] = np.where(confident, xs, -np.inf).max(axis=1)[found]
+    boxes[found, 3] = np.where(confident, ys, -np.inf).max(axis=1)[found]
+    return boxes
+
+
+def ball_boxes(df):
+    """(x1, y1, x2, y2) of the first confident ball detection of each row; NaN where there is none"""
+    boxes = np.full((len(df), 4), np.nan)
+    if 'objects_detected' not in df.columns:
+        return boxes
+    parsed = df['objects_detected'].fillna('').astype(str).str.extract(BALL_PATTERN).astype(np.float64).to_numpy()
+    confident = parsed[:, 0] >= MIN_OBJECT_CONFIDENCE
+    boxes[confident] = parsed[confident, 1:]
+    return boxes
+
+
+def foot_points(df, keypoints):
+    """(rows x 2) mean position of the confident keypoints of one foot; NaN where there are none"""
+    columns = [f"kp_{i}" for i in keypoints if f"kp_{i}_x" in df.columns]
+    if not columns:
+        return np.full((len(df), 2), np.nan)
+    confident = df[[f"{c}_confidence" for c in columns]].to_numpy(dtype=np.float64) >= MIN_KEYPOINT_CONFIDENCE
+    count = confident.sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        x = np.where(confident, df[[f"{c}_x" for c in columns]].to_numpy(dtype=np.float64), 0).sum(axis=1) / count
+        y = np.where(confident, df[[f"{c}_y" for c in columns]].to_numpy(dtype=np.float64), 0).sum(axis=1) / count
+    return np.column_stack([x, y])
+
+
+def per_frame(df, values):
+    """Row values placed at their 0-based frame (first row wins for repeated frames); NaN for frames without a row"""
+    frame_idx = df['frame_id'].to_numpy(dtype=np.int64) - 1
+    keep = frame_idx >= 0
+    frames = int(frame_idx[keep].max()) + 1 if keep.any() else 0
+    placed = np.full((frames,) + values.shape[1:], np.nan)
+    order = np.flatnonzero(keep)[::-1]  # Reversed so the first row of a frame is written last
+    placed[frame_idx[order]] = values[order]
+    return placed
+
+
+def tracking_fps(df, default=30.0):
+    if 'fps' in df.columns and len(df) and df['fps'].iloc[0] > 0:
+        return float(df['fps'].iloc[0])
+    return default
+
+
+def compute_signals(df, fps=None):
+    """{name: float array indexed by 0-based frame} of the timeline signals, NaN where untracked
+
+    foot_speed     fastest foot, pixels per second
+    foot_height    highest foot above where that foot last touched down
+                   (its lowest point within the surrounding second), pixels
+    ball_distance  nearest foot to the ball centre, pixels
+    """
+    fps = fps or tracking_fps(df)
+    left = per_frame(df, foot_points(df, LEFT_FOOT_KEYPOINTS))
+    right = per_frame(df, foot_points(df, RIGHT_FOOT_KEYPOINTS))
+    ball = ball_boxes(df)
+    ball = per_frame(df, np.column_stack([(ball[:, 0] + ball[:, 2]) / 2, (ball[:, 1] + ball[:, 3]) / 2]))
+
+    speeds, heights, distances = [], [], []
+    window = max(3, int(round(fps)) | 1)
+    for foot in (left, right):
+        step = np.diff(foot, axis=0, prepend=np.full((1, 2), np.nan))
+        speeds.append(np.hypot(step[:, 0], step[:, 1]) * fps)
+        # Image y grows downward, so the ground contact is the largest y nearby
+        heights.append(moving(foot[:, 1], window, np.fmax.reduce) - foot[:, 1])
+        distances.append(np.hypot(*(foot - ball).T))
+    return {
+        'foot_speed': np.fmax(*speeds),
+        'foot_height': np.fmax(*heights),
+        'ball_distance': np.fmin(*distances)
+    }
+
+
+def moving(values, window, reduce):
+    """Centered rolling reduction (np.mean, np.max, ...) over `window` rows, edges padded with the end values"""
+    if window <= 1 or len(values) < 2:
+        return values
+    half = window // 2
+    padded = np.pad(values, (half, window - 1 - half), mode='edge')
+    return reduce(np.lib.stride_tricks.sliding_window_view(padded, window), axis=-1)
+
+
+def crop_boxes(df, total_frames, width, height, padding=DEFAULT_PADDING, min_size=DEFAULT_MIN_SIZE,
+               smooth=SMOOTH_FRAMES):
+    """(total_frames x 4) int array of (x, y, width, height) crops indexed by 0-based frame, or None
+
+    None means nothing usable was tracked, so frames should stay full size.
+    Frames without feet or ball take the box interpolated from their neighbours.
+    """
+    feet, ball = foot_boxes(df), ball_boxes(df)
+    raw = np.hstack([np.fmin(feet[:, :2], ball[:, :2]), np.fmax(feet[:, 2:], ball[:, 2:])])
+    frame_idx = df['frame_id'].to_numpy(dtype=np.int64) - 1
+    keep = (frame_idx >= 0) & (frame_idx < total_frames) & ~np.isnan(raw).any(axis=1)
+    if not keep.any():
+        return None
+
+    # Several rows for one frame (more than one tracked person) are merged into one box
+    per_frame = np.full((total_frames, 4), np.nan)
+    np.fmin.at(per_frame[:, 0], frame_idx[keep], raw[keep, 0])
+    np.fmin.at(per_frame[:, 1], frame_idx[keep], raw[keep, 1])
+    np.fmax.at(per_frame[:, 2], frame_idx[keep], raw[keep, 2])
+    np.fmax.at(per_frame[:, 3], frame_idx[keep], raw[keep, 3])
+
+    known = np.flatnonzero(~np.isnan(per_frame[:, 0]))
+    frames = np.arange(total_frames)
+    filled = np.column_stack([np.interp(frames, known, per_frame[known, i]) for i in range(4)])
+
+    # Centres are averaged; half-sizes take the window's maximum first so fast feet stay inside
+    centre_x = moving((filled[:, 0] + filled[:, 2]) / 2, smooth, np.mean)
+    centre_y = moving((filled[:, 1] + filled[:, 3]) / 2, smooth, np.mean)
+    half_w = moving(moving((filled[:, 2] - filled[:, 0]) / 2, smooth, np.max), smooth, np.mean)
+    half_h = moving(moving((filled[:, 3] - filled[:, 1]) / 2, smooth, np.max), smooth, np.mean)
+
+    half_w = np.maximum(half_w * (1 + padding), min_size / 2)
+    half_h = np.maximum(half_h * (1 + padding), min_size / 2)
+    crop_w = np.minimum(np.round(half_w).astype(np.int64) * 2, width)
+    crop_h = np.minimum(np.round(half_h).astype(np.int64) * 2, height)
+    x = np.clip(np.round(centre_x - crop_w / 2).astype(np.int64), 0, width - crop_w)
+    y = np.clip(np.round(centre_y - crop_h / 2).astype(np.int64), 0, height - crop_h)
+    return np.column_stack([x, y, crop_w, crop_h])
+
+
+class CropBoxes:
+    """Crop boxes per tracking CSV, recomputed only when the file or the parameters change"""
+
+    def __init__(self, folder, reader=read_csv):
+        self.folder = folder
+        self.reader = reader
+        self._lock = threading.Lock()
+        self._boxes = {}
+
+    def tracking_csv(self, video_filename):
+        return find_tracking_csv(self.folder, video_filename)
+
+    def get(self, tracking_path, total_frames, width, height, padding=DEFAULT_PADDING, min_size=DEFAULT_MIN_SIZE):
+        st = os.stat(tracking_path)
+        version = (st.st_mtime_ns, st.st_size, total_frames, width, height, padding, min_size)
+        with self._lock:
+            cached = self._boxes.get(tracking_path)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+        boxes = crop_boxes(self.reader(tracking_path), total_frames, width, height, padding, min_size)
+        with self._lock:
+            self._boxes[tracking_path] = (version, boxes)
+        return boxes